@@ -5,6 +5,7 @@ import pytz
 from app.models.database import get_db, User, Session as SessionModel, TimeSlot
 from app.models.schemas import BookingRequest, BookingResponse
 from app.services.slots_service import slots_service
+from app.core.security import create_reveal_token
 
 router = APIRouter()
 
@@ -22,7 +23,7 @@ async def create_booking(booking: BookingRequest, db: Session = Depends(get_db))
     - Validate email hasn't booked a slot today
     - Validate name hasn't booked a slot today  
     - Validate slot is still available
-    - Save booking to database
+    - Save booking to database, claiming a free seat (account) in the slot
     """
     try:
         # Get the actual stored TimeSlot from database
@@ -38,7 +39,7 @@ async def create_booking(booking: BookingRequest, db: Session = Depends(get_db))
         slot_start = stored_slot.start_time
         slot_end = stored_slot.end_time
         
-        # Verify slot is still available
+        # Verify slot is still on sale (free seats are checked when claiming one)
         if not stored_slot.available:
             raise HTTPException(
                 status_code=400,
@@ -61,7 +62,7 @@ async def create_booking(booking: BookingRequest, db: Session = Depends(get_db))
             SessionModel.user_email == booking.email,
             SessionModel.created_at >= today_start,
             SessionModel.created_at < today_end,
-            SessionModel.status.in_(["pending", "active"])
+            SessionModel.status.in_(["pending", "ready", "active"])
         ).first()
         
         if existing_email_booking:
@@ -75,7 +76,7 @@ async def create_booking(booking: BookingRequest, db: Session = Depends(get_db))
             SessionModel.user_name == booking.name,
             SessionModel.created_at >= today_start,
             SessionModel.created_at < today_end,
-            SessionModel.status.in_(["pending", "active"])
+            SessionModel.status.in_(["pending", "ready", "active"])
         ).first()
         
         if existing_name_booking:
@@ -84,16 +85,11 @@ async def create_booking(booking: BookingRequest, db: Session = Depends(get_db))
                 detail="This name has already booked a slot today. Each name can only book one slot per day."
             )
         
-        # Validation 3: Double-check no session exists for this specific slot
-        existing_slot_booking = db.query(SessionModel).filter(
-            SessionModel.slot_id == booking.slot_id,
-            SessionModel.status.in_(["pending", "active"])
-        ).first()
-        
-        if existing_slot_booking:
+        await slots_service.ensure_accounts()
+        if not slots_service.capacity:
             raise HTTPException(
-                status_code=400, 
-                detail="This slot is no longer available"
+                status_code=503,
+                detail="Booking is temporarily unavailable. Please try again in a few minutes."
             )
         
         # Create or get user
@@ -104,29 +100,33 @@ async def create_booking(booking: BookingRequest, db: Session = Depends(get_db))
             db.commit()
             db.refresh(user)
         
-        # Create session with slot_id reference
-        session = SessionModel(
-            user_id=user.id,
+        # Create session with slot_id reference on a free seat (account) of the slot
+        user_id = user.id
+        session = slots_service.claim_seat(db, stored_slot, lambda account_id: SessionModel(
+            user_id=user_id,
             user_name=booking.name,
             user_email=booking.email,
             start_time=slot_start,
             end_time=slot_end,
             status="pending",
-            slot_id=booking.slot_id  # Link to TimeSlot
-        )
+            slot_id=booking.slot_id,  # Link to TimeSlot
+            account_id=account_id
+        ))
         
-        db.add(session)
-        
-        # Mark the slot as booked
-        slots_service.mark_slot_booked(db, booking.slot_id)
+        if session is None:
+            raise HTTPException(
+                status_code=400, 
+                detail="This slot is no longer available"
+            )
         
-        db.commit()
-        db.refresh(session)
+        # Valid until the session ends; redeemable once the session is active
+        reveal_token = create_reveal_token(session.id, (slot_end - get_wat_now()).total_seconds())
         
         return BookingResponse(
             success=True,
             session_id=f"sess_{session.id}",
-            message="Booked successfully"
+            message="Booked successfully",
+            reveal_token=reveal_token
         )
         
     except HTTPException:
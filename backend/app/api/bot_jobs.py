@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from app.models.schemas import BotJobNotification
+from app.services.bot_service import bot_service
+
+router = APIRouter()
+
+
+@router.post("/bot/jobs/complete")
+async def bot_job_complete(notification: BotJobNotification):
+    """
+    Callback from the bot service when a reset job finishes
+    Only wakes the waiting scheduler job - the result itself is always
+    fetched from GET /bot/jobs/{id} on the bot, never taken from this body.
+    """
+    bot_service.notify_job_finished(notification.job_id)
+    return {"success": True}
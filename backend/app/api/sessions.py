@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from datetime import datetime
 import pytz
 from app.models.database import get_db, Session as SessionModel
-from app.models.schemas import ActiveSessionResponse, SessionDetailsResponse
+from app.models.schemas import ActiveSessionResponse, SessionDetailsResponse, SessionCredentialsResponse
+from app.core.security import verify_reveal_token
+from app.services.credential_reveal import credential_reveal
+from app.services.password_service import password_service
+from app.services.slots_service import slots_service
 from typing import Optional
 
 router = APIRouter()
@@ -74,4 +78,56 @@ async def get_session_details(session_id: str, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get session details: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to get session details: {str(e)}")
+
+
+@router.get("/sessions/{session_id}/credentials", response_model=SessionCredentialsResponse)
+async def reveal_session_credentials(session_id: str, token: str, response: Response, db: Session = Depends(get_db)):
+    """
+    Reveal the session's CapCut password once, as soon as the session is active
+    Needs the reveal_token returned by POST /api/bookings. Served from memory,
+    never waits on email delivery.
+    - 409 while the session has not started (poll again)
+    - 410 once revealed, expired, or no longer active (use the credentials email)
+    """
+    try:
+        if not session_id.startswith("sess_"):
+            raise HTTPException(status_code=400, detail="Invalid session ID format")
+        
+        session_db_id = int(session_id.replace("sess_", ""))
+        
+        if not verify_reveal_token(session_db_id, token):
+            raise HTTPException(status_code=403, detail="Invalid or expired reveal token")
+        
+        session = db.query(SessionModel).filter(SessionModel.id == session_db_id).first()
+        
+        if not session:
+            raise HTTPException(status_code=404, detail="Session not found")
+        
+        if session.status in ("pending", "ready"):
+            raise HTTPException(status_code=409, detail="Session has not started yet")
+        
+        encrypted_password = credential_reveal.get(session_db_id) if session.status == "active" else None
+        if not encrypted_password:
+            raise HTTPException(
+                status_code=410,
+                detail="Credentials already revealed or no longer available. Please check your email."
+            )
+        
+        # Build the response first - if it fails, the one-time reveal is still there to retry
+        credentials = SessionCredentialsResponse(
+            session_id=session_id,
+            email=slots_service.session_account_email(session),
+            password=password_service.decrypt_password(encrypted_password),
+            start_time=session.start_time.isoformat(),
+            end_time=session.end_time.isoformat()
+        )
+        credential_reveal.pop(session_db_id)
+        
+        response.headers["Cache-Control"] = "no-store"
+        return credentials
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to reveal credentials: {str(e)}")
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import pytz
-from app.models.database import get_db, Session as SessionModel, TimeSlot
+from app.models.database import get_db, TimeSlot
 from app.models.schemas import SlotsResponse, TimeSlotSchema
 from app.services.slots_service import slots_service
 
@@ -23,42 +23,42 @@ async def get_available_slots(db: Session = Depends(get_db)):
     - Slots are: 12:00-1:30, 1:30-3:00, 3:00-4:30, etc.
     - Last slot: 10:30 PM - 12:00 AM (ends exactly at midnight)
     - Returns stored TimeSlot data with real availability status
+    - Each slot has one seat per CapCut account; seats_remaining counts free ones
     """
     try:
         current_time = get_wat_now()
         
+        await slots_service.ensure_accounts()
+        
         # Get stored slots from database using slots_service
         # This automatically initializes slots if they don't exist
         stored_slots = slots_service.get_available_slots(db, current_time)
         
+        # Live sessions per slot in one query - each takes one seat (account)
+        seats_taken = slots_service.seats_taken(db)
+        capacity = slots_service.capacity
+        
         # Convert stored TimeSlots to TimeSlotSchema for API response
         slots = []
         
         for stored_slot in stored_slots:
             # Check if slot has actually started (for past slots)
             slot_has_started = stored_slot.start_time <= current_time
-            
-            # Check if there's an active session for this slot
-            existing_session = db.query(SessionModel).filter(
-                SessionModel.slot_id == stored_slot.id,
-                SessionModel.status.in_(["pending", "active"])
-            ).first()
+            seats_remaining = max(capacity - seats_taken.get(stored_slot.id, 0), 0)
             
             # Slot is available if:
-            # 1. Marked as available in database
+            # 1. It is open for booking (same check as POST /bookings)
             # 2. Has not started yet (current time is before slot start time)  
-            # 3. No active session exists for this slot
-            is_available = (
-                stored_slot.available and 
-                not slot_has_started and 
-                existing_session is None
-            )
+            # 3. At least one seat has no live session
+            is_available = stored_slot.available and not slot_has_started and seats_remaining > 0
             
             slots.append(TimeSlotSchema(
                 id=stored_slot.id,  # slot_1, slot_2, etc.
                 start_time=stored_slot.start_time.isoformat(),
                 end_time=stored_slot.end_time.isoformat(),
-                available=is_available
+                available=is_available,
+                seats_total=capacity,
+                seats_remaining=seats_remaining if stored_slot.available and not slot_has_started else 0
             ))
         
         return SlotsResponse(slots=slots)
@@ -7,9 +7,53 @@ class Settings(BaseSettings):
     bot_service_url: str = "http://localhost:5000"
     frontend_url: str = "http://localhost:3000"
     secret_key: str
+    # Comma-separated Fernet keys for stored credentials, newest first; rotate by
+    # prepending a key. Without them the key derived from SECRET_KEY is used.
+    encryption_keys: Optional[str] = None
+    # Also decrypt (and re-encrypt) rows under the SECRET_KEY-derived key after
+    # switching to ENCRYPTION_KEYS; turn off once the re-encrypt job has run
+    encryption_accept_legacy_key: bool = False
+    reencrypt_batch_size: int = 200
     gmail_user: str
     gmail_app_password: str
     environment: str = "development"
+
+    # Bot service client: shared keep-alive connection, retries and circuit breaker
+    bot_reset_timeout_seconds: float = 300.0
+    bot_job_poll_seconds: float = 5.0
+    # Optional URL the bot POSTs to when a reset job finishes, e.g.
+    # http://backend:8000/api/bot/jobs/complete - wakes the waiter before its next poll
+    bot_callback_url: Optional[str] = None
+    bot_retry_attempts: int = 3
+    bot_circuit_failure_threshold: int = 3
+    bot_circuit_reset_seconds: int = 60
+    # Slot seats are the bot's CapCut accounts (GET /bot/accounts, loaded at startup).
+    # Optional comma-separated subset of their ids to offer; ids the bot doesn't have are logged and skipped.
+    capcut_accounts: Optional[str] = None
+
+    # Credential pre-rotation: start the bot this many seconds before slot start
+    # and release the email exactly at start_time. Auto-tuned from rotation history.
+    prerotate_lead_seconds: int = 300
+    prerotate_auto_tune: bool = True
+    prerotate_max_lead_seconds: int = 1800
+    prerotate_sample_size: int = 20
+
+    # Outgoing mail (drained asynchronously from the email_outbox table).
+    # For a local SMTP sink: SMTP_HOST=localhost SMTP_PORT=1025 SMTP_USE_TLS=false SMTP_AUTH=false
+    smtp_host: str = "smtp.gmail.com"
+    smtp_port: int = 465
+    smtp_use_tls: bool = True
+    smtp_auth: bool = True
+    smtp_pool_size: int = 2
+    email_outbox_poll_seconds: int = 15
+    email_outbox_max_attempts: int = 8
+
+    # bcrypt runs on its own thread pool; the cost factor is calibrated at startup
+    # to the highest value within bcrypt_target_ms, clamped to [min, max] rounds
+    bcrypt_target_ms: int = 250
+    bcrypt_min_rounds: int = 10
+    bcrypt_max_rounds: int = 14
+    bcrypt_workers: int = 2
     
     class Config:
         env_file = ".env"
@@ -1,20 +1,82 @@
 """
 Security utilities for password hashing and encryption
 As specified in instructions.md Phase 8
+
+bcrypt is deliberately slow, so async callers hash and verify on a dedicated
+thread pool (bcrypt releases the GIL) instead of blocking the event loop.
+The cost factor is calibrated at startup to roughly settings.bcrypt_target_ms.
+
+Encryption uses one cached MultiFernet key ring per process. To rotate keys,
+prepend a new key to ENCRYPTION_KEYS; rows are re-encrypted in the background.
+Without ENCRYPTION_KEYS the key derived from SECRET_KEY is used; once keys are
+set it is only accepted while ENCRYPTION_ACCEPT_LEGACY_KEY is on.
 """
 
+import asyncio
+import base64
+import hashlib
+import hmac
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional
 import bcrypt
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Dedicated pool so hashing never competes with the default executor
+_hash_executor = ThreadPoolExecutor(max_workers=settings.bcrypt_workers, thread_name_prefix="bcrypt")
+
+# bcrypt's own default until calibrate_bcrypt_rounds() runs
+_bcrypt_rounds = 12
+
+
+def get_bcrypt_rounds() -> int:
+    return _bcrypt_rounds
+
+
+def calibrate_bcrypt_rounds(target_ms: float = None) -> int:
+    """
+    Pick the highest cost factor whose hash time stays within target_ms.
+    Each extra round doubles the cost, so one measurement is enough.
+    """
+    global _bcrypt_rounds
+
+    target_ms = target_ms or settings.bcrypt_target_ms
+    base_rounds = settings.bcrypt_min_rounds
+    salt = bcrypt.gensalt(rounds=base_rounds)
+
+    # Best of three to ignore a cold first run
+    base_ms = min(_time_hash_ms(salt) for _ in range(3))
+
+    rounds = base_rounds
+    while rounds < settings.bcrypt_max_rounds and base_ms * 2 ** (rounds + 1 - base_rounds) <= target_ms:
+        rounds += 1
+
+    _bcrypt_rounds = rounds
+    logger.info(f"bcrypt cost factor calibrated to {rounds} (~{base_ms * 2 ** (rounds - base_rounds):.0f}ms per hash, target {target_ms}ms)")
+    return rounds
+
+
+def _time_hash_ms(salt: bytes) -> float:
+    start = time.perf_counter()
+    bcrypt.hashpw(b"calibration-password", salt)
+    return (time.perf_counter() - start) * 1000
+
+
+async def calibrate_bcrypt_rounds_async(target_ms: float = None) -> int:
+    """Calibrate without blocking the event loop (called on app startup)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, calibrate_bcrypt_rounds, target_ms)
+
 
 def hash_password(password: str) -> str:
-    """Hash password using bcrypt for database storage"""
+    """Hash password using bcrypt for database storage (blocking)"""
     try:
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=_bcrypt_rounds)
         hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
         return hashed.decode('utf-8')
     except Exception as e:
@@ -23,7 +85,7 @@ def hash_password(password: str) -> str:
 
 
 def verify_password(password: str, hashed: str) -> bool:
-    """Verify password against hash"""
+    """Verify password against hash (blocking)"""
     try:
         return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
     except Exception as e:
@@ -31,23 +93,58 @@ def verify_password(password: str, hashed: str) -> bool:
         return False
 
 
-def get_encryption_cipher():
-    """Get consistent encryption cipher from SECRET_KEY"""
-    import base64
-    import hashlib
-    
-    # Use SECRET_KEY to generate consistent encryption key
+async def hash_password_async(password: str) -> str:
+    """Hash password on the bcrypt thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, hash_password, password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    """Verify password on the bcrypt thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, verify_password, password, hashed)
+
+
+def _legacy_fernet_key() -> bytes:
+    """Key historically derived from SECRET_KEY - the only key without ENCRYPTION_KEYS"""
     secret_bytes = settings.secret_key.encode()[:32].ljust(32, b'0')
     key_hash = hashlib.sha256(secret_bytes).digest()
-    fernet_key = base64.urlsafe_b64encode(key_hash)
-    return Fernet(fernet_key)
+    return base64.urlsafe_b64encode(key_hash)
+
+
+@lru_cache(maxsize=1)
+def _get_fernets() -> tuple:
+    """
+    ENCRYPTION_KEYS (newest first), then the legacy SECRET_KEY-derived key if
+    it is still accepted - or just the legacy key when no keys are configured
+    """
+    keys = [key.strip().encode() for key in (settings.encryption_keys or "").split(",") if key.strip()]
+    legacy_key = _legacy_fernet_key()
+    if (not keys or settings.encryption_accept_legacy_key) and legacy_key not in keys:
+        keys.append(legacy_key)
+    return tuple(Fernet(key) for key in keys)
+
+
+@lru_cache(maxsize=1)
+def get_key_ring() -> MultiFernet:
+    """Cached key ring - new tokens are always encrypted with the first (current) key"""
+    return MultiFernet(list(_get_fernets()))
+
+
+def has_previous_keys() -> bool:
+    """True when the ring holds keys besides the current one (rows may need re-encryption)"""
+    return len(_get_fernets()) > 1
+
+
+def get_encryption_cipher() -> MultiFernet:
+    """Get the shared encryption key ring"""
+    return get_key_ring()
 
 
 def encrypt_password(password: str) -> str:
     """Encrypt password for temporary storage"""
     try:
-        cipher = get_encryption_cipher()
-        encrypted = cipher.encrypt(password.encode('utf-8'))
+        encrypted = get_key_ring().encrypt(password.encode('utf-8'))
         return encrypted.decode('utf-8')
     except Exception as e:
         logger.error(f"Failed to encrypt password: {e}")
@@ -57,9 +154,45 @@ def encrypt_password(password: str) -> str:
 def decrypt_password(encrypted_password: str) -> str:
     """Decrypt password from storage"""
     try:
-        cipher = get_encryption_cipher()
-        decrypted = cipher.decrypt(encrypted_password.encode('utf-8'))
+        decrypted = get_key_ring().decrypt(encrypted_password.encode('utf-8'))
         return decrypted.decode('utf-8')
     except Exception as e:
         logger.error(f"Failed to decrypt password: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+def rotate_token(encrypted: str) -> Optional[str]:
+    """
+    Re-encrypt a token under the current key.
+    Returns None if it is already encrypted with the current key.
+    """
+    token = encrypted.encode('utf-8')
+    try:
+        _get_fernets()[0].decrypt(token)
+        return None
+    except InvalidToken:
+        return get_key_ring().rotate(token).decode('utf-8')
+
+
+def create_reveal_token(session_id: int, ttl_seconds: float) -> str:
+    """Signed token allowing a one-time credentials reveal for session_id until it expires"""
+    expires = int(time.time() + max(ttl_seconds, 0))
+    return f"{expires}.{_reveal_signature(session_id, expires)}"
+
+
+def verify_reveal_token(session_id: int, token: str) -> bool:
+    """Check a reveal token's signature and expiry for session_id"""
+    try:
+        expires_text, signature = token.split(".", 1)
+        expires = int(expires_text)
+    except (AttributeError, ValueError):
+        return False
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(signature, _reveal_signature(session_id, expires))
+
+
+def _reveal_signature(session_id: int, expires: int) -> str:
+    message = f"reveal:{session_id}:{expires}".encode()
+    digest = hmac.new(settings.secret_key.encode(), message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
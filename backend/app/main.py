@@ -6,21 +6,23 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from app.api import slots, bookings, sessions
+from apscheduler.triggers.date import DateTrigger
+from app.api import slots, bookings, sessions, bot_jobs
 from app.models.database import create_tables
 from app.core.config import settings
-from app.scheduler.jobs import session_start_job, session_end_job
+from app.scheduler import scheduler
+from app.scheduler.jobs import session_start_job, session_end_job, password_scrub_job, PASSWORD_SCRUB_JOB_ID
+from app.services.email_outbox import email_outbox
+from app.services.bot_service import bot_service
+from app.services.slots_service import slots_service
+from app.core.security import calibrate_bcrypt_rounds_async, has_previous_keys
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize scheduler
-scheduler = AsyncIOScheduler()
-
 # Create FastAPI app
 app = FastAPI(
     title="CapCut Sharing Backend",
@@ -41,6 +43,7 @@ app.add_middleware(
 app.include_router(slots.router, prefix="/api", tags=["slots"])
 app.include_router(bookings.router, prefix="/api", tags=["bookings"])
 app.include_router(sessions.router, prefix="/api", tags=["sessions"])
+app.include_router(bot_jobs.router, prefix="/api", tags=["bot"])
 
 
 @app.on_event("startup")
@@ -50,8 +53,12 @@ async def startup_event():
     create_tables()
     logger.info("✅ Database tables created successfully")
     
+    # Calibrate the bcrypt cost factor to the target hash latency on this host
+    await calibrate_bcrypt_rounds_async()
+    
     # Configure scheduler jobs
-    # Session Start Job - runs every minute to check for sessions that should start
+    # Session Start Job - runs every minute to pre-rotate credentials for sessions
+    # starting within the rotation lead time (and release any that are due)
     scheduler.add_job(
         session_start_job,
         trigger=IntervalTrigger(minutes=1),
@@ -69,16 +76,28 @@ async def startup_event():
         replace_existing=True
     )
     
-    # Password Cleanup Job - runs every 10 minutes to clean up expired passwords
+    # Password Cleanup Job - runs once now, then reschedules itself at the next
+    # plain password expiry (new passwords pull it earlier when needed)
     from app.services.password_service import password_service
     scheduler.add_job(
-        password_service.cleanup_expired_passwords,
-        trigger=IntervalTrigger(minutes=10),
-        id="password_cleanup_job",
+        password_scrub_job,
+        trigger=DateTrigger(),
+        id=PASSWORD_SCRUB_JOB_ID,
         name="Clean up expired passwords",
-        replace_existing=True
+        replace_existing=True,
+        misfire_grace_time=None
     )
     
+    # Key rotation - re-encrypt stored credentials under the newest ENCRYPTION_KEYS entry
+    if has_previous_keys():
+        scheduler.add_job(
+            password_service.reencrypt_stored_credentials,
+            trigger=DateTrigger(),
+            id="reencrypt_credentials_job",
+            name="Re-encrypt stored credentials after key rotation",
+            replace_existing=True
+        )
+    
     # Midnight Reset Job - runs daily at midnight to reset all slots
     from apscheduler.triggers.cron import CronTrigger
     from app.scheduler.jobs import midnight_reset_job
@@ -90,6 +109,13 @@ async def startup_event():
         replace_existing=True
     )
     
+    # Open the shared bot service client and start the email outbox sender
+    await bot_service.start()
+    await email_outbox.start()
+    
+    # Slot seats are the bot's CapCut accounts (retried on the next booking if the bot is down)
+    await slots_service.load_accounts()
+    
     # Start the scheduler
     scheduler.start()
     logger.info("✅ Scheduler started - running session management and password cleanup jobs")
@@ -97,10 +123,13 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Gracefully shutdown scheduler"""
+    """Gracefully shutdown scheduler, email outbox sender and bot client"""
     if scheduler.running:
         scheduler.shutdown()
         logger.info("✅ Scheduler shutdown successfully")
+    
+    await email_outbox.stop()
+    await bot_service.close()
 
 
 @app.get("/")
@@ -163,6 +192,7 @@ async def debug_sessions():
                 "end_time": str(session.end_time),
                 "status": session.status,
                 "slot_id": session.slot_id,
+                "account_id": session.account_id,
                 "comparison_local": session.start_time <= current_time,
                 "comparison_utc": session.start_time <= current_utc
             })
@@ -1,9 +1,12 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Float, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from sqlalchemy.sql import func
 from datetime import datetime
 from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Database setup
 engine = create_engine(settings.database_url)
@@ -11,6 +14,12 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+# Session statuses that hold a seat (an account) in their slot
+LIVE_SESSION_STATUSES = ("pending", "ready", "active")
+# Unique index over live sessions' (slot_id, account_id)
+SEAT_INDEX_NAME = "uq_sessions_slot_account_live"
+
+
 # Database Models (from instructions.md schema)
 class User(Base):
     __tablename__ = "users"
@@ -40,6 +49,17 @@ class Password(Base):
     # Relationships
     session = relationship("Session", back_populates="passwords")
 
+    # Partial index: the scrub and next-expiry lookups only ever touch rows
+    # that still hold an encrypted plain password
+    __table_args__ = (
+        Index(
+            "ix_passwords_expires_at_unscrubbed",
+            "expires_at",
+            postgresql_where=plain_password.isnot(None),
+            sqlite_where=plain_password.isnot(None)
+        ),
+    )
+
 
 class TimeSlot(Base):
     __tablename__ = "time_slots"
@@ -60,7 +80,6 @@ class TimeSlot(Base):
 
 class Session(Base):
     __tablename__ = "sessions"
-    __table_args__ = {'extend_existing': True}
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -68,10 +87,12 @@ class Session(Base):
     user_email = Column(String(255))
     start_time = Column(DateTime, nullable=False)
     end_time = Column(DateTime, nullable=False)
-    status = Column(String(50), default="pending")  # pending, active, completed, no-show
+    status = Column(String(50), default="pending")  # pending, ready, active, completed, no-show
     current_password_id = Column(Integer)
     next_user_email = Column(String(255))
     slot_id = Column(String(20), ForeignKey("time_slots.id"), nullable=True)  # Link to TimeSlot
+    account_id = Column(String(50), index=True)  # Bot CapCut account (seat) this session uses
+    account_email = Column(String(255))  # CapCut login of that account, for the credentials email
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
@@ -80,6 +101,47 @@ class Session(Base):
     passwords = relationship("Password", back_populates="session")
     time_slot = relationship("TimeSlot", back_populates="sessions")
 
+    # One live session per (slot, account): concurrent bookings can't claim the same seat
+    __table_args__ = (
+        Index(
+            SEAT_INDEX_NAME,
+            "slot_id",
+            "account_id",
+            unique=True,
+            postgresql_where=status.in_(LIVE_SESSION_STATUSES),
+            sqlite_where=status.in_(LIVE_SESSION_STATUSES)
+        ),
+        {'extend_existing': True},
+    )
+
+
+class RotationLog(Base):
+    __tablename__ = "rotation_logs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer)  # No FK - logs outlive the midnight session cleanup
+    kind = Column(String(20), nullable=False)  # session_start, session_end
+    started_at = Column(DateTime, nullable=False)
+    duration_seconds = Column(Float, nullable=False)
+    success = Column(Boolean, default=False, index=True)
+    created_at = Column(DateTime, default=func.now())
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer)  # No FK - delivery history outlives the midnight session cleanup
+    recipient = Column(String(255), nullable=False)
+    template = Column(String(50), nullable=False)  # credentials, booking_confirmation
+    payload = Column(Text, nullable=False)  # Encrypted JSON of template arguments
+    status = Column(String(20), default="pending", index=True)  # pending, sent, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, index=True)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=func.now())
+    sent_at = Column(DateTime)
+
 
 class DailyLog(Base):
     __tablename__ = "daily_logs"
@@ -103,4 +165,12 @@ def get_db():
 
 # Create tables
 def create_tables():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist - add indexes declared since
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                # e.g. a column added since - run fix_database_schema.py
+                logger.error(f"Could not create index {index.name}: {e}")
\ No newline at end of file
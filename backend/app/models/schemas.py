@@ -17,6 +17,8 @@ class TimeSlotSchema(BaseModel):
     start_time: str
     end_time: str
     available: bool = True
+    seats_total: int = 1
+    seats_remaining: int = 1
 
     class Config:
         json_encoders = {
@@ -57,6 +59,8 @@ class BookingResponse(BaseModel):
     success: bool
     session_id: str
     message: str
+    # Signed token for a one-time GET /api/sessions/{id}/credentials once the session is active
+    reveal_token: Optional[str] = None
 
 
 class ActiveSessionResponse(BaseModel):
@@ -87,6 +91,15 @@ class SessionDetailsResponse(BaseModel):
         }
 
 
+class SessionCredentialsResponse(BaseModel):
+    """Response schema for GET /api/sessions/{id}/credentials (one-time reveal)"""
+    session_id: str
+    email: str  # CapCut login of the session's seat account
+    password: str
+    start_time: str
+    end_time: str
+
+
 # Database Model Schemas
 
 class UserCreate(BaseModel):
@@ -207,4 +220,9 @@ class BotResetPasswordResponse(BaseModel):
     """Response schema for bot reset password"""
     success: bool
     new_password: str
-    message: str
\ No newline at end of file
+    message: str
+
+class BotJobNotification(BaseModel):
+    """Callback body the bot POSTs when a reset job finishes"""
+    job_id: str
+    status: str
@@ -1 +1,6 @@
-# Scheduler module for session management
\ No newline at end of file
+# Scheduler module for session management
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+# Shared scheduler instance - started by the app on startup.
+# Jobs use it to schedule one-off follow-ups (e.g. credential release at slot start).
+scheduler = AsyncIOScheduler()
@@ -4,18 +4,20 @@ As specified in instructions.md Phase 5
 """
 
 from datetime import datetime
+import time
 import pytz
+from apscheduler.triggers.date import DateTrigger
 from sqlalchemy.orm import Session
 from app.models.database import SessionLocal, Session as SessionModel, Password
 from app.services.bot_service import bot_service
 from app.services.password_service import password_service
 from app.services.email_service import email_service
+from app.services.email_outbox import email_outbox
+from app.services.credential_reveal import credential_reveal
 from app.services.slots_service import slots_service
+from app.services.rotation_service import rotation_service
+from app.scheduler import scheduler
 import logging
-import sys
-import os
-import httpx
-from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -38,8 +40,14 @@ async def session_start_job():
     - Call POST /bot/reset-password
     - Generate new strong password
     - Store password in DB (encrypted)
-    - Send email to user with credentials
+    - Queue credentials email to user (email outbox)
     - Update session.status = 'active'
+
+    Pre-rotation: a full bot rotation takes minutes, so the rotation starts
+    `lead` ahead of start_time (session becomes 'ready') and the credentials
+    email is queued exactly at start_time by release_session_credentials.
+    Each session's rotation runs as its own job (start_session), so the seats
+    of a slot rotate in parallel and this tick never waits on the bot.
     """
     db = None
     try:
@@ -47,77 +55,31 @@ async def session_start_job():
         # Use West Africa Time (UTC+1)
         wat_tz = pytz.timezone('Africa/Lagos')
         current_time = datetime.now(wat_tz).replace(tzinfo=None)
+        lead = rotation_service.get_lead_time(db)
         
-        # Find sessions that should start
-        pending_sessions = db.query(SessionModel).filter(
+        # Release any pre-rotated sessions whose start has passed (e.g. after a restart)
+        due_ready_sessions = db.query(SessionModel).filter(
             SessionModel.start_time <= current_time,
+            SessionModel.status == "ready"
+        ).all()
+        for session in due_ready_sessions:
+            await release_session_credentials(session.id)
+        
+        # Find sessions that should start, or will start within the lead time
+        pending_sessions = db.query(SessionModel).filter(
+            SessionModel.start_time <= current_time + lead,
             SessionModel.status == "pending"
         ).all()
         
         for session in pending_sessions:
-            try:
-                logger.info(f"Starting session {session.id} for {session.user_email}")
-                
-                # Call bot service via HTTP to reset password
-                try:
-                    async with httpx.AsyncClient() as client:
-                        response = await client.post(
-                            f"{settings.bot_service_url}/bot/reset-password",
-                            json={},  # Bot will use env vars for email and generate password
-                            timeout=300.0  # 5 minutes timeout for bot operations
-                        )
-                        
-                        if response.status_code == 200:
-                            bot_result = response.json()
-                            success = bot_result.get("success", False)
-                            new_password = bot_result.get("new_password")
-                        else:
-                            logger.error(f"Bot service returned status {response.status_code}: {response.text}")
-                            success = False
-                            new_password = None
-                            
-                except Exception as e:
-                    logger.error(f"Failed to call bot service: {e}")
-                    success = False
-                    new_password = None
-                
-                if success and new_password:
-                    
-                    # Create password entry in database
-                    password_entry_data = password_service.create_password_entry(
-                        password=new_password,
-                        session_id=session.id
-                    )
-                    
-                    # Save password to database
-                    password_entry = Password(**password_entry_data)
-                    db.add(password_entry)
-                    db.commit()
-                    db.refresh(password_entry)
-                    
-                    # Send email with credentials
-                    email_sent = email_service.send_credentials_email(
-                        user_name=session.user_name,
-                        user_email=session.user_email,
-                        password=new_password,
-                        start_time=session.start_time.isoformat(),
-                        end_time=session.end_time.isoformat()
-                    )
-                    
-                    if email_sent:
-                        # Update session status
-                        session.status = "active"
-                        session.current_password_id = password_entry.id
-                        db.commit()
-                        logger.info(f"Session {session.id} started successfully")
-                    else:
-                        logger.error(f"Failed to send email for session {session.id}")
-                else:
-                    logger.error(f"Bot failed to reset password for session {session.id}")
-                    
-            except Exception as e:
-                logger.error(f"Failed to start session {session.id}: {e}")
-                db.rollback()
+            # Rotating early would lock out the user still on the account;
+            # session_end_job hands over to this session when theirs ends.
+            if session.start_time > current_time and account_in_use(db, current_time, session.account_id):
+                logger.info(f"Skipping pre-rotation for session {session.id}: account {session.account_id} in use until previous session ends")
+                continue
+            
+            if schedule_rotation(start_session, "session_start", session.id):
+                logger.info(f"Starting session {session.id} for {session.user_email} on account {session.account_id} (starts {session.start_time}, lead {lead.total_seconds():.0f}s)")
         
         if db:
             db.close()
@@ -128,6 +90,161 @@ async def session_start_job():
             db.close()
 
 
+# (kind, session_id) of rotations scheduled or running - later ticks don't start them again
+_rotations_in_flight: set[tuple[str, int]] = set()
+
+
+def schedule_rotation(job, kind: str, session_id: int) -> bool:
+    """
+    Run job(session_id) now as its own scheduler job, alongside the other
+    sessions' rotations. Returns False if that rotation is already underway.
+    """
+    if (kind, session_id) in _rotations_in_flight:
+        return False
+    _rotations_in_flight.add((kind, session_id))
+    scheduler.add_job(
+        job,
+        trigger=DateTrigger(),
+        args=[session_id],
+        id=f"{kind}_{session_id}",
+        name=f"Rotate credentials for {kind} of session {session_id}",
+        replace_existing=True,
+        misfire_grace_time=None
+    )
+    return True
+
+
+async def start_session(session_id: int):
+    """
+    Pre-rotate one pending session's account and hold the new credentials
+    until its start_time (runs on its own DB session)
+    """
+    db = None
+    try:
+        db = get_database_session()
+        wat_tz = pytz.timezone('Africa/Lagos')
+        session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+        
+        if not session or session.status != "pending":
+            return
+        
+        # Call bot service to reset the password of this session's account
+        rotation_started = datetime.now(wat_tz).replace(tzinfo=None)
+        rotation_clock = time.monotonic()
+        bot_result = await bot_service.reset_password(kind="session_start", account_id=session.account_id)
+        success = bot_result.get("success", False)
+        new_password = bot_result.get("new_password")
+        
+        rotation_service.record_rotation(
+            db,
+            kind="session_start",
+            session_id=session.id,
+            started_at=rotation_started,
+            duration_seconds=time.monotonic() - rotation_clock,
+            success=bool(success and new_password)
+        )
+        
+        if success and new_password:
+            
+            # Create password entry in database
+            password_entry_data = await password_service.create_password_entry(
+                password=new_password,
+                session_id=session.id,
+                not_before=session.start_time
+            )
+            
+            # Save password to database and hold credentials until start_time
+            password_entry = Password(**password_entry_data)
+            db.add(password_entry)
+            db.flush()
+            session.status = "ready"
+            session.current_password_id = password_entry.id
+            db.commit()
+            schedule_password_scrub(password_entry.expires_at)
+            
+            release_at = session.start_time
+            if release_at <= datetime.now(wat_tz).replace(tzinfo=None):
+                await release_session_credentials(session.id)
+            else:
+                scheduler.add_job(
+                    release_session_credentials,
+                    trigger=DateTrigger(run_date=release_at, timezone=wat_tz),
+                    args=[session.id],
+                    id=f"release_session_{session.id}",
+                    name=f"Release credentials for session {session.id}",
+                    replace_existing=True
+                )
+                logger.info(f"Session {session.id} credentials ready, release scheduled at {release_at}")
+        else:
+            logger.error(f"Bot failed to reset password for session {session.id}")
+            
+    except Exception as e:
+        logger.error(f"Failed to start session {session_id}: {e}")
+        if db:
+            db.rollback()
+    finally:
+        if db:
+            db.close()
+        _rotations_in_flight.discard(("session_start", session_id))
+
+
+def account_in_use(db: Session, current_time: datetime, account_id: str = None) -> bool:
+    """True while an active session still holds the account"""
+    return db.query(SessionModel).filter(
+        SessionModel.status == "active",
+        SessionModel.end_time > current_time,
+        SessionModel.account_id == account_id
+    ).first() is not None
+
+
+async def release_session_credentials(session_id: int):
+    """
+    Release pre-rotated credentials at session start
+    Queues the credentials email and flips the session from 'ready' to 'active'
+    """
+    db = None
+    try:
+        db = get_database_session()
+        session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+        
+        if not session or session.status != "ready":
+            return
+        
+        password_entry = db.query(Password).filter(Password.id == session.current_password_id).first()
+        if not password_entry or not password_entry.plain_password:
+            logger.error(f"No releasable password for session {session_id}")
+            return
+        
+        # Activation and the credentials email commit together; the outbox
+        # sender delivers (and retries) the email off the scheduler's path
+        email_service.enqueue_credentials_email(
+            db,
+            session_id=session.id,
+            user_name=session.user_name,
+            user_email=session.user_email,
+            account_email=slots_service.session_account_email(session),
+            password=password_service.decrypt_password(password_entry.plain_password),
+            start_time=session.start_time.isoformat(),
+            end_time=session.end_time.isoformat()
+        )
+        session.status = "active"
+        db.commit()
+        email_outbox.notify()
+        credential_reveal.put(session.id, password_entry.plain_password, password_entry.expires_at)
+        
+        wat_tz = pytz.timezone('Africa/Lagos')
+        delay = (datetime.now(wat_tz).replace(tzinfo=None) - session.start_time).total_seconds()
+        logger.info(f"Session {session_id} started successfully (credentials released {delay:.1f}s after start)")
+            
+    except Exception as e:
+        logger.error(f"Failed to release credentials for session {session_id}: {e}")
+        if db:
+            db.rollback()
+    finally:
+        if db:
+            db.close()
+
+
 async def session_end_job():
     """
     Session End Job - Runs every minute
@@ -138,6 +255,8 @@ async def session_end_job():
     - Check for next_session
     - If next_session exists: Send email to next_user with new credentials
     - Update current session status to 'completed'
+
+    Like session starts, each ending session rotates in its own job (end_session).
     """
     db = None
     try:
@@ -153,75 +272,8 @@ async def session_end_job():
         ).all()
         
         for session in active_sessions:
-            try:
+            if schedule_rotation(end_session, "session_end", session.id):
                 logger.info(f"Ending session {session.id} for {session.user_email}")
-                
-                # Call bot service via HTTP to reset password for next session
-                try:
-                    async with httpx.AsyncClient() as client:
-                        response = await client.post(
-                            f"{settings.bot_service_url}/bot/reset-password",
-                            json={},  # Bot will use env vars for email and generate password
-                            timeout=300.0  # 5 minutes timeout for bot operations
-                        )
-                        
-                        if response.status_code == 200:
-                            bot_result = response.json()
-                            success = bot_result.get("success", False)
-                            new_password = bot_result.get("new_password")
-                        else:
-                            logger.error(f"Bot service returned status {response.status_code}: {response.text}")
-                            success = False
-                            new_password = None
-                            
-                except Exception as e:
-                    logger.error(f"Failed to call bot service: {e}")
-                    success = False
-                    new_password = None
-                
-                if success and new_password:
-                    # Check for next session (starts right after this one ends)
-                    next_session = db.query(SessionModel).filter(
-                        SessionModel.start_time == session.end_time,
-                        SessionModel.status == "pending"
-                    ).first()
-                    
-                    if next_session:
-                        # Send email to next user
-                        email_sent = email_service.send_credentials_email(
-                            user_name=next_session.user_name,
-                            user_email=next_session.user_email,
-                            password=new_password,
-                            start_time=next_session.start_time.isoformat(),
-                            end_time=next_session.end_time.isoformat()
-                        )
-                        
-                        if email_sent:
-                            # Update next session status
-                            next_session.status = "active"
-                            password_entry_data = password_service.create_password_entry(
-                                password=new_password,
-                                session_id=next_session.id
-                            )
-                            
-                            # Save password to database
-                            next_password_entry = Password(**password_entry_data)
-                            db.add(next_password_entry)
-                            db.commit()
-                            db.refresh(next_password_entry)
-                            
-                            next_session.current_password_id = next_password_entry.id
-                    
-                    # Update current session status
-                    session.status = "completed"
-                    db.commit()
-                    logger.info(f"Session {session.id} ended successfully")
-                else:
-                    logger.error(f"Failed to reset password after session {session.id}")
-                    
-            except Exception as e:
-                logger.error(f"Failed to end session {session.id}: {e}")
-                db.rollback()
         
         if db:
             db.close()
@@ -232,6 +284,136 @@ async def session_end_job():
             db.close()
 
 
+async def end_session(session_id: int):
+    """
+    Rotate an ended session's account and hand the new credentials to the
+    next session on that account, if any (runs on its own DB session)
+    """
+    db = None
+    try:
+        db = get_database_session()
+        wat_tz = pytz.timezone('Africa/Lagos')
+        session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+        
+        if not session or session.status != "active":
+            return
+        
+        # Call bot service to reset password for next session on this account
+        rotation_started = datetime.now(wat_tz).replace(tzinfo=None)
+        rotation_clock = time.monotonic()
+        bot_result = await bot_service.reset_password(kind="session_end", account_id=session.account_id)
+        success = bot_result.get("success", False)
+        new_password = bot_result.get("new_password")
+        
+        rotation_service.record_rotation(
+            db,
+            kind="session_end",
+            session_id=session.id,
+            started_at=rotation_started,
+            duration_seconds=time.monotonic() - rotation_clock,
+            success=bool(success and new_password)
+        )
+        
+        if success and new_password:
+            # Check for next session on the same account (starts right after this one ends)
+            next_session = db.query(SessionModel).filter(
+                SessionModel.start_time == session.end_time,
+                SessionModel.account_id == session.account_id,
+                SessionModel.status == "pending"
+            ).first()
+            
+            if next_session:
+                # Activate next session and queue its email in one transaction
+                password_entry_data = await password_service.create_password_entry(
+                    password=new_password,
+                    session_id=next_session.id
+                )
+                next_password_entry = Password(**password_entry_data)
+                db.add(next_password_entry)
+                db.flush()
+                
+                next_session.status = "active"
+                next_session.current_password_id = next_password_entry.id
+                email_service.enqueue_credentials_email(
+                    db,
+                    session_id=next_session.id,
+                    user_name=next_session.user_name,
+                    user_email=next_session.user_email,
+                    account_email=slots_service.session_account_email(next_session),
+                    password=new_password,
+                    start_time=next_session.start_time.isoformat(),
+                    end_time=next_session.end_time.isoformat()
+                )
+            
+            # Update current session status
+            session.status = "completed"
+            db.commit()
+            email_outbox.notify()
+            if next_session:
+                credential_reveal.put(next_session.id, next_password_entry.plain_password, next_password_entry.expires_at)
+                schedule_password_scrub(next_password_entry.expires_at)
+            logger.info(f"Session {session.id} ended successfully")
+        else:
+            logger.error(f"Failed to reset password after session {session.id}")
+            
+    except Exception as e:
+        logger.error(f"Failed to end session {session_id}: {e}")
+        if db:
+            db.rollback()
+    finally:
+        if db:
+            db.close()
+        _rotations_in_flight.discard(("session_end", session_id))
+
+
+PASSWORD_SCRUB_JOB_ID = "password_cleanup_job"
+
+
+async def password_scrub_job():
+    """
+    Password Cleanup Job - runs at the next plain password expiry
+    Clears every expired plain password, then reschedules itself for the
+    following expires_at (nothing is scheduled while none are pending).
+    """
+    db = None
+    try:
+        db = get_database_session()
+        password_service.cleanup_expired_passwords(db)
+        next_expiry = password_service.next_password_expiry(db)
+    except Exception as e:
+        logger.error(f"Password cleanup job failed: {e}")
+        return
+    finally:
+        if db:
+            db.close()
+
+    schedule_password_scrub(next_expiry, replace=True)
+
+
+def schedule_password_scrub(run_at: datetime, replace: bool = False):
+    """
+    Schedule the password cleanup job at run_at (naive WAT) unless it is
+    already due to run earlier. replace=True always moves it to run_at.
+    """
+    if run_at is None:
+        return
+
+    wat_tz = pytz.timezone('Africa/Lagos')
+    run_at = wat_tz.localize(run_at)
+    existing = scheduler.get_job(PASSWORD_SCRUB_JOB_ID)
+    if not replace and existing and existing.next_run_time and existing.next_run_time <= run_at:
+        return
+
+    scheduler.add_job(
+        password_scrub_job,
+        trigger=DateTrigger(run_date=run_at),
+        id=PASSWORD_SCRUB_JOB_ID,
+        name="Clean up expired passwords",
+        replace_existing=True,
+        misfire_grace_time=None
+    )
+
+
 async def midnight_reset_job():
     """
     Midnight Reset Job - Runs every day at 12:00 AM
@@ -249,6 +431,9 @@ async def midnight_reset_job():
         # Reset daily slots using slots_service
         slots_service.reset_daily_slots(db, current_time)
         
+        # Pick up accounts added to or removed from the bot since startup
+        await slots_service.load_accounts()
+        
         logger.info("Midnight reset job completed successfully")
         
         if db:
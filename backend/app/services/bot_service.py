@@ -1,20 +1,157 @@
 """
 Bot service client for communicating with CapCut bot
 As specified in instructions.md
+
+One long-lived, pooled httpx client is shared by all callers (opened and
+closed by the app lifespan). Connection failures are retried with jittered
+backoff, and a circuit breaker makes calls fail fast while the bot is down.
+Password resets go through the bot's job API, so no request stays open for
+the length of a browser flow.
 """
 
+import asyncio
+import random
+import time
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Per-operation timeouts - resets are submitted as jobs, so each request is short
+JOB_REQUEST_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+LOGOUT_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+HEALTH_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+
+# Errors raised before the request reached the bot - always safe to retry
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Bot unreachable or overloaded - counted against the circuit breaker
+UNAVAILABLE_STATUS_CODES = (502, 503, 504)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the bot while the circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    until `reset_timeout` has passed, then lets a single trial call through.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def seconds_until_trial(self) -> float:
+        """How long until an open circuit lets a trial call through (0 unless open)"""
+        if self.state != "open":
+            return 0.0
+        return self.reset_timeout - (time.monotonic() - self.opened_at)
+
+    def release_trial(self) -> None:
+        """The trial call ended without a verdict (cancelled) - let the next call be the trial"""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._trial_in_flight:
+                logger.warning(f"Bot service circuit opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
 
 class BotServiceClient:
     def __init__(self):
         self.base_url = settings.bot_service_url
-        self.timeout = 60.0  # Bot operations can take time
+        self.client: Optional[httpx.AsyncClient] = None
+        self._job_events: Dict[str, asyncio.Event] = {}
+        self.circuit = CircuitBreaker(
+            failure_threshold=settings.bot_circuit_failure_threshold,
+            reset_timeout=settings.bot_circuit_reset_seconds
+        )
+
+    async def start(self) -> None:
+        """Open the shared keep-alive client (called on app startup)"""
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60.0)
+            )
+
+    async def close(self) -> None:
+        """Close the shared client (called on app shutdown)"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def _request(self, method: str, path: str, timeout: httpx.Timeout, **kwargs) -> httpx.Response:
+        """
+        Send a request through the shared client with retries and the circuit breaker.
+        Raises on transport errors after the final attempt.
+        """
+        # Only the call that claimed the half-open trial may hand it back
+        trial = self.circuit.state == "half-open"
+        if not self.circuit.allow_request():
+            raise CircuitOpenError("Bot service circuit is open - failing fast")
+
+        try:
+            if self.client is None:
+                await self.start()
+
+            attempts = settings.bot_retry_attempts
+            for attempt in range(1, attempts + 1):
+                try:
+                    response = await self.client.request(method, path, timeout=timeout, **kwargs)
+                except RETRYABLE_ERRORS as e:
+                    if attempt == attempts:
+                        self.circuit.record_failure()
+                        raise
+                    delay = min(0.5 * 2 ** (attempt - 1), 5.0) * random.uniform(0.5, 1.5)
+                    logger.warning(f"Bot service {method} {path} failed ({e!r}), retry {attempt}/{attempts - 1} in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                except Exception:
+                    self.circuit.record_failure()
+                    raise
+
+                if response.status_code in UNAVAILABLE_STATUS_CODES:
+                    self.circuit.record_failure()
+                else:
+                    self.circuit.record_success()
+                return response
+        except BaseException:
+            # Cancelled (shutdown, job cancelled) mid-call - don't leave a half-open trial claimed forever
+            if trial:
+                self.circuit.release_trial()
+            raise
 
     async def logout_user(self, email: str) -> Dict[str, Any]:
         """
@@ -22,74 +159,133 @@ class BotServiceClient:
         As specified in instructions.md Bot Service Endpoints
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/bot/logout",
-                    json={"email": email}
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    logger.info(f"Successfully logged out user: {email}")
-                    return result
-                else:
-                    error_msg = f"Bot logout failed: {response.status_code} - {response.text}"
-                    logger.error(error_msg)
-                    return {"success": False, "message": error_msg}
-                    
+            response = await self._request("POST", "/bot/logout", LOGOUT_TIMEOUT, json={"email": email})
+
+            if response.status_code == 200:
+                result = response.json()
+                logger.info(f"Successfully logged out user: {email}")
+                return result
+            else:
+                error_msg = f"Bot logout failed: {response.status_code} - {response.text}"
+                logger.error(error_msg)
+                return {"success": False, "message": error_msg}
+
         except Exception as e:
             error_msg = f"Bot logout request failed: {str(e)}"
             logger.error(error_msg)
             return {"success": False, "message": error_msg}
 
-    async def reset_password(self, email: str, new_password: str = None) -> Dict[str, Any]:
+    async def reset_password(self, email: str = None, new_password: str = None, kind: str = "manual", account_id: str = None) -> Dict[str, Any]:
         """
-        Call POST /bot/reset-password to reset CapCut password
-        As specified in instructions.md Bot Service Endpoints
-        
+        Reset CapCut password through the bot's asynchronous job API
+        POST /bot/jobs returns a job id at once; the result is fetched with
+        short GET /bot/jobs/{id} calls, woken early by the bot's callback.
+
         Args:
-            email: The CapCut account email
+            email: Optional - the CapCut account email (bot uses CAPCUT_EMAIL if not provided)
             new_password: Optional - if not provided, bot will generate one
+            kind: session_start or session_end - session starts are run first by the bot
+            account_id: Optional - the bot account (slot seat) to rotate; its default account if not provided
         """
+        account = account_id or email or 'default account'
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                payload = {"email": email}
-                if new_password:
-                    payload["new_password"] = new_password
-                
-                response = await client.post(
-                    f"{self.base_url}/bot/reset-password",
-                    json=payload
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    logger.info(f"Successfully reset password for: {email}")
-                    return result
-                else:
-                    error_msg = f"Bot password reset failed: {response.status_code} - {response.text}"
-                    logger.error(error_msg)
-                    return {"success": False, "message": error_msg}
-                    
+            payload = {"kind": kind}
+            if account_id:
+                payload["account_id"] = account_id
+            if email:
+                payload["email"] = email
+            if new_password:
+                payload["new_password"] = new_password
+            if settings.bot_callback_url:
+                payload["callback_url"] = settings.bot_callback_url
+
+            response = await self._request("POST", "/bot/jobs", JOB_REQUEST_TIMEOUT, json=payload)
+            if response.status_code != 202:
+                error_msg = f"Bot password reset failed: {response.status_code} - {response.text}"
+                logger.error(error_msg)
+                return {"success": False, "message": error_msg}
+
+            job_id = response.json()["job_id"]
+            logger.info(f"Bot accepted {kind} reset job {job_id} for {account}")
+
+            result = await self._wait_for_job(job_id)
+            if result.get("success"):
+                logger.info(f"Successfully reset password for: {account} (job {job_id})")
+            else:
+                logger.error(f"Bot password reset job {job_id} failed: {result.get('message')}")
+            return result
+
         except Exception as e:
             error_msg = f"Bot password reset request failed: {str(e)}"
             logger.error(error_msg)
             return {"success": False, "message": error_msg}
 
+    async def _wait_for_job(self, job_id: str) -> Dict[str, Any]:
+        """Poll a bot job until it finishes or the reset timeout passes"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.bot_reset_timeout_seconds
+        wake = self._job_events.setdefault(job_id, asyncio.Event())
+
+        try:
+            while loop.time() < deadline:
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout=settings.bot_job_poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                wake.clear()
+
+                try:
+                    response = await self._request("GET", f"/bot/jobs/{job_id}", JOB_REQUEST_TIMEOUT)
+                except CircuitOpenError:
+                    # The bot already accepted the job and may still rotate the password -
+                    # keep waiting for its result until the deadline, retrying once the circuit allows
+                    logger.warning(f"Bot service circuit open while waiting for job {job_id}, retrying after cooldown")
+                    await asyncio.sleep(max(0.0, min(self.circuit.seconds_until_trial(), deadline - loop.time())))
+                    continue
+                except Exception as e:
+                    # Keep waiting - the job is still running on the bot
+                    logger.warning(f"Polling bot job {job_id} failed: {e}")
+                    continue
+
+                if response.status_code == 404:
+                    return {"success": False, "message": f"Bot job {job_id} not found (bot restarted?)"}
+                if response.status_code == 200:
+                    job = response.json()
+                    if job["status"] in ("succeeded", "failed"):
+                        return job
+
+            return {"success": False, "message": f"Bot job {job_id} did not finish within {settings.bot_reset_timeout_seconds:.0f}s"}
+        finally:
+            self._job_events.pop(job_id, None)
+
+    def notify_job_finished(self, job_id: str) -> None:
+        """Wake the waiter for a job (bot callback). The result is still fetched from the bot."""
+        event = self._job_events.get(job_id)
+        if event:
+            event.set()
+
+    async def list_accounts(self) -> List[Dict[str, Any]]:
+        """
+        Call GET /bot/accounts - the CapCut accounts the bot rotates (slot seats)
+        Raises if the bot can't be reached or answers with an error.
+        """
+        response = await self._request("GET", "/bot/accounts", HEALTH_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
     async def health_check(self) -> Dict[str, Any]:
         """Check if bot service is running"""
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/health")
-                
-                if response.status_code == 200:
-                    logger.info("Bot service is healthy")
-                    return {"success": True, "message": "Bot service is healthy"}
-                else:
-                    error_msg = f"Bot service unhealthy: {response.status_code}"
-                    logger.warning(error_msg)
-                    return {"success": False, "message": error_msg}
-                    
+            response = await self._request("GET", "/health", HEALTH_TIMEOUT)
+
+            if response.status_code == 200:
+                logger.info("Bot service is healthy")
+                return {"success": True, "message": "Bot service is healthy"}
+            else:
+                error_msg = f"Bot service unhealthy: {response.status_code}"
+                logger.warning(error_msg)
+                return {"success": False, "message": error_msg}
+
         except Exception as e:
             error_msg = f"Bot service health check failed: {str(e)}"
             logger.error(error_msg)
@@ -97,4 +293,4 @@ class BotServiceClient:
 
 
 # Singleton instance
-bot_service = BotServiceClient()
\ No newline at end of file
+bot_service = BotServiceClient()
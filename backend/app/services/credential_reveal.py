@@ -0,0 +1,50 @@
+"""
+One-time credential reveal cache
+Holds each active session's encrypted password in memory from activation
+until it is revealed once (GET /api/sessions/{id}/credentials) or expires,
+so users can start without waiting on SMTP delivery. Per-process only - after
+a restart the credentials email is the way in.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from app.services.password_service import get_wat_now
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CredentialRevealCache:
+    def __init__(self):
+        # session_id -> (Fernet-encrypted password, expires_at in WAT)
+        self._entries: Dict[int, Tuple[str, datetime]] = {}
+
+    def put(self, session_id: int, encrypted_password: str, expires_at: datetime) -> None:
+        """Make credentials revealable once (called at session activation)"""
+        self._prune()
+        self._entries[session_id] = (encrypted_password, expires_at)
+
+    def get(self, session_id: int) -> Optional[str]:
+        """Read the encrypted password without consuming it - None if revealed already or expired"""
+        entry = self._entries.get(session_id)
+        if not entry:
+            return None
+        encrypted_password, expires_at = entry
+        if expires_at <= get_wat_now():
+            return None
+        return encrypted_password
+
+    def pop(self, session_id: int) -> Optional[str]:
+        """Take the encrypted password - returns None if revealed already or expired"""
+        encrypted_password = self.get(session_id)
+        self._entries.pop(session_id, None)
+        return encrypted_password
+
+    def _prune(self) -> None:
+        now = get_wat_now()
+        for session_id in [sid for sid, (_, expires_at) in self._entries.items() if expires_at <= now]:
+            del self._entries[session_id]
+
+
+# Singleton instance
+credential_reveal = CredentialRevealCache()
@@ -0,0 +1,199 @@
+"""
+Email outbox sender
+Drains the email_outbox table over pooled, authenticated SMTP connections
+without blocking the event loop, retrying failed sends with backoff
+"""
+
+import asyncio
+import json
+import random
+import time
+from datetime import timedelta
+from typing import Optional
+import aiosmtplib
+from app.core.config import settings
+from app.models.database import SessionLocal, EmailOutbox
+from app.services.email_service import email_service
+from app.services.password_service import password_service, get_wat_now
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Retry backoff: 30s, 60s, 120s ... capped at 30 minutes, +/-20% jitter
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 1800
+# Claimed rows are pushed out this far so another worker won't pick them up mid-send
+CLAIM_LEASE_SECONDS = 120
+# Connections idle longer than this are checked with NOOP before reuse
+IDLE_CHECK_SECONDS = 60
+BATCH_SIZE = 20
+# Payloads carry credentials - once a row is sent or failed it no longer needs them
+REDACTED_PAYLOAD = ""
+
+
+class SMTPConnectionPool:
+    """Keeps up to `size` logged-in SMTP connections alive between sends"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: list[tuple[aiosmtplib.SMTP, float]] = []
+        self._semaphore = asyncio.Semaphore(size)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=settings.smtp_host,
+            port=settings.smtp_port,
+            use_tls=settings.smtp_use_tls,
+            timeout=30
+        )
+        await client.connect()
+        if settings.smtp_auth:
+            await client.login(email_service.email, email_service.password)
+        logger.info(f"Opened SMTP connection to {settings.smtp_host}:{settings.smtp_port}")
+        return client
+
+    async def _take(self) -> aiosmtplib.SMTP:
+        while self._idle:
+            client, last_used = self._idle.pop()
+            if not client.is_connected:
+                continue
+            if time.monotonic() - last_used > IDLE_CHECK_SECONDS:
+                try:
+                    await client.noop()
+                except Exception:
+                    client.close()
+                    continue
+            return client
+        return await self._connect()
+
+    async def send(self, message) -> None:
+        async with self._semaphore:
+            client = await self._take()
+            try:
+                await client.send_message(message)
+            except Exception:
+                # Drop the connection - a fresh one is opened for the next send
+                client.close()
+                raise
+            self._idle.append((client, time.monotonic()))
+
+    async def close(self) -> None:
+        while self._idle:
+            client, _ = self._idle.pop()
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+
+
+class EmailOutboxSender:
+    def __init__(self):
+        self._pool: Optional[SMTPConnectionPool] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start the background drain loop (called on app startup)"""
+        self._pool = SMTPConnectionPool(settings.smtp_pool_size)
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Email outbox sender started")
+
+    async def stop(self) -> None:
+        """Stop draining and close pooled connections (called on app shutdown)"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pool:
+            await self._pool.close()
+
+    def notify(self) -> None:
+        """Wake the sender after committing new outbox rows"""
+        if self._wake:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                while await self.drain_once() == BATCH_SIZE:
+                    pass
+            except Exception as e:
+                logger.error(f"Email outbox drain failed: {e}")
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.email_outbox_poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def _claim_due(self) -> list[dict]:
+        db = SessionLocal()
+        try:
+            now = get_wat_now()
+            entries = db.query(EmailOutbox).filter(
+                EmailOutbox.status == "pending",
+                EmailOutbox.next_attempt_at <= now
+            ).order_by(EmailOutbox.id).limit(BATCH_SIZE).with_for_update(skip_locked=True).all()
+
+            claimed = []
+            for entry in entries:
+                entry.next_attempt_at = now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+                claimed.append({"id": entry.id, "template": entry.template, "payload": entry.payload})
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    async def drain_once(self) -> int:
+        """Send all due outbox entries. Returns how many were attempted."""
+        entries = self._claim_due()
+        if not entries:
+            return 0
+
+        results = await asyncio.gather(*(self._send(entry) for entry in entries), return_exceptions=True)
+
+        db = SessionLocal()
+        try:
+            now = get_wat_now()
+            for entry, error in zip(entries, results):
+                row = db.query(EmailOutbox).filter(EmailOutbox.id == entry["id"]).first()
+                if not row:
+                    continue
+
+                row.attempts = (row.attempts or 0) + 1
+                if error is None:
+                    row.status = "sent"
+                    row.sent_at = now
+                    row.last_error = None
+                    row.payload = REDACTED_PAYLOAD
+                    logger.info(f"Sent {row.template} email to {row.recipient} (outbox #{row.id}, attempt {row.attempts})")
+                    continue
+
+                row.last_error = str(error)
+                permanent = isinstance(error, (aiosmtplib.SMTPRecipientsRefused, ValueError))
+                if permanent or row.attempts >= settings.email_outbox_max_attempts:
+                    row.status = "failed"
+                    row.payload = REDACTED_PAYLOAD
+                    logger.error(f"Giving up on {row.template} email to {row.recipient} (outbox #{row.id}): {error}")
+                else:
+                    delay = min(RETRY_BASE_SECONDS * 2 ** (row.attempts - 1), RETRY_MAX_SECONDS)
+                    row.next_attempt_at = now + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+                    logger.warning(f"Failed to send {row.template} email to {row.recipient} (outbox #{row.id}), retrying in ~{delay}s: {error}")
+            db.commit()
+        finally:
+            db.close()
+
+        return len(entries)
+
+    async def _send(self, entry: dict) -> None:
+        payload = json.loads(password_service.decrypt_password(entry["payload"]))
+        message = email_service.build_message(entry["template"], payload)
+        await self._pool.send(message)
+
+
+# Singleton instance
+email_outbox = EmailOutboxSender()
@@ -3,12 +3,15 @@ Email service for sending credentials and notifications
 As specified in instructions.md
 """
 
-import smtplib
+import json
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Optional
 from datetime import datetime
+from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.models.database import EmailOutbox
+from app.services.password_service import password_service, get_wat_now
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,8 +19,6 @@ logger = logging.getLogger(__name__)
 
 class EmailService:
     def __init__(self):
-        self.smtp_server = "smtp.gmail.com"
-        self.smtp_port = 465  # SSL port
         self.email = settings.gmail_user
         self.password = settings.gmail_app_password
 
@@ -25,6 +26,7 @@ class EmailService:
         self, 
         user_name: str, 
         user_email: str,
+        account_email: str,
         password: str,
         start_time: str,
         end_time: str
@@ -58,7 +60,7 @@ End: {end_formatted}
 You will be automatically logged out at {end_time_only}
 
 🔐 Your CapCut Credentials:
-Email: davidejere2001@gmail.com
+Email: {account_email}
 Password: {password}
 
 📝 Instructions:
@@ -74,52 +76,25 @@ Questions? Contact support@capcut-sharing.com"""
         msg.attach(MIMEText(body, 'plain'))
         return msg
 
-    def send_credentials_email(
-        self,
-        user_name: str,
-        user_email: str, 
-        password: str,
-        start_time: str,
-        end_time: str
-    ) -> bool:
-        """Send credentials email to user"""
-        try:
-            msg = self._create_credentials_email(
-                user_name, user_email, password, start_time, end_time
-            )
-            
-            # Connect to server and send email using SSL
-            with smtplib.SMTP_SSL(self.smtp_server, self.smtp_port) as server:
-                server.login(self.email, self.password)
-                server.send_message(msg)
-            
-            logger.info(f"Credentials email sent successfully to {user_email}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to send credentials email to {user_email}: {e}")
-            return False
-
-    def send_booking_confirmation(
+    def _create_booking_confirmation_email(
         self,
         user_name: str,
         user_email: str,
         start_time: str, 
         end_time: str
-    ) -> bool:
-        """Send booking confirmation email (optional feature)"""
-        try:
-            msg = MIMEMultipart()
-            msg['From'] = self.email
-            msg['To'] = user_email
-            msg['Subject'] = "CapCut Booking Confirmed"
-            
-            start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-            end_dt = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
-            start_formatted = start_dt.strftime("%A, %B %d, %Y at %I:%M %p")
-            end_formatted = end_dt.strftime("%A, %B %d, %Y at %I:%M %p")
-            
-            body = f"""Hi {user_name},
+    ) -> MIMEMultipart:
+        """Create booking confirmation email (optional feature)"""
+        msg = MIMEMultipart()
+        msg['From'] = self.email
+        msg['To'] = user_email
+        msg['Subject'] = "CapCut Booking Confirmed"
+        
+        start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+        end_dt = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
+        start_formatted = start_dt.strftime("%A, %B %d, %Y at %I:%M %p")
+        end_formatted = end_dt.strftime("%A, %B %d, %Y at %I:%M %p")
+        
+        body = f"""Hi {user_name},
 
 Your CapCut session has been booked successfully!
 
@@ -139,18 +114,72 @@ Questions? Contact support@capcut-sharing.com
 
 Thank you for using CapCut Sharing!"""
 
-            msg.attach(MIMEText(body, 'plain'))
-            
-            with smtplib.SMTP_SSL(self.smtp_server, self.smtp_port) as server:
-                server.login(self.email, self.password)
-                server.send_message(msg)
-            
-            logger.info(f"Booking confirmation sent to {user_email}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to send booking confirmation to {user_email}: {e}")
-            return False
+        msg.attach(MIMEText(body, 'plain'))
+        return msg
+
+    def build_message(self, template: str, payload: dict) -> MIMEMultipart:
+        """Render an outbox entry into a MIME message"""
+        if template == "credentials":
+            return self._create_credentials_email(**payload)
+        if template == "booking_confirmation":
+            return self._create_booking_confirmation_email(**payload)
+        raise ValueError(f"Unknown email template: {template}")
+
+    def _enqueue(self, db: Session, template: str, user_email: str, session_id: Optional[int], payload: dict) -> EmailOutbox:
+        """
+        Add an email to the outbox in the caller's transaction.
+        Nothing is sent until the caller commits; the outbox sender delivers it.
+        """
+        entry = EmailOutbox(
+            session_id=session_id,
+            recipient=user_email,
+            template=template,
+            # Payload may contain credentials - store it encrypted like Password.plain_password
+            payload=password_service.encrypt_password(json.dumps(payload)),
+            status="pending",
+            attempts=0,
+            next_attempt_at=get_wat_now()
+        )
+        db.add(entry)
+        return entry
+
+    def enqueue_credentials_email(
+        self,
+        db: Session,
+        session_id: int,
+        user_name: str,
+        user_email: str, 
+        account_email: str,
+        password: str,
+        start_time: str,
+        end_time: str
+    ) -> EmailOutbox:
+        """Queue credentials email to user (delivered after the caller commits)"""
+        return self._enqueue(db, "credentials", user_email, session_id, {
+            "user_name": user_name,
+            "user_email": user_email,
+            "account_email": account_email,
+            "password": password,
+            "start_time": start_time,
+            "end_time": end_time
+        })
+
+    def enqueue_booking_confirmation(
+        self,
+        db: Session,
+        session_id: int,
+        user_name: str,
+        user_email: str,
+        start_time: str, 
+        end_time: str
+    ) -> EmailOutbox:
+        """Queue booking confirmation email (optional feature)"""
+        return self._enqueue(db, "booking_confirmation", user_email, session_id, {
+            "user_name": user_name,
+            "user_email": user_email,
+            "start_time": start_time,
+            "end_time": end_time
+        })
 
 
 # Singleton instance
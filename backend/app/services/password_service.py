@@ -3,14 +3,17 @@ Password generation and encryption service
 As specified in instructions.md
 """
 
+import asyncio
 import secrets
 import string
-import bcrypt
 import pytz
-from cryptography.fernet import Fernet
 from app.core.config import settings
+from app.core import security
 import logging
 from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import update, func
+from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 
@@ -21,21 +24,6 @@ def get_wat_now():
 
 
 class PasswordService:
-    def __init__(self):
-        # Use SECRET_KEY to generate consistent encryption key
-        # Note: In production, store this securely
-        secret_bytes = settings.secret_key.encode()[:32].ljust(32, b'0')  # Ensure 32 bytes
-        
-        # Generate a consistent Fernet key from SECRET_KEY
-        import base64
-        import hashlib
-        
-        # Create a 32-byte key using SHA-256 hash of secret
-        key_hash = hashlib.sha256(secret_bytes).digest()
-        # Fernet needs base64-encoded 32-byte key
-        fernet_key = base64.urlsafe_b64encode(key_hash)
-        self.cipher = Fernet(fernet_key)
-
     def generate_strong_password(self, length: int = 16) -> str:
         """
         Generate a strong password using secrets module
@@ -74,53 +62,48 @@ class PasswordService:
             return secrets.token_urlsafe(16)
 
     def hash_password(self, password: str) -> str:
-        """Hash password using bcrypt for database storage"""
-        try:
-            salt = bcrypt.gensalt()
-            hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-            return hashed.decode('utf-8')
-        except Exception as e:
-            logger.error(f"Failed to hash password: {e}")
-            raise
+        """Hash password using bcrypt for database storage (blocking - prefer hash_password_async)"""
+        return security.hash_password(password)
+
+    async def hash_password_async(self, password: str) -> str:
+        """Hash password on the bcrypt thread pool without blocking the event loop"""
+        return await security.hash_password_async(password)
 
     def verify_password(self, password: str, hashed: str) -> bool:
         """Verify password against hash"""
-        try:
-            return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
-        except Exception as e:
-            logger.error(f"Failed to verify password: {e}")
-            return False
+        return security.verify_password(password, hashed)
+
+    async def verify_password_async(self, password: str, hashed: str) -> bool:
+        """Verify password on the bcrypt thread pool"""
+        return await security.verify_password_async(password, hashed)
 
     def encrypt_password(self, password: str) -> str:
-        """Encrypt password for temporary storage"""
-        try:
-            encrypted = self.cipher.encrypt(password.encode('utf-8'))
-            return encrypted.decode('utf-8')
-        except Exception as e:
-            logger.error(f"Failed to encrypt password: {e}")
-            raise
+        """Encrypt password for temporary storage (shared key ring)"""
+        return security.encrypt_password(password)
 
     def decrypt_password(self, encrypted_password: str) -> str:
-        """Decrypt password from storage"""
-        try:
-            decrypted = self.cipher.decrypt(encrypted_password.encode('utf-8'))
-            return decrypted.decode('utf-8')
-        except Exception as e:
-            logger.error(f"Failed to decrypt password: {e}")
-            raise
+        """Decrypt password from storage (shared key ring)"""
+        return security.decrypt_password(encrypted_password)
 
-    def create_password_entry(self, password: str, session_id: int) -> dict:
+    async def create_password_entry(self, password: str, session_id: int, not_before: datetime = None) -> dict:
         """
         Create password entry for database
         Returns both hashed and encrypted versions
         As per instructions.md: Delete plain passwords after 1 hour
+
+        Args:
+            not_before: When the password is released to the user (pre-rotated
+                credentials). The 1 hour window starts from here instead of now.
         """
         try:
-            # Set expiration time to 1 hour from now (WAT)
-            expires_at = get_wat_now() + timedelta(hours=1)
+            # Set expiration time to 1 hour from now (WAT), or from release time if later
+            valid_from = get_wat_now()
+            if not_before and not_before > valid_from:
+                valid_from = not_before
+            expires_at = valid_from + timedelta(hours=1)
             
             return {
-                "password_hash": self.hash_password(password),
+                "password_hash": await self.hash_password_async(password),
                 "plain_password": self.encrypt_password(password),
                 "session_id": session_id,
                 "is_active": True,
@@ -130,37 +113,87 @@ class PasswordService:
             logger.error(f"Failed to create password entry: {e}")
             raise
     
-    def cleanup_expired_passwords(self):
+    def cleanup_expired_passwords(self, db: Session) -> int:
         """
-        Clean up expired plain text passwords from database
+        Clear expired plain text passwords (hashes are kept) in one UPDATE
         As per instructions.md: Delete plain passwords after 1 hour
+        Also redacts outbox payloads of emails that were sent or gave up.
+        Returns the number of passwords scrubbed.
         """
-        try:
-            from app.models.database import SessionLocal, Password
-            
-            db = SessionLocal()
-            try:
-                current_time = get_wat_now()
-                
-                # Find expired passwords
-                expired_passwords = db.query(Password).filter(
-                    Password.expires_at <= current_time,
-                    Password.plain_password.isnot(None)
-                ).all()
-                
-                # Clear plain text passwords but keep hashes
-                for pwd in expired_passwords:
-                    pwd.plain_password = None
-                    logger.info(f"Cleared expired plain password for session {pwd.session_id}")
-                
-                db.commit()
-                logger.info(f"Cleaned up {len(expired_passwords)} expired passwords")
-                
-            finally:
-                db.close()
-                
-        except Exception as e:
-            logger.error(f"Failed to cleanup expired passwords: {e}")
+        from app.models.database import Password, EmailOutbox
+        from app.services.email_outbox import REDACTED_PAYLOAD
+
+        result = db.execute(
+            update(Password)
+            .where(Password.expires_at <= get_wat_now(), Password.plain_password.isnot(None))
+            .values(plain_password=None)
+            .execution_options(synchronize_session=False)
+        )
+        # The sender redacts on delivery; this catches rows finished before it did
+        outbox = db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.status.in_(("sent", "failed")), EmailOutbox.payload != REDACTED_PAYLOAD)
+            .values(payload=REDACTED_PAYLOAD)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if result.rowcount:
+            logger.info(f"Cleaned up {result.rowcount} expired passwords")
+        if outbox.rowcount:
+            logger.info(f"Redacted {outbox.rowcount} finished outbox payloads")
+        return result.rowcount
+
+    def next_password_expiry(self, db: Session) -> Optional[datetime]:
+        """Earliest expires_at among passwords that still hold a plain password"""
+        from app.models.database import Password
+
+        return db.query(func.min(Password.expires_at)).filter(Password.plain_password.isnot(None)).scalar()
+
+    async def reencrypt_stored_credentials(self) -> int:
+        """
+        Re-encrypt stored plain passwords (and pending outbox payloads) under the
+        current key after a key rotation. Works in batches by id and yields to
+        the event loop between them. Returns how many rows were re-encrypted.
+        """
+        from app.models.database import SessionLocal, Password, EmailOutbox
+
+        batch_size = settings.reencrypt_batch_size
+        rotated = 0
+        targets = (
+            (Password, Password.plain_password, Password.plain_password.isnot(None)),
+            (EmailOutbox, EmailOutbox.payload, EmailOutbox.status == "pending"),
+        )
+
+        for model, column, condition in targets:
+            last_id = 0
+            while True:
+                db = SessionLocal()
+                try:
+                    rows = db.query(model.id, column).filter(
+                        condition, model.id > last_id
+                    ).order_by(model.id).limit(batch_size).all()
+                    if not rows:
+                        break
+
+                    for row_id, token in rows:
+                        try:
+                            new_token = security.rotate_token(token)
+                        except Exception as e:
+                            logger.error(f"Cannot re-encrypt {model.__tablename__} #{row_id}: {e}")
+                            continue
+                        if new_token:
+                            db.query(model).filter(model.id == row_id, column == token).update(
+                                {column: new_token}, synchronize_session=False
+                            )
+                            rotated += 1
+                    db.commit()
+                    last_id = rows[-1][0]
+                finally:
+                    db.close()
+                await asyncio.sleep(0)
+
+        logger.info(f"Re-encrypted {rotated} stored credentials under the current key")
+        return rotated
 
 
 # Singleton instance
@@ -0,0 +1,86 @@
+"""
+Rotation timing service
+Records how long bot password rotations take and derives the pre-rotation
+lead time used by session_start_job
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.models.database import RotationLog
+from app.core.config import settings
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+# Percentile of recent successful rotation durations the lead time must cover
+LEAD_PERCENTILE = 0.9
+# Headroom on top of the percentile for slow outliers
+LEAD_SAFETY_FACTOR = 1.25
+# The start job ticks once a minute, so a rotation may begin up to 60s late
+SCHEDULER_TICK_SECONDS = 60
+
+
+class RotationService:
+    def __init__(self):
+        self._cached_lead_seconds: Optional[float] = None
+
+    def record_rotation(
+        self,
+        db: Session,
+        kind: str,
+        session_id: Optional[int],
+        started_at: datetime,
+        duration_seconds: float,
+        success: bool
+    ) -> None:
+        """Store a rotation duration and invalidate the cached lead time"""
+        try:
+            db.add(RotationLog(
+                session_id=session_id,
+                kind=kind,
+                started_at=started_at,
+                duration_seconds=duration_seconds,
+                success=success
+            ))
+            db.commit()
+            self._cached_lead_seconds = None
+            logger.info(f"Recorded {kind} rotation for session {session_id}: {duration_seconds:.1f}s (success={success})")
+        except Exception as e:
+            logger.error(f"Failed to record rotation duration: {e}")
+            db.rollback()
+
+    def get_lead_time(self, db: Session) -> timedelta:
+        """
+        Lead time before start_time at which a rotation should begin.
+        Uses the configured value until enough successful rotations are recorded.
+        """
+        if self._cached_lead_seconds is None:
+            self._cached_lead_seconds = self._compute_lead_seconds(db)
+        return timedelta(seconds=self._cached_lead_seconds)
+
+    def _compute_lead_seconds(self, db: Session) -> float:
+        lead = float(settings.prerotate_lead_seconds)
+
+        if settings.prerotate_auto_tune:
+            durations = [
+                row.duration_seconds for row in db.query(RotationLog.duration_seconds)
+                .filter(RotationLog.success.is_(True))
+                .order_by(RotationLog.id.desc())
+                .limit(settings.prerotate_sample_size)
+                .all()
+            ]
+
+            # A couple of samples is not enough to beat the configured default
+            if len(durations) >= 3:
+                durations.sort()
+                index = min(len(durations) - 1, math.ceil(LEAD_PERCENTILE * len(durations)) - 1)
+                lead = durations[index] * LEAD_SAFETY_FACTOR + SCHEDULER_TICK_SECONDS
+                logger.info(f"Auto-tuned pre-rotation lead to {lead:.0f}s from {len(durations)} rotations")
+
+        return min(lead, float(settings.prerotate_max_lead_seconds))
+
+
+# Singleton instance
+rotation_service = RotationService()
@@ -1,11 +1,23 @@
 """
 Slots Service - Manages 24-hour slot generation and daily reset
 Provides smooth integration with existing system
+
+Each slot has one seat per CapCut account of the bot (GET /bot/accounts,
+optionally narrowed by CAPCUT_ACCOUNTS). A booking claims a free seat by
+inserting its session with that account; a unique index on
+(slot_id, account_id) over live sessions makes the claim atomic. A slot's
+availability is its count of live sessions, so a cancelled or completed
+session frees its seat with no flag to reset.
 """
 
 from datetime import datetime, timedelta
+from typing import Callable, Optional
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.models.database import TimeSlot, Session as SessionModel
+from app.core.config import settings
+from app.models.database import TimeSlot, Session as SessionModel, LIVE_SESSION_STATUSES, SEAT_INDEX_NAME
+from app.services.bot_service import bot_service
 import logging
 import pytz
 
@@ -18,7 +30,118 @@ def get_wat_now():
     """Get current time in WAT timezone (naive datetime for DB storage)"""
     return datetime.now(WAT_TZ).replace(tzinfo=None)
 
+def is_seat_conflict(error: IntegrityError) -> bool:
+    """True if the insert broke the live seat index (not some other constraint)"""
+    # PostgreSQL (psycopg2) names the violated index
+    constraint_name = getattr(getattr(error.orig, "diag", None), "constraint_name", None)
+    if constraint_name:
+        return constraint_name == SEAT_INDEX_NAME
+    # SQLite names the columns instead
+    return "sessions.slot_id, sessions.account_id" in str(error.orig)
+
 class SlotsService:
+    def __init__(self):
+        # Seat accounts from the bot: account id -> CapCut login email, in bot order
+        self._accounts: dict[str, str] = {}
+    
+    def set_accounts(self, bot_accounts: list[dict]) -> None:
+        """
+        Take the seats from the bot's account list, limited to CAPCUT_ACCOUNTS
+        when that is set. Configured ids the bot doesn't know are logged and
+        skipped - rotating them would fail with a 404 from the bot.
+        """
+        accounts = {account["id"]: account["email"] for account in bot_accounts}
+        if settings.capcut_accounts:
+            configured = [a.strip() for a in settings.capcut_accounts.split(",") if a.strip()]
+            unknown = [account_id for account_id in configured if account_id not in accounts]
+            if unknown:
+                logger.error(f"CAPCUT_ACCOUNTS {unknown} are not bot accounts (bot has {list(accounts)}) - no seats for them")
+            accounts = {account_id: accounts[account_id] for account_id in configured if account_id in accounts}
+        if not accounts:
+            logger.error("No CapCut accounts to offer as slot seats")
+        self._accounts = accounts
+        logger.info(f"Slot seats: {', '.join(accounts) or 'none'}")
+    
+    async def load_accounts(self) -> bool:
+        """Fetch the seats from the bot (startup, midnight); keeps the previous list if it can't be reached"""
+        try:
+            self.set_accounts(await bot_service.list_accounts())
+            return True
+        except Exception as e:
+            logger.error(f"Could not load CapCut accounts from the bot service: {e}")
+            return False
+    
+    async def ensure_accounts(self) -> None:
+        """Load the seats if startup couldn't reach the bot"""
+        if not self._accounts:
+            await self.load_accounts()
+    
+    @property
+    def account_ids(self) -> list[str]:
+        """Bot accounts, in the order seats are handed out"""
+        return list(self._accounts)
+    
+    def account_email(self, account_id: str) -> Optional[str]:
+        """CapCut login email of a seat account"""
+        return self._accounts.get(account_id)
+    
+    def session_account_email(self, session: SessionModel) -> str:
+        """CapCut login for a session's seat (looked up for sessions booked before it was stored)"""
+        account_email = session.account_email or self.account_email(session.account_id)
+        if not account_email:
+            raise ValueError(f"No CapCut email known for account {session.account_id}")
+        return account_email
+    
+    @property
+    def capacity(self) -> int:
+        """Seats per slot - one per account"""
+        return len(self.account_ids)
+    
+    def seats_taken(self, db: Session) -> dict[str, int]:
+        """Live sessions per slot_id, in one grouped query"""
+        rows = db.query(SessionModel.slot_id, func.count(SessionModel.id)).filter(
+            SessionModel.slot_id.isnot(None),
+            SessionModel.status.in_(LIVE_SESSION_STATUSES)
+        ).group_by(SessionModel.slot_id).all()
+        return {slot_id: count for slot_id, count in rows}
+    
+    def claim_seat(self, db: Session, slot: TimeSlot, make_session: Callable[[str], SessionModel]) -> Optional[SessionModel]:
+        """
+        Book a free seat in the slot: make_session(account_id) builds the
+        session, which is committed with the first free account (and its
+        CapCut login email).
+        If another booking commits the same seat first, the unique index
+        rejects this insert and the next free account is tried; any other
+        integrity error is raised.
+        Returns the committed session, or None when the slot is full.
+        """
+        taken = {
+            account_id for (account_id,) in db.query(SessionModel.account_id).filter(
+                SessionModel.slot_id == slot.id,
+                SessionModel.status.in_(LIVE_SESSION_STATUSES)
+            ).all()
+        }
+        
+        for account_id in self.account_ids:
+            if account_id in taken:
+                continue
+            session = make_session(account_id)
+            session.account_email = self.account_email(account_id)
+            db.add(session)
+            try:
+                db.commit()
+            except IntegrityError as e:
+                db.rollback()
+                if not is_seat_conflict(e):
+                    raise
+                taken.add(account_id)
+                logger.info(f"Seat {account_id} in slot {slot.id} was just taken, trying the next one")
+                continue
+            logger.info(f"Booked seat {account_id} in slot {slot.id} ({len(taken) + 1}/{self.capacity} taken)")
+            return session
+        
+        logger.info(f"Slot {slot.id} is full ({self.capacity} seats)")
+        return None
     
     def generate_daily_slots(self, db: Session, target_date: datetime = None) -> list[TimeSlot]:
         """
@@ -176,30 +299,11 @@ class SlotsService:
             TimeSlot.id == slot_id
         ).first()
     
-    def mark_slot_booked(self, db: Session, slot_id: str) -> bool:
-        """
-        Mark a slot as booked (available=False)
-        Returns True if successful, False if slot not found or already booked
-        """
-        slot = self.get_slot_by_id(db, slot_id)
-        
-        if not slot:
-            logger.error(f"Slot {slot_id} not found")
-            return False
-        
-        if not slot.available:
-            logger.error(f"Slot {slot_id} already booked")
-            return False
-        
-        slot.available = False
-        db.commit()
-        
-        logger.info(f"Marked slot {slot_id} as booked")
-        return True
-    
     def mark_slot_available(self, db: Session, slot_id: str) -> bool:
         """
         Mark a slot as available (for cancellations, etc.)
+        Seats free themselves when their session stops being live; this only
+        re-opens a slot that was taken off sale.
         """
         slot = self.get_slot_by_id(db, slot_id)
         
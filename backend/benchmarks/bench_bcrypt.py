@@ -0,0 +1,81 @@
+"""
+bcrypt microbenchmark
+Reports hashes/sec per cost factor, the calibrated cost factor, and how much
+the thread pool keeps the event loop responsive while hashing.
+
+Run from backend/ (uses the same .env as the app):
+    python -m benchmarks.bench_bcrypt [--hashes 8] [--target-ms 250]
+"""
+
+import argparse
+import asyncio
+import time
+import bcrypt
+from app.core import security
+from app.core.config import settings
+
+
+def bench_rounds(rounds: int, hashes: int) -> float:
+    salt = bcrypt.gensalt(rounds=rounds)
+    start = time.perf_counter()
+    for _ in range(hashes):
+        bcrypt.hashpw(b"benchmark-password", salt)
+    return hashes / (time.perf_counter() - start)
+
+
+async def measure_loop_lag(work, interval: float = 0.01) -> tuple[float, float]:
+    """Run `work` while a ticker measures the worst event loop delay. Returns (elapsed, max_lag)."""
+    max_lag = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal max_lag
+        loop = asyncio.get_running_loop()
+        while running:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            max_lag = max(max_lag, loop.time() - expected)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    running = False
+    await tick
+    return elapsed, max_lag
+
+
+async def bench_event_loop(hashes: int):
+    async def inline():
+        for _ in range(hashes):
+            security.hash_password("benchmark-password")
+            await asyncio.sleep(0)
+
+    async def pooled():
+        await asyncio.gather(*(security.hash_password_async("benchmark-password") for _ in range(hashes)))
+
+    for name, work in (("inline (blocking)", inline), (f"thread pool x{settings.bcrypt_workers}", pooled)):
+        elapsed, max_lag = await measure_loop_lag(work)
+        print(f"  {name:<22} {hashes / elapsed:7.2f} hashes/sec   max loop lag {max_lag * 1000:7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bcrypt hashing benchmark")
+    parser.add_argument("--hashes", type=int, default=8, help="hashes per measurement")
+    parser.add_argument("--target-ms", type=float, default=settings.bcrypt_target_ms)
+    args = parser.parse_args()
+
+    print("Single-thread throughput by cost factor:")
+    for rounds in range(settings.bcrypt_min_rounds, settings.bcrypt_max_rounds + 1):
+        rate = bench_rounds(rounds, max(1, args.hashes >> max(0, rounds - settings.bcrypt_min_rounds)))
+        print(f"  rounds={rounds:<3} {rate:8.2f} hashes/sec   ({1000 / rate:7.1f}ms per hash)")
+
+    rounds = security.calibrate_bcrypt_rounds(args.target_ms)
+    print(f"\nCalibrated cost factor for {args.target_ms:.0f}ms target: {rounds}")
+
+    print(f"\nEvent loop impact at rounds={rounds}:")
+    asyncio.run(bench_event_loop(args.hashes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Test setup
+Settings are read from the environment when app.core.config is imported, so
+point the app at a throwaway SQLite database (and dummy secrets) before any
+test imports it.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+_db_dir = tempfile.mkdtemp(prefix="capcut-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_db_dir, 'test.db')}",
+    "SECRET_KEY": "test-secret-key",
+    "GMAIL_USER": "sender@example.com",
+    "GMAIL_APP_PASSWORD": "test-app-password",
+})
+os.environ.pop("ENCRYPTION_KEYS", None)
+
+from app.models.database import Base, SessionLocal, create_tables, engine  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """A session on freshly created tables, dropped again after the test"""
+    create_tables()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
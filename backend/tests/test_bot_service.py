@@ -0,0 +1,90 @@
+"""
+Bot service client: circuit breaker and job polling
+Uses httpx.MockTransport in place of the bot.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.bot_service import BotServiceClient, CircuitOpenError
+
+
+@pytest.fixture
+def fast_settings(monkeypatch):
+    monkeypatch.setattr(settings, "bot_retry_attempts", 1)
+    monkeypatch.setattr(settings, "bot_circuit_failure_threshold", 2)
+    monkeypatch.setattr(settings, "bot_circuit_reset_seconds", 0.2)
+    monkeypatch.setattr(settings, "bot_job_poll_seconds", 0.01)
+    monkeypatch.setattr(settings, "bot_reset_timeout_seconds", 5)
+
+
+def client_for(handler) -> BotServiceClient:
+    bot = BotServiceClient()
+    bot.client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://bot")
+    return bot
+
+
+def test_poll_keeps_waiting_for_an_accepted_job_past_an_open_circuit(fast_settings):
+    responses = iter([503, 503, 503])
+    polls = []
+
+    def handler(request):
+        polls.append(request.url.path)
+        status = next(responses, 200)
+        if status != 200:
+            return httpx.Response(status)
+        return httpx.Response(200, json={"job_id": "j1", "status": "succeeded", "success": True, "new_password": "pw"})
+
+    async def run():
+        bot = client_for(handler)
+        try:
+            return await bot._wait_for_job("j1"), bot.circuit.state
+        finally:
+            await bot.close()
+
+    result, state = asyncio.run(run())
+    assert result["success"] and result["new_password"] == "pw"
+    assert state == "closed"
+    # Two failures opened the circuit; polling resumed after the cooldown
+    assert len(polls) >= 3
+
+
+def test_cancelled_call_admitted_while_closed_keeps_anothers_trial(fast_settings):
+    async def run():
+        release = asyncio.Event()
+
+        async def handler(request):
+            await release.wait()
+            return httpx.Response(200, json={})
+
+        bot = client_for(handler)
+        try:
+            # Admitted while closed, then the circuit goes half-open under it
+            early = asyncio.create_task(bot._request("GET", "/health", 1.0))
+            await asyncio.sleep(0.01)
+            bot.circuit.opened_at = 0.0
+
+            trial = asyncio.create_task(bot._request("GET", "/health", 1.0))
+            await asyncio.sleep(0.01)
+            assert bot.circuit._trial_in_flight
+
+            early.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await early
+            assert bot.circuit._trial_in_flight, "a call that never held the trial released it"
+            with pytest.raises(CircuitOpenError):
+                await bot._request("GET", "/health", 1.0)
+
+            # The trial's own cancellation does hand it back
+            trial.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await trial
+            assert not bot.circuit._trial_in_flight
+        finally:
+            release.set()
+            await bot.close()
+
+    asyncio.run(run())
@@ -0,0 +1,135 @@
+"""
+claim_seat on SQLite
+Concurrent bookings of one slot must end up on different seats (the live
+seat index rejects the loser, which moves on to the next account), a full
+slot books nothing, and integrity errors other than a seat clash surface.
+"""
+
+import threading
+from datetime import timedelta
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.models.database import SessionLocal, Session as SessionModel, TimeSlot
+from app.services.password_service import get_wat_now
+from app.services.slots_service import SlotsService
+
+SEATS = [
+    {"id": "cc1", "email": "shop+cc1@example.com"},
+    {"id": "cc2", "email": "shop+cc2@example.com"},
+]
+
+
+@pytest.fixture
+def service():
+    service = SlotsService()
+    service.set_accounts(SEATS)
+    return service
+
+
+@pytest.fixture
+def slot(db):
+    start = get_wat_now().replace(microsecond=0) + timedelta(hours=1)
+    slot = TimeSlot(id="slot_1", slot_number=1, start_time=start, end_time=start + timedelta(minutes=90), date=start)
+    db.add(slot)
+    db.commit()
+    return slot
+
+
+def booking(slot: TimeSlot, user_email: str, **fields):
+    """The make_session callback bookings pass to claim_seat"""
+    return lambda account_id: SessionModel(
+        user_name="Test User",
+        user_email=user_email,
+        start_time=slot.start_time,
+        end_time=slot.end_time,
+        status="pending",
+        slot_id=slot.id,
+        account_id=account_id,
+        **fields
+    )
+
+
+def test_bookings_fill_seats_in_order_then_slot_is_full(db, service, slot):
+    first = service.claim_seat(db, slot, booking(slot, "one@example.com"))
+    second = service.claim_seat(db, slot, booking(slot, "two@example.com"))
+
+    assert (first.account_id, first.account_email) == ("cc1", "shop+cc1@example.com")
+    assert (second.account_id, second.account_email) == ("cc2", "shop+cc2@example.com")
+    assert service.claim_seat(db, slot, booking(slot, "three@example.com")) is None
+
+
+def test_seat_taken_after_the_free_seat_check_moves_to_the_next(db, service, slot):
+    other_db = SessionLocal()
+    raced = []
+
+    def make_session(account_id):
+        # Another booking commits this seat between our check and our insert
+        if not raced:
+            raced.append(service.claim_seat(other_db, slot, booking(slot, "other@example.com")))
+        return booking(slot, "me@example.com")(account_id)
+
+    try:
+        mine = service.claim_seat(db, slot, make_session)
+        assert raced[0].account_id == "cc1"
+        assert mine.account_id == "cc2"
+    finally:
+        other_db.close()
+
+
+def test_concurrent_bookings_get_distinct_seats(db, service, slot):
+    bookers = 6
+    barrier = threading.Barrier(bookers)
+    results = [None] * bookers
+    errors = []
+
+    def book(n):
+        thread_db = SessionLocal()
+        attempts = []
+        try:
+            def make_session(account_id):
+                # Every booker has read the same free seats before anyone inserts
+                if not attempts:
+                    barrier.wait(timeout=10)
+                attempts.append(account_id)
+                return booking(slot, f"user{n}@example.com")(account_id)
+
+            session = service.claim_seat(thread_db, slot, make_session)
+            results[n] = session.account_id if session else None
+        except Exception as e:
+            errors.append(e)
+        finally:
+            thread_db.close()
+
+    threads = [threading.Thread(target=book, args=(n,)) for n in range(bookers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert not errors
+    assert sorted(seat for seat in results if seat) == ["cc1", "cc2"]
+    assert results.count(None) == bookers - 2
+    live = db.query(SessionModel).filter(SessionModel.slot_id == slot.id).count()
+    assert live == 2
+
+
+def test_ended_session_frees_its_seat(db, service, slot):
+    first = service.claim_seat(db, slot, booking(slot, "one@example.com"))
+    service.claim_seat(db, slot, booking(slot, "two@example.com"))
+
+    first.status = "completed"
+    db.commit()
+
+    again = service.claim_seat(db, slot, booking(slot, "three@example.com"))
+    assert again.account_id == "cc1"
+
+
+def test_other_integrity_errors_are_raised(db, service, slot):
+    existing_id = service.claim_seat(db, slot, booking(slot, "one@example.com")).id
+    db.expunge_all()
+
+    # Same primary key as the existing session - not a seat clash
+    with pytest.raises(IntegrityError):
+        service.claim_seat(db, slot, booking(slot, "two@example.com", id=existing_id))
@@ -0,0 +1,85 @@
+"""
+One-time credentials reveal (GET /api/sessions/{id}/credentials)
+The reveal is consumed only by a response that was actually built - a
+failure on the way leaves it in place for the next try.
+"""
+
+from datetime import timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import sessions
+from app.core.security import create_reveal_token
+from app.models.database import SessionLocal, Session as SessionModel
+from app.services.credential_reveal import credential_reveal
+from app.services.password_service import get_wat_now, password_service
+from app.services.slots_service import slots_service
+
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    app.include_router(sessions.router, prefix="/api")
+    return TestClient(app)
+
+
+@pytest.fixture
+def active_session(db):
+    now = get_wat_now()
+    session = SessionModel(
+        user_name="Test User",
+        user_email="user@example.com",
+        start_time=now - timedelta(minutes=5),
+        end_time=now + timedelta(minutes=85),
+        status="active",
+        slot_id="slot_1",
+        account_id="cc1",
+        account_email="shop+cc1@example.com"
+    )
+    db.add(session)
+    db.commit()
+    credential_reveal.put(session.id, password_service.encrypt_password("Secret-Pass-123"), session.end_time)
+    yield session
+    credential_reveal.pop(session.id)
+
+
+def reveal(client, session):
+    token = create_reveal_token(session.id, 3600)
+    return client.get(f"/api/sessions/sess_{session.id}/credentials", params={"token": token})
+
+
+def test_reveals_once(client, active_session):
+    first = reveal(client, active_session)
+    assert first.status_code == 200
+    assert first.json()["email"] == "shop+cc1@example.com"
+    assert first.json()["password"] == "Secret-Pass-123"
+    assert first.headers["cache-control"] == "no-store"
+
+    assert reveal(client, active_session).status_code == 410
+
+
+def test_failed_reveal_is_not_consumed(client, active_session, monkeypatch):
+    def unknown_account(session):
+        raise ValueError(f"Unknown account {session.account_id}")
+
+    monkeypatch.setattr(slots_service, "session_account_email", unknown_account)
+    assert reveal(client, active_session).status_code == 500
+
+    monkeypatch.undo()
+    assert reveal(client, active_session).status_code == 200
+
+
+def test_not_started_session_is_not_consumed(client, active_session):
+    db = SessionLocal()
+    try:
+        db.query(SessionModel).filter(SessionModel.id == active_session.id).update({"status": "ready"})
+        db.commit()
+        assert reveal(client, active_session).status_code == 409
+        db.query(SessionModel).filter(SessionModel.id == active_session.id).update({"status": "active"})
+        db.commit()
+    finally:
+        db.close()
+
+    assert reveal(client, active_session).status_code == 200
@@ -0,0 +1,212 @@
+"""
+Outbox delivery against a local SMTP sink (aiosmtpd)
+Queued emails must be sent on a drain, transient SMTP failures retried with
+backoff, and refused recipients or exhausted attempts marked failed.
+"""
+
+import asyncio
+import socket
+from datetime import timedelta
+from email import message_from_bytes
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.core.config import settings
+from app.models.database import EmailOutbox
+from app.services.email_outbox import EmailOutboxSender, SMTPConnectionPool, RETRY_BASE_SECONDS, REDACTED_PAYLOAD
+from app.services.email_service import email_service
+from app.services.password_service import get_wat_now, password_service
+
+USER_EMAIL = "user@example.com"
+ACCOUNT_EMAIL = "seat-a@example.com"
+
+
+class SinkHandler:
+    """Accepts mail like a relay would; can refuse recipients or fail DATA a few times"""
+
+    def __init__(self):
+        self.messages = []
+        self.refused: set[str] = set()
+        self.transient_failures = 0
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refused:
+            return "550 5.1.1 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.transient_failures:
+            self.transient_failures -= 1
+            return "451 4.3.0 Try again later"
+        self.messages.append((envelope.rcpt_tos, message_from_bytes(envelope.content)))
+        return "250 Message accepted for delivery"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_sink(monkeypatch):
+    handler = SinkHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    monkeypatch.setattr(settings, "smtp_host", "127.0.0.1")
+    monkeypatch.setattr(settings, "smtp_port", controller.port)
+    monkeypatch.setattr(settings, "smtp_use_tls", False)
+    monkeypatch.setattr(settings, "smtp_auth", False)
+    try:
+        yield handler
+    finally:
+        controller.stop()
+
+
+def queue_credentials(db, user_email: str = USER_EMAIL) -> int:
+    entry = email_service.enqueue_credentials_email(
+        db,
+        session_id=1,
+        user_name="Test User",
+        user_email=user_email,
+        account_email=ACCOUNT_EMAIL,
+        password="Secret-Pass-123",
+        start_time="2025-11-21T14:00:00",
+        end_time="2025-11-21T15:30:00"
+    )
+    db.commit()
+    return entry.id
+
+
+def drain(times: int = 1) -> list[int]:
+    """Run the sender's drain `times` times on one pool, like the background loop does"""
+    async def run():
+        sender = EmailOutboxSender()
+        sender._pool = SMTPConnectionPool(settings.smtp_pool_size)
+        try:
+            return [await sender.drain_once() for _ in range(times)]
+        finally:
+            await sender._pool.close()
+    return asyncio.run(run())
+
+
+def outbox_row(db, entry_id: int) -> EmailOutbox:
+    db.expire_all()
+    return db.query(EmailOutbox).filter(EmailOutbox.id == entry_id).one()
+
+
+def make_due(db, entry_id: int) -> None:
+    """Pretend the retry backoff has elapsed"""
+    outbox_row(db, entry_id).next_attempt_at = get_wat_now()
+    db.commit()
+
+
+def test_drain_delivers_queued_credentials(db, smtp_sink):
+    entry_id = queue_credentials(db)
+
+    assert drain() == [1]
+
+    [(recipients, message)] = smtp_sink.messages
+    assert recipients == [USER_EMAIL]
+    assert message["To"] == USER_EMAIL
+    body = message.get_payload()[0].get_payload(decode=True).decode()
+    assert ACCOUNT_EMAIL in body
+    assert "Secret-Pass-123" in body
+
+    row = outbox_row(db, entry_id)
+    assert row.status == "sent"
+    assert row.attempts == 1
+    assert row.sent_at is not None
+    assert row.last_error is None
+    # Credentials don't outlive delivery
+    assert row.payload == REDACTED_PAYLOAD
+
+
+def test_sent_entries_are_not_sent_again(db, smtp_sink):
+    queue_credentials(db)
+
+    assert drain(times=2) == [1, 0]
+    assert len(smtp_sink.messages) == 1
+
+
+def test_transient_failure_is_retried_with_backoff(db, smtp_sink):
+    smtp_sink.transient_failures = 1
+    entry_id = queue_credentials(db)
+
+    before = get_wat_now()
+    assert drain() == [1]
+
+    row = outbox_row(db, entry_id)
+    assert row.status == "pending"
+    assert row.attempts == 1
+    assert "Try again later" in row.last_error
+    assert row.payload != REDACTED_PAYLOAD
+    assert row.next_attempt_at >= before + timedelta(seconds=RETRY_BASE_SECONDS * 0.8)
+    assert not smtp_sink.messages
+
+    # Not due yet - the next drain leaves it alone
+    assert drain() == [0]
+
+    make_due(db, entry_id)
+    assert drain() == [1]
+
+    row = outbox_row(db, entry_id)
+    assert row.status == "sent"
+    assert row.attempts == 2
+    assert len(smtp_sink.messages) == 1
+
+
+def test_refused_recipient_fails_without_retry(db, smtp_sink):
+    smtp_sink.refused.add("nobody@example.com")
+    entry_id = queue_credentials(db, user_email="nobody@example.com")
+
+    assert drain() == [1]
+
+    row = outbox_row(db, entry_id)
+    assert row.status == "failed"
+    assert row.attempts == 1
+    assert row.payload == REDACTED_PAYLOAD
+    assert not smtp_sink.messages
+
+
+def test_gives_up_after_max_attempts(db, smtp_sink, monkeypatch):
+    monkeypatch.setattr(settings, "email_outbox_max_attempts", 2)
+    smtp_sink.transient_failures = 2
+    entry_id = queue_credentials(db)
+
+    drain()
+    assert outbox_row(db, entry_id).status == "pending"
+    make_due(db, entry_id)
+    drain()
+
+    row = outbox_row(db, entry_id)
+    assert row.status == "failed"
+    assert row.attempts == 2
+    assert not smtp_sink.messages
+
+
+def test_one_failed_send_does_not_hold_back_the_batch(db, smtp_sink):
+    smtp_sink.refused.add("nobody@example.com")
+    failed_id = queue_credentials(db, user_email="nobody@example.com")
+    sent_id = queue_credentials(db)
+
+    assert drain() == [2]
+
+    assert outbox_row(db, failed_id).status == "failed"
+    assert outbox_row(db, sent_id).status == "sent"
+    assert [recipients for recipients, _ in smtp_sink.messages] == [[USER_EMAIL]]
+
+
+def test_scrub_redacts_finished_rows_left_with_payloads(db):
+    sent_id = queue_credentials(db)
+    pending_id = queue_credentials(db)
+    # Finished before the sender redacted on delivery
+    outbox_row(db, sent_id).status = "sent"
+    db.commit()
+
+    password_service.cleanup_expired_passwords(db)
+
+    assert outbox_row(db, sent_id).payload == REDACTED_PAYLOAD
+    assert outbox_row(db, pending_id).payload != REDACTED_PAYLOAD
@@ -0,0 +1,97 @@
+"""
+Encryption key ring: ENCRYPTION_KEYS rotation, the legacy SECRET_KEY-derived
+key, and re-encrypting stored credentials after a rotation
+"""
+
+import asyncio
+
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+from app.core import security
+from app.core.config import settings
+from app.models.database import EmailOutbox, Password
+from app.services.password_service import password_service
+
+OLD_KEY = Fernet.generate_key().decode()
+NEW_KEY = Fernet.generate_key().decode()
+
+
+@pytest.fixture
+def key_ring(monkeypatch):
+    """Reconfigure the cached key ring: key_ring(keys, accept_legacy=False)"""
+    def configure(keys: str = None, accept_legacy: bool = False):
+        monkeypatch.setattr(settings, "encryption_keys", keys)
+        monkeypatch.setattr(settings, "encryption_accept_legacy_key", accept_legacy)
+        security._get_fernets.cache_clear()
+        security.get_key_ring.cache_clear()
+
+    yield configure
+    security._get_fernets.cache_clear()
+    security.get_key_ring.cache_clear()
+
+
+def legacy_token(password: str) -> str:
+    return Fernet(security._legacy_fernet_key()).encrypt(password.encode()).decode()
+
+
+def test_without_keys_the_legacy_key_is_used(key_ring):
+    key_ring(None)
+
+    assert security.decrypt_password(legacy_token("Old-Pass-1")) == "Old-Pass-1"
+    assert not security.has_previous_keys()
+    assert security.rotate_token(security.encrypt_password("x")) is None
+
+
+def test_rotation_keeps_old_tokens_readable_and_reencrypts_them(key_ring):
+    key_ring(OLD_KEY)
+    token = security.encrypt_password("Secret-Pass-1")
+
+    key_ring(f"{NEW_KEY},{OLD_KEY}")
+    assert security.has_previous_keys()
+    assert security.decrypt_password(token) == "Secret-Pass-1"
+
+    rotated = security.rotate_token(token)
+    assert rotated is not None
+    assert security.rotate_token(rotated) is None, "token under the current key rotated again"
+
+    key_ring(NEW_KEY)
+    assert security.decrypt_password(rotated) == "Secret-Pass-1"
+    with pytest.raises(InvalidToken):
+        security.decrypt_password(token)
+
+
+def test_legacy_key_is_rejected_once_keys_are_set_unless_accepted(key_ring):
+    token = legacy_token("Old-Pass-1")
+
+    key_ring(NEW_KEY, accept_legacy=False)
+    with pytest.raises(InvalidToken):
+        security.decrypt_password(token)
+
+    key_ring(NEW_KEY, accept_legacy=True)
+    assert security.decrypt_password(token) == "Old-Pass-1"
+    assert security.rotate_token(token) is not None
+
+
+def test_reencrypt_stored_credentials(db, key_ring):
+    key_ring(OLD_KEY)
+    password = Password(password_hash="hash", plain_password=security.encrypt_password("Stored-Pass-1"))
+    pending = EmailOutbox(recipient="user@example.com", template="credentials",
+                          payload=security.encrypt_password('{"password": "Stored-Pass-1"}'), status="pending")
+    failed = EmailOutbox(recipient="user@example.com", template="credentials",
+                         payload=security.encrypt_password("{}"), status="failed")
+    db.add_all([password, pending, failed])
+    db.commit()
+    failed_payload = failed.payload
+
+    key_ring(f"{NEW_KEY},{OLD_KEY}")
+    assert asyncio.run(password_service.reencrypt_stored_credentials()) == 2
+    # Nothing left under the old key
+    assert asyncio.run(password_service.reencrypt_stored_credentials()) == 0
+
+    db.expire_all()
+    key_ring(NEW_KEY)
+    assert security.decrypt_password(password.plain_password) == "Stored-Pass-1"
+    assert security.decrypt_password(pending.payload) == '{"password": "Stored-Pass-1"}'
+    # Only pending outbox rows are re-encrypted
+    assert failed.payload == failed_payload
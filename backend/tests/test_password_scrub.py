@@ -0,0 +1,99 @@
+"""
+Plain password scrub: expired rows are cleared in one UPDATE, and the
+cleanup job is scheduled for the next expiry
+"""
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from app.models.database import Password
+from app.scheduler import jobs
+from app.services.password_service import get_wat_now, password_service
+
+
+def add_password(db, expires_in: timedelta, plain: str = "encrypted") -> Password:
+    password = Password(password_hash="hash", plain_password=plain, expires_at=get_wat_now() + expires_in)
+    db.add(password)
+    db.commit()
+    return password
+
+
+def test_cleanup_scrubs_expired_passwords_only(db):
+    expired = add_password(db, timedelta(minutes=-1))
+    unexpired = add_password(db, timedelta(minutes=30))
+
+    assert password_service.cleanup_expired_passwords(db) == 1
+    assert password_service.cleanup_expired_passwords(db) == 0
+
+    db.expire_all()
+    assert expired.plain_password is None
+    assert expired.password_hash == "hash"
+    assert unexpired.plain_password == "encrypted"
+
+
+def test_next_expiry_skips_scrubbed_passwords(db):
+    assert password_service.next_password_expiry(db) is None
+
+    add_password(db, timedelta(minutes=10), plain=None)
+    later = add_password(db, timedelta(minutes=20))
+    add_password(db, timedelta(minutes=40))
+
+    assert password_service.next_password_expiry(db) == later.expires_at
+
+
+@pytest.fixture
+def scrub_scheduler(monkeypatch):
+    """Run a test coroutine with a paused scheduler in place of the app's"""
+    def run(test):
+        async def main():
+            scheduler = AsyncIOScheduler(timezone="Africa/Lagos")
+            scheduler.start(paused=True)
+            monkeypatch.setattr(jobs, "scheduler", scheduler)
+            try:
+                await test(scheduler)
+            finally:
+                scheduler.shutdown(wait=False)
+        asyncio.run(main())
+    return run
+
+
+def scheduled_at(scheduler):
+    job = scheduler.get_job(jobs.PASSWORD_SCRUB_JOB_ID)
+    return job.next_run_time.replace(tzinfo=None) if job else None
+
+
+def test_schedule_keeps_the_earliest_run(scrub_scheduler):
+    soon = get_wat_now().replace(microsecond=0) + timedelta(minutes=10)
+    later = soon + timedelta(minutes=20)
+
+    async def test(scheduler):
+        jobs.schedule_password_scrub(None)
+        assert scheduled_at(scheduler) is None
+
+        jobs.schedule_password_scrub(later)
+        jobs.schedule_password_scrub(soon)
+        assert scheduled_at(scheduler) == soon
+
+        jobs.schedule_password_scrub(later)
+        assert scheduled_at(scheduler) == soon
+        jobs.schedule_password_scrub(later, replace=True)
+        assert scheduled_at(scheduler) == later
+
+    scrub_scheduler(test)
+
+
+def test_scrub_job_reschedules_for_the_next_expiry(db, scrub_scheduler):
+    expired = add_password(db, timedelta(minutes=-1))
+    unexpired = add_password(db, timedelta(minutes=30))
+
+    async def test(scheduler):
+        await jobs.password_scrub_job()
+        assert scheduled_at(scheduler) == unexpired.expires_at
+
+    scrub_scheduler(test)
+    db.expire_all()
+    assert expired.plain_password is None
+    assert unexpired.plain_password == "encrypted"
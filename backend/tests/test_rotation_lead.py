@@ -0,0 +1,78 @@
+"""
+Pre-rotation lead time: p90 of recent successful rotations x 1.25 + one
+scheduler tick, capped, with the configured lead until there is history
+"""
+
+from datetime import timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.services.password_service import get_wat_now
+from app.services.rotation_service import RotationService
+
+
+@pytest.fixture
+def lead_settings(monkeypatch):
+    monkeypatch.setattr(settings, "prerotate_auto_tune", True)
+    monkeypatch.setattr(settings, "prerotate_lead_seconds", 300)
+    monkeypatch.setattr(settings, "prerotate_max_lead_seconds", 1800)
+    monkeypatch.setattr(settings, "prerotate_sample_size", 20)
+
+
+def record(db, service: RotationService, *durations: float, success: bool = True) -> None:
+    for duration in durations:
+        service.record_rotation(db, "session_start", None, get_wat_now(), duration, success)
+
+
+def lead_seconds(db, service: RotationService) -> float:
+    return service.get_lead_time(db).total_seconds()
+
+
+def test_lead_is_p90_with_headroom_and_a_scheduler_tick(db, lead_settings):
+    service = RotationService()
+    record(db, service, *range(10, 101, 10))
+    # Failed rotations don't count, however slow
+    record(db, service, 1000, 1000, success=False)
+
+    assert lead_seconds(db, service) == 90 * 1.25 + 60
+
+
+def test_lead_is_capped(db, lead_settings):
+    service = RotationService()
+    record(db, service, 2000, 2000, 2000)
+
+    assert lead_seconds(db, service) == 1800
+
+
+def test_only_the_latest_samples_count(db, lead_settings, monkeypatch):
+    monkeypatch.setattr(settings, "prerotate_sample_size", 3)
+    service = RotationService()
+    record(db, service, 900, 900, 900, 40, 40, 40)
+
+    assert lead_seconds(db, service) == 40 * 1.25 + 60
+
+
+@pytest.mark.parametrize("durations", [(), (40, 40)], ids=["no_history", "too_few_samples"])
+def test_configured_lead_without_enough_history(db, lead_settings, durations):
+    service = RotationService()
+    record(db, service, *durations)
+
+    assert lead_seconds(db, service) == 300
+
+
+def test_configured_lead_when_auto_tune_is_off(db, lead_settings, monkeypatch):
+    monkeypatch.setattr(settings, "prerotate_auto_tune", False)
+    service = RotationService()
+    record(db, service, 40, 40, 40)
+
+    assert lead_seconds(db, service) == 300
+
+
+def test_recording_a_rotation_refreshes_the_cached_lead(db, lead_settings):
+    service = RotationService()
+    record(db, service, 40, 40)
+    assert lead_seconds(db, service) == 300
+
+    record(db, service, 40)
+    assert service.get_lead_time(db) == timedelta(seconds=40 * 1.25 + 60)
@@ -1,21 +1,71 @@
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 import logging
+import logging.handlers
+import queue
 
 app = FastAPI(title="CapCut Password Reset Bot")
 
-logging.basicConfig(level=logging.INFO)
+# Records are formatted by the QueueHandler and written to stderr on the listener's
+# thread - a slow log pipe never stalls the event loop
+_log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+logging.basicConfig(level=logging.INFO, handlers=[logging.handlers.QueueHandler(_log_queue)])
+log_listener.start()
 logger = logging.getLogger(__name__)
 
 # Import the reset password route
 from routes.reset_password import router as reset_password_router
+from services.reset_jobs import reset_jobs
+from services.browser_pool import browser_pool
+from services.mail_listener import listener_for, all_listeners
+from services.accounts import accounts
+from services.resource_blocker import resource_blocker
+from services.forgot_request import http_forgot_request
+from services.selector_resolver import selector_resolver
+from services import mailbox_io
 
 # Include the router
 app.include_router(reset_password_router, prefix="/bot")
 
+@app.on_event("startup")
+async def startup_event():
+    """Pre-launch pooled browsers, connect the IMAP listeners and start reset job workers"""
+    try:
+        await browser_pool.start(headless=True)
+    except Exception as e:
+        # Flows will retry launching on demand
+        logger.error(f"Could not pre-launch browser pool: {e}")
+    # One IMAP listener per inbox, shared by the accounts whose resets land there
+    inboxes = {account.gmail_email.lower(): account for account in accounts.all()}
+    for account in inboxes.values():
+        if account.gmail_app_password:
+            await listener_for(account.gmail_email).start(account.gmail_email, account.gmail_app_password)
+        else:
+            logger.warning(f"No Gmail app password for {account.gmail_email} - IMAP listener not started")
+    await reset_jobs.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop reset job workers, the IMAP listeners, pooled HTTP connections, browsers and the log writer; save selector stats"""
+    await reset_jobs.stop()
+    for listener in all_listeners():
+        await listener.stop()
+    mailbox_io.shutdown()
+    await http_forgot_request.close()
+    await browser_pool.stop()
+    selector_resolver.flush()
+    log_listener.stop()
+
 @app.get("/health")
 async def health_check():
-    return {"status": "Bot service is running"}
+    return {
+        "status": "Bot service is running",
+        "browser_pool": browser_pool.engine if browser_pool.running else "stopped",
+        "browsers_recycled": browser_pool.recycled,
+        "accounts": len(accounts.all()),
+        "resource_blocker": resource_blocker.totals()
+    }
 
 if __name__ == "__main__":
     import uvicorn
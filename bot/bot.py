@@ -1,20 +1,101 @@
 import asyncio
+import logging
 import os
-import shutil
-from playwright.async_api import async_playwright, Page, Browser
-from imap_tools import MailBox
+from playwright.async_api import Page, BrowserContext, Response, TimeoutError as PlaywrightTimeoutError
 from dotenv import load_dotenv
-import re
+from config import settings
+from services.browser_pool import browser_pool
+from services.mail_listener import listener_for
+from services.selector_resolver import selector_resolver
+from services.resource_blocker import resource_blocker, BlockStats
+from services.storage_state import storage_state_store
+from services.forgot_request import ForgotRequestStrategy, http_forgot_request, reset_response_succeeded
+from services.flow_timing import FlowTimer
+from services.flow_graph import FlowGraph
 import string
+import time
 import secrets
+from urllib.parse import quote
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Per-step time budgets (ms) - steps wait on concrete signals, never fixed sleeps
+STEP_TIMEOUTS_MS = {
+    "navigation": 60000,       # page.goto until DOMContentLoaded
+    "element": 15000,          # a step's selector becoming visible
+    "banner": 3000,            # optional cookies banner
+    "forgot_request": 30000,   # CapCut answering the send-reset-email POST
+    "reset_request": 30000,    # CapCut answering the set-new-password POST
+    "redirect": 15000,         # leaving the reset page when no API response was seen
+}
+
+EMAIL_INPUT_SELECTOR = 'input[type="email"], input[placeholder*="email" i]'
+COOKIE_ACCEPT_SELECTOR = 'button:has-text("Accept"), button:has-text("accept"), button:has-text("Allow"), button[id*="accept"], button[class*="accept"]'
+FORGOT_SUBMIT_SELECTOR = 'button:has-text("Confirm"), button:has-text("Send"), button:has-text("submit")'
+NEW_PASSWORD_SELECTOR = 'input[type="password"], input[placeholder*="password" i]'
+
+# CapCut account (passport) endpoints used by the forgot/reset password forms
+ACCOUNT_ENDPOINT_KEYWORDS = ('passport', 'password', 'reset', 'forget', 'send_code')
+
+
+def is_capcut_account_post(response: Response) -> bool:
+    """Matches the POST the forgot/reset password forms send to CapCut"""
+    url = response.url.lower()
+    return (
+        response.request.method == 'POST'
+        and ('capcut' in url or url.startswith(settings.CAPCUT_BASE_URL.lower()))
+        and any(keyword in url for keyword in ACCOUNT_ENDPOINT_KEYWORDS)
+    )
+
+
+class BrowserFormStrategy(ForgotRequestStrategy):
+    """STEP 1-7 in a real browser: login page -> continue -> forgot password -> send"""
+    
+    name = "browser"
+    
+    def __init__(self, bot: "CapCutPasswordResetBot"):
+        self.bot = bot
+    
+    async def request_reset(self, email: str) -> bool:
+        bot = self.bot
+        timer = bot.timer
+        # Usually already launching alongside the IMAP connect
+        await bot.ensure_browser()
+        
+        logger.info("Step 2: Navigating to login page...")
+        with timer.span("login_navigation"):
+            await bot.navigate_to_login()
+        
+        with timer.span("email_entry"):
+            logger.info("Step 3: Entering email...")
+            await bot.enter_email(email)
+            
+            logger.info("Step 4: Clicking continue...")
+            await bot.click_continue()
+        
+        with timer.span("forgot_submit"):
+            logger.info("Step 5: Clicking forgot password...")
+            await bot.click_forgot_password()
+            
+            logger.info("Step 6: Verifying email is prefilled...")
+            await bot.verify_email_prefilled()
+            
+            logger.info("Step 7: Submitting forgot password form...")
+            await bot.submit_forgot_password_form()
+        return True
+
+
 class CapCutPasswordResetBot:
     """
     Automates the complete CapCut forgot password flow in 14 steps.
-    Uses incognito browser to avoid cache issues.
-    Reads Gmail IMAP to get password reset link.
+    Steps 1-7 only get CapCut to send the reset email: a recorded request is
+    replayed over HTTP when possible, the browser form is the fallback.
+    Uses a fresh incognito context on a warm pooled browser to avoid cache issues.
+    Gets the password reset link pushed from a persistent Gmail IMAP IDLE listener.
+    Steps run as a dependency graph: the IMAP connect, browser launch and
+    password generation overlap with requesting the email.
     """
     
     def __init__(
@@ -22,15 +103,33 @@ class CapCutPasswordResetBot:
         capcut_email: str,
         gmail_email: str, 
         gmail_app_password: str,
-        headless: bool = False
+        headless: bool = False,
+        reset_recipient: str = None
     ):
         self.capcut_email = capcut_email
         self.gmail_email = gmail_email
         self.gmail_app_password = gmail_app_password
+        # Address CapCut mails the reset link to - routes the email to this flow
+        self.reset_recipient = reset_recipient or capcut_email
+        self.mail_listener = listener_for(gmail_email)
         self.headless = headless
-        self.browser: Browser = None
+        self.browser: BrowserContext = None
         self.page: Page = None
+        self._owns_pool = False
+        self._owns_listener = False
+        # Shared by every step that needs them, so each starts once per run
+        self._browser_ready: asyncio.Task = None
+        self._listener_ready: asyncio.Task = None
+        self.block_stats: BlockStats = None
+        self.seeded_state = False
+        self.form_submitted_at: float = None
+        self.reset_response: Response = None
         self.new_password: str = None
+        # Tried in order until one gets the reset email sent
+        self.forgot_strategies: list[ForgotRequestStrategy] = [http_forgot_request, BrowserFormStrategy(self)]
+        self.forgot_strategy: str = None
+        # Step timing spans of the last run_complete_flow
+        self.timer = FlowTimer()
         
     def generate_strong_password(self) -> str:
         """Generate a strong password: 14+ chars, mixed case, numbers, safe special chars"""
@@ -56,12 +155,8 @@ class CapCutPasswordResetBot:
         return ''.join(password_list)
     
     async def launch_incognito_browser(self):
-        """STEP 1-2: Launch browser in true incognito mode"""
+        """STEP 1-2: Open a fresh incognito context on a warm pooled browser"""
         import random
-        import tempfile
-        import os
-        
-        playwright = await async_playwright().start()
         
         # Randomize browser settings to avoid detection
         user_agents = [
@@ -82,152 +177,44 @@ class CapCutPasswordResetBot:
         selected_viewport = random.choice(viewports)
         selected_user_agent = random.choice(user_agents)
         
-        print(f"🎭 Using user agent: {selected_user_agent}")
-        print(f"📱 Using viewport: {selected_viewport['width']}x{selected_viewport['height']}")
+        logger.info(f"🎭 Using user agent: {selected_user_agent}")
+        logger.info(f"📱 Using viewport: {selected_viewport['width']}x{selected_viewport['height']}")
+        
+        # The bot service starts the pool with the app; standalone runs
+        # (python bot.py / test.py) start one for this flow only
+        if not browser_pool.running:
+            logger.info("🚀 Browser pool not running - launching a browser for this run...")
+            await browser_pool.start(headless=self.headless)
+            self._owns_pool = True
+        
+        # A new context is a clean incognito session - no temp profile needed.
+        # It starts with the consent/tour state saved by the last good run.
+        storage_state = storage_state_store.load()
+        self.seeded_state = storage_state is not None
+        self.browser = await browser_pool.new_context(
+            storage_state=storage_state,
+            user_agent=selected_user_agent,
+            viewport=selected_viewport,
+            locale="en-US",
+            timezone_id="America/New_York",
+            accept_downloads=False,
+            ignore_https_errors=True,
+            # Add realistic headers
+            extra_http_headers={
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.5",
+                "Accept-Encoding": "gzip, deflate",
+                "DNT": "1",
+                "Connection": "keep-alive",
+                "Sec-Fetch-Dest": "document",
+                "Sec-Fetch-Mode": "navigate",
+                "Sec-Fetch-Site": "none"
+            }
+        )
+        logger.info(f"🕵️ Opened incognito context on warm {browser_pool.engine} browser" + (" (seeded consent state)" if self.seeded_state else ""))
         
-        # Create a temporary directory for this session (acts like incognito)
-        temp_dir = tempfile.mkdtemp(prefix="capcut_bot_")
-        print(f"🕵️ Creating incognito session with temp profile: {temp_dir}")
-        
-        # Try Firefox first as it's more reliable in VPS environments
-        try:
-            print("🦊 Attempting Firefox browser (more VPS-friendly)...")
-            self.browser = await playwright.firefox.launch_persistent_context(
-                user_data_dir=temp_dir,
-                headless=self.headless,
-                user_agent=selected_user_agent,
-                viewport=selected_viewport,
-                locale="en-US",
-                timezone_id="America/New_York",
-                accept_downloads=False,
-                ignore_https_errors=True,
-                # Firefox doesn't need as many arguments and is more stable in Docker
-                args=[
-                    '--no-remote',
-                    '--no-first-run',
-                    '--disable-dev-tools',
-                    '--disable-extensions'
-                ] if self.headless else [],
-                # Add realistic headers
-                extra_http_headers={
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                    "Accept-Language": "en-US,en;q=0.5",
-                    "Accept-Encoding": "gzip, deflate",
-                    "DNT": "1",
-                    "Connection": "keep-alive",
-                    "Sec-Fetch-Dest": "document",
-                    "Sec-Fetch-Mode": "navigate",
-                    "Sec-Fetch-Site": "none"
-                }
-            )
-            print("✅ Firefox browser launched successfully")
-        except Exception as firefox_error:
-            print(f"⚠️  Firefox failed: {firefox_error}")
-            print("🔄 Falling back to Chrome with maximum stability settings...")
-            
-            # Fallback to Chrome with extreme stability settings for VPS
-            self.browser = await playwright.chromium.launch_persistent_context(
-                user_data_dir=temp_dir,
-                headless=True,  # Force headless for VPS stability
-                user_agent=selected_user_agent,
-                viewport=selected_viewport,
-                locale="en-US",
-                timezone_id="America/New_York",
-                accept_downloads=False,
-                ignore_https_errors=True,
-                args=[
-                    # Core headless settings
-                    '--headless=new',
-                    '--virtual-time-budget=5000',
-                    '--run-all-compositor-stages-before-draw',
-                    
-                    # Disable all GPU and hardware acceleration
-                    '--disable-gpu',
-                    '--disable-gpu-sandbox',
-                    '--disable-software-rasterizer',
-                    '--disable-accelerated-2d-canvas',
-                    '--disable-accelerated-video-decode',
-                    '--disable-accelerated-video-encode',
-                    '--disable-gpu-memory-buffer-video-frames',
-                    '--disable-gpu-rasterization',
-                    '--disable-features=VizDisplayCompositor,VizHitTestSurfaceLayer',
-                    '--use-gl=swiftshader-webgl',
-                    '--use-angle=swiftshader',
-                    
-                    # Memory and process management
-                    '--single-process',
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--memory-pressure-off',
-                    '--max_old_space_size=4096',
-                    
-                    # Disable unnecessary features
-                    '--no-first-run',
-                    '--disable-extensions',
-                    '--disable-plugins',
-                    '--disable-background-timer-throttling',
-                    '--disable-renderer-backgrounding',
-                    '--disable-backgrounding-occluded-windows',
-                    '--disable-background-networking',
-                    '--disable-default-apps',
-                    '--disable-sync',
-                    '--disable-translate',
-                    '--disable-features=TranslateUI,BlinkGenPropertyTrees',
-                    '--disable-ipc-flooding-protection',
-                    '--disable-hang-monitor',
-                    '--disable-prompt-on-repost',
-                    '--disable-domain-reliability',
-                    '--disable-component-extensions-with-background-pages',
-                    
-                    # Audio and media
-                    '--mute-audio',
-                    '--disable-audio-output',
-                    
-                    # Logging and debugging (minimize noise)
-                    '--disable-logging',
-                    '--silent',
-                    '--disable-crash-reporter',
-                    '--disable-in-process-stack-traces',
-                    '--log-level=3',
-                    
-                    # Automation detection bypass
-                    '--disable-blink-features=AutomationControlled',
-                    '--disable-web-security',
-                    '--disable-features=VizDisplayCompositor',
-                    '--no-default-browser-check',
-                    '--disable-login-animations',
-                    
-                    # Additional stability flags for VPS
-                    '--disable-dbus',
-                    '--disable-dev-tools',
-                    '--disable-infobars',
-                    '--disable-notifications',
-                    '--disable-popup-blocking',
-                    '--disable-save-password-bubble',
-                    '--disable-session-crashed-bubble',
-                    '--disable-password-generation',
-                    '--disable-permissions-api',
-                    '--ignore-certificate-errors',
-                    '--ignore-ssl-errors',
-                    '--ignore-certificate-errors-spki-list'
-                ],
-                # Add realistic headers
-                extra_http_headers={
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                    "Accept-Language": "en-US,en;q=0.5",
-                    "Accept-Encoding": "gzip, deflate",
-                    "DNT": "1",
-                    "Connection": "keep-alive",
-                    "Sec-Fetch-Dest": "document",
-                    "Sec-Fetch-Mode": "navigate",
-                    "Sec-Fetch-Site": "none"
-                }
-            )
-            print("✅ Chrome browser launched with VPS-optimized settings")
-        
-        # Store temp dir for cleanup
-        self.temp_dir = temp_dir
+        # Skip images, fonts, media and trackers - the flow only needs the forms
+        self.block_stats = await resource_blocker.attach(self.browser)
         
         # Remove automation indicators
         await self.browser.add_init_script("""
@@ -251,41 +238,57 @@ class CapCutPasswordResetBot:
         
         self.page = await self.browser.new_page()
         
+    async def ensure_browser(self):
+        """STEP 1-2 once per run, however many steps need the browser"""
+        if self._browser_ready is None:
+            self._browser_ready = asyncio.ensure_future(self._launch_browser())
+        await self._browser_ready
+        
+    async def _launch_browser(self):
+        logger.info("Step 1-2: Launching incognito browser...")
+        with self.timer.span("launch"):
+            await self.launch_incognito_browser()
+        
     async def navigate_to_login(self):
         """Navigate to CapCut login page"""
         # Use domcontentloaded instead of networkidle to avoid hanging on heavy SPAs
-        await self.page.goto('https://www.capcut.com/login?redirect_url=https%3A%2F%2Fwww.capcut.com%2Fmy-edit', wait_until='domcontentloaded', timeout=60000)
+        base_url = settings.CAPCUT_BASE_URL
+        await self.page.goto(f"{base_url}/login?redirect_url={quote(base_url + '/my-edit', safe='')}", wait_until='domcontentloaded', timeout=STEP_TIMEOUTS_MS["navigation"])
         
-        # Wait for page to stabilize after initial load
-        await asyncio.sleep(3)
+        # The page is usable once the email field renders
+        await self.page.wait_for_selector(EMAIL_INPUT_SELECTOR, state='visible', timeout=STEP_TIMEOUTS_MS["element"])
         
-        # Handle cookies banner if present
+        # Handle cookies banner if present. With seeded consent it shouldn't
+        # show, so only dismiss one that is already up instead of waiting for it
         try:
-            cookies_accept = await self.page.wait_for_selector('button:has-text("Accept"), button:has-text("accept"), button:has-text("Allow"), button[id*="accept"], button[class*="accept"]', timeout=5000)
-            if cookies_accept:
-                await cookies_accept.click()
-                await asyncio.sleep(2)
-                print("✅ Accepted cookies banner")
+            if self.seeded_state:
+                cookies_accept = await self.page.query_selector(f'{COOKIE_ACCEPT_SELECTOR} >> visible=true')
+                if not cookies_accept:
+                    return
+            else:
+                cookies_accept = await self.page.wait_for_selector(COOKIE_ACCEPT_SELECTOR, state='visible', timeout=STEP_TIMEOUTS_MS["banner"])
+            await cookies_accept.click()
+            await cookies_accept.wait_for_element_state('hidden', timeout=STEP_TIMEOUTS_MS["banner"])
+            logger.info("✅ Accepted cookies banner")
         except Exception:
-            print("ℹ️  No cookies banner found or already accepted")
+            logger.info("ℹ️  No cookies banner found or already accepted")
         
     async def enter_email(self, email: str):
         """STEP 3: Enter email in login form"""
-        # Find email input (adjust selector based on CapCut's actual HTML)
-        email_input = await self.page.query_selector('input[type="email"], input[placeholder*="email" i]')
-        if email_input:
-            await email_input.fill(email)
-        else:
+        try:
+            email_input = await self.page.wait_for_selector(EMAIL_INPUT_SELECTOR, state='visible', timeout=STEP_TIMEOUTS_MS["element"])
+        except Exception:
             raise Exception("Could not find email input field on login page")
+        await email_input.fill(email)
         
     async def click_continue(self):
         """STEP 4: Click continue button"""
-        continue_button = await self.page.query_selector('button:has-text("Continue"), button:has-text("continue")')
-        if continue_button:
-            await continue_button.click()
-            await self.page.wait_for_load_state('networkidle')
-        else:
+        try:
+            continue_button = await self.page.wait_for_selector('button:has-text("Continue"), button:has-text("continue")', state='visible', timeout=STEP_TIMEOUTS_MS["element"])
+        except Exception:
             raise Exception("Could not find Continue button")
+        # The next step waits for the forgot password link to render
+        await continue_button.click()
         
     async def click_forgot_password(self):
         """STEP 5: Click forgot password link"""
@@ -298,220 +301,184 @@ class CapCutPasswordResetBot:
             '[class="forget-pwd-btn"]'
         ]
         
+        # All candidates are raced at once; the usual winner is preferred
         forgot_link = None
-        for selector in forgot_selectors:
-            try:
-                forgot_link = await self.page.wait_for_selector(selector, timeout=5000)
-                if forgot_link and await forgot_link.is_visible():
-                    print(f"✅ Found forgot password button with selector: {selector}")
-                    break
-            except:
-                continue
+        try:
+            forgot_link, selector = await selector_resolver.resolve(self.page, "bot.forgot_password", forgot_selectors, STEP_TIMEOUTS_MS["element"])
+            logger.info(f"✅ Found forgot password button with selector: {selector}")
+        except Exception:
+            pass
         
         if forgot_link:
             await forgot_link.click()
-            await self.page.wait_for_load_state('networkidle')
+            # Forgot password form is up once its submit button renders
+            await self.page.wait_for_selector(FORGOT_SUBMIT_SELECTOR, state='visible', timeout=STEP_TIMEOUTS_MS["element"])
         else:
             raise Exception("Could not find Forgot password button with class 'forget-pwd-btn'")
         
     async def verify_email_prefilled(self):
         """STEP 6: Verify email is prefilled (don't type again)"""
-        email_input = await self.page.query_selector('input[type="email"], input[placeholder*="email" i]')
-        if email_input:
-            current_value = await email_input.input_value()
-            if current_value != self.capcut_email:
-                raise Exception(f"Email not prefilled. Found: {current_value}, Expected: {self.capcut_email}")
-        else:
+        try:
+            email_input = await self.page.wait_for_selector(EMAIL_INPUT_SELECTOR, state='visible', timeout=STEP_TIMEOUTS_MS["element"])
+        except Exception:
             raise Exception("Could not find email input on forgot password page")
+        current_value = await email_input.input_value()
+        if current_value != self.capcut_email:
+            raise Exception(f"Email not prefilled. Found: {current_value}, Expected: {self.capcut_email}")
         
     async def submit_forgot_password_form(self):
         """STEP 7: Click confirm/send button on forgot password form"""
-        submit_button = await self.page.query_selector('button:has-text("Confirm"), button:has-text("Send"), button:has-text("submit")')
-        if submit_button:
-            await submit_button.click()
-            await self.page.wait_for_load_state('networkidle')
-        else:
+        submit_button = await self.page.query_selector(FORGOT_SUBMIT_SELECTOR)
+        if not submit_button:
             raise Exception("Could not find Submit button on forgot password form")
         
-    async def get_reset_link_from_email(self, timeout: int = 60) -> str:
-        """STEP 8: Read Gmail inbox and extract password reset link"""
-        import time
-        from datetime import datetime, timedelta
-        import email.utils
-        
-        # Record the time when form was submitted (before waiting)
-        form_submit_time = time.time()
-        print(f"🕒 Form submitted at {datetime.fromtimestamp(form_submit_time).strftime('%H:%M:%S')}")
-        
-        # Wait a few seconds for the email to be sent after form submission
-        print("⏳ Waiting for email to be sent...")
-        await asyncio.sleep(3)  # Reduced wait time
-        
-        print("🔍 Will accept emails that arrived after form submission time...")
+        await self.ensure_mail_listener()
+        self.reset_email_requested()
+        # Done when CapCut answers the send-reset-email request, not after a network lull
+        try:
+            async with self.page.expect_response(is_capcut_account_post, timeout=STEP_TIMEOUTS_MS["forgot_request"]) as response_info:
+                await submit_button.click()
+            response = await response_info.value
+            logger.info(f"📨 Forgot password request answered: {response.status} {response.url}")
+            if response.status >= 400:
+                raise Exception(f"Forgot password request failed with HTTP {response.status}")
+            await self.record_forgot_request(response)
+        except PlaywrightTimeoutError:
+            # The reset email is still the real signal - keep going and wait for it
+            logger.warning("⚠️  No forgot password request observed - waiting for the email anyway")
+        
+    async def ensure_mail_listener(self):
+        """The bot service keeps the IMAP listener running; standalone runs start
+        one here so it is watching the inbox before the email can arrive"""
+        if self._listener_ready is None:
+            self._listener_ready = asyncio.ensure_future(self._start_mail_listener())
+        await self._listener_ready
+        
+    async def _start_mail_listener(self):
+        if not self.mail_listener.running:
+            logger.info("📬 IMAP listener not running - connecting for this run...")
+            self._owns_listener = True
+            await self.mail_listener.start(self.gmail_email, self.gmail_app_password)
+        
+    def reset_email_requested(self):
+        """Mark the moment a reset email is requested - links CapCut sent before it are dead"""
+        self.form_submitted_at = time.time()
+        self.mail_listener.reset_requested(self.reset_recipient)
+        
+    async def record_forgot_request(self, response: Response):
+        """Keep an accepted forgot password request so later runs can replay it over HTTP"""
+        try:
+            if not reset_response_succeeded(await response.json()):
+                return
+        except Exception:
+            return
+        request = response.request
+        http_forgot_request.record(
+            self.capcut_email,
+            method=request.method,
+            url=request.url,
+            headers=await request.all_headers(),
+            body=request.post_data,
+            referer=self.page.url
+        )
         
-        while time.time() - form_submit_time < timeout:
+    async def request_reset_email(self):
+        """STEP 1-7: Get CapCut to send the reset email, trying each strategy in turn"""
+        for strategy in self.forgot_strategies:
+            if strategy is http_forgot_request:
+                # The browser form waits for the listener itself, right before it submits
+                await self.ensure_mail_listener()
+            self.reset_email_requested()
             try:
-                mailbox = MailBox('imap.gmail.com')
-                mailbox.login(self.gmail_email, self.gmail_app_password)
-                
-                # Search for CapCut password reset emails that arrived AFTER we submitted the form
-                
-                # Convert form submit time to datetime for comparison
-                form_submit_datetime = datetime.fromtimestamp(form_submit_time)
-                # Allow emails from 30 seconds before form submission to account for timing differences
-                cutoff_datetime = form_submit_datetime - timedelta(seconds=30)
-                
-                # Get emails from today only
-                today_str = datetime.now().strftime('%d-%b-%Y')
-                
-                # Search for recent emails with CapCut subject
-                messages = list(mailbox.fetch(f'(SUBJECT "CapCut password reset request" SINCE "{today_str}")', bulk=True, limit=15, reverse=True))
-                print(f"📧 Found {len(messages)} CapCut emails from today")
-                
-                # Filter to emails that are recent enough to be from this form submission
-                fresh_messages = []
-                for msg in messages:
-                    msg_time = email.utils.parsedate_tz(msg.date_str)
-                    if msg_time:
-                        msg_datetime = datetime.fromtimestamp(email.utils.mktime_tz(msg_time))
-                        
-                        # Accept emails that arrived within 30 seconds before or after form submission
-                        if msg_datetime >= cutoff_datetime:
-                            fresh_messages.append(msg)
-                            print(f"✅ Recent email: {msg_datetime.strftime('%H:%M:%S')} - {msg.subject}")
-                        else:
-                            print(f"⏰ Old email: {msg_datetime.strftime('%H:%M:%S')} - {msg.subject}")
-                
-                messages = fresh_messages
-                print(f"🔥 Processing {len(messages)} recent emails")
-                
-                for msg in messages:
-                    # Extract URLs from email body
-                    html_body = msg.html or msg.text
-                    if html_body:
-                        # Find URLs that look like reset links - more aggressive regex
-                        urls = re.findall(r'https?://[^\s<>"{}|\\^`\[\]]+', html_body)
-                        
-                        # Also search for URLs in href attributes specifically
-                        href_urls = re.findall(r'href=["\']([^"\']*)["\']', html_body, re.IGNORECASE)
-                        urls.extend(href_urls)
-                        
-                        # Remove duplicates and clean URLs
-                        unique_urls = list(set(urls))
-                        
-                        print(f"📧 Found {len(unique_urls)} total URLs in email")
-                        
-                        for url in unique_urls:
-                            print(f"🔍 Checking URL: {url}")
-                            if any(keyword in url.lower() for keyword in ['reset', 'verify', 'forget', 'password', 'change-pwd']):
-                                # Comprehensive URL cleaning
-                                import html
-                                import urllib.parse
-                                
-                                # Step 1: Decode HTML entities (&amp; -> &, &quot; -> ", etc.)
-                                clean_url = html.unescape(url)
-                                
-                                # Step 2: Handle URL encoding (%40 -> @, %2F -> /, etc.)
-                                clean_url = urllib.parse.unquote(clean_url)
-                                
-                                # Step 3: Remove any trailing punctuation that might be from email formatting
-                                clean_url = clean_url.rstrip('.,;!)')
-                                
-                                # Step 4: Ensure it's a proper URL
-                                if not clean_url.startswith('http'):
-                                    clean_url = 'https://' + clean_url.lstrip('/')
-                                
-                                print(f"🔧 Original URL: {url}")
-                                print(f"✅ Cleaned URL: {clean_url}")
-                                print(f"🔍 URL contains keywords: {[kw for kw in ['reset', 'verify', 'forget', 'password', 'change-pwd'] if kw in clean_url.lower()]}")
-                                
-                                mailbox.logout()
-                                return clean_url
-                
-                mailbox.logout()
+                if strategy is http_forgot_request:
+                    # The browser strategy times its own steps
+                    with self.timer.span("http_forgot_request"):
+                        accepted = await strategy.request_reset(self.capcut_email)
+                else:
+                    accepted = await strategy.request_reset(self.capcut_email)
+                if accepted:
+                    self.forgot_strategy = strategy.name
+                    logger.info(f"📨 Reset email requested via {strategy.name} ({time.time() - self.form_submitted_at:.1f}s)")
+                    return
             except Exception as e:
-                print(f"Email check error (will retry): {e}")
-            
-            await asyncio.sleep(2)  # Wait 2 seconds before retry
+                if strategy is self.forgot_strategies[-1]:
+                    raise
+                logger.warning(f"⚠️  {strategy.name} forgot password request failed: {e}")
+        raise Exception("No strategy could request the password reset email")
         
-        raise Exception(f"Could not find password reset link in email after {timeout} seconds")
+    async def get_reset_link_from_email(self, timeout: int = 60) -> str:
+        """STEP 8: Wait for the IMAP listener to push the password reset link"""
+        from datetime import datetime
+        
+        # Record the time when form was submitted (before waiting)
+        form_submit_time = self.form_submitted_at or time.time()
+        logger.info(f"🕒 Form submitted at {datetime.fromtimestamp(form_submit_time).strftime('%H:%M:%S')}")
+        logger.info("📬 Waiting for CapCut reset email (IMAP IDLE)...")
+        
+        reset_link = await self.mail_listener.wait_for_link(form_submit_time, timeout, recipient=self.reset_recipient)
+        logger.info(f"✅ Reset link received {time.time() - form_submit_time:.1f}s after form submission")
+        return reset_link
+        
+    async def preconnect_reset_page(self):
+        """While the email is on its way: have the idle page preconnect to CapCut, so
+        opening the reset link skips DNS, TCP and TLS. The browser form's page is
+        already connected."""
+        if self.page.url != "about:blank":
+            return
+        origin = settings.CAPCUT_BASE_URL
+        await self.page.set_content(f'<link rel="preconnect" href="{origin}"><link rel="dns-prefetch" href="{origin}">')
         
     async def navigate_to_reset_link(self, reset_link: str):
         """STEP 9: Navigate to the password reset page"""
-        print(f"🔗 Navigating to reset link: {reset_link}")
-        await self.page.goto(reset_link, wait_until='networkidle')
-        await self.page.wait_for_load_state('networkidle')
+        logger.info(f"🔗 Navigating to reset link: {reset_link}")
+        await self.page.goto(reset_link, wait_until='domcontentloaded', timeout=STEP_TIMEOUTS_MS["navigation"])
+        
+        # The reset form is ready once a password field renders
+        try:
+            await self.page.wait_for_selector(NEW_PASSWORD_SELECTOR, state='visible', timeout=STEP_TIMEOUTS_MS["element"])
+            logger.info("✅ Password reset form detected")
+            return
+        except PlaywrightTimeoutError:
+            pass
         
         # Debug: Check what page we actually landed on
         current_url = self.page.url
         page_title = await self.page.title()
-        print(f"📍 Current URL: {current_url}")
-        print(f"📄 Page title: {page_title}")
-        
-        # Wait a moment for page to fully load
-        await asyncio.sleep(3)
-        
-        # Check if we're on the right page by looking for password fields
-        password_inputs = await self.page.query_selector_all('input[type="password"]')
-        print(f"🔑 Found {len(password_inputs)} password fields on this page")
-        
-        # Also check for any input fields that might be password fields
-        all_inputs = await self.page.query_selector_all('input')
-        print(f"📝 Found {len(all_inputs)} total input fields")
-        
-        # Look for specific CapCut password field indicators
-        capcut_password_indicators = [
-            'input[placeholder*="password" i]',
-            'input[placeholder*="Password" i]', 
-            'input[name*="password" i]',
-            'input[id*="password" i]',
-            '.password-input',
-            '[data-testid*="password"]'
-        ]
+        logger.info(f"📍 Current URL: {current_url}")
+        logger.info(f"📄 Page title: {page_title}")
         
-        for selector in capcut_password_indicators:
-            fields = await self.page.query_selector_all(selector)
-            if fields:
-                print(f"🔍 Found {len(fields)} fields with selector: {selector}")
-        
-        # Show page content snippet for debugging
         page_content = await self.page.content()
-        if any(indicator in page_content.lower() for indicator in ["enter new password", "new password", "reset password", "password"]):
-            print("✅ Password reset form detected")
-        elif "expired" in page_content.lower() or "invalid" in page_content.lower():
-            print("❌ Link may be expired or invalid")
+        if "expired" in page_content.lower() or "invalid" in page_content.lower():
+            logger.error("❌ Link may be expired or invalid")
         else:
-            print("⚠️  Unexpected page content")
-            print(f"📝 Page snippet: {page_content[:500]}...")
+            logger.warning("⚠️  Unexpected page content")
+            logger.info(f"📝 Page snippet: {page_content[:500]}...")
         
     async def enter_new_password(self, password: str):
         """STEP 10-11: Enter new password in both fields"""
-        # Wait for page to load
-        await asyncio.sleep(3)
-        
         # Target the specific CapCut password input fields
         try:
             # First password field - "Enter new password"
-            password_field1 = await self.page.wait_for_selector('input[placeholder="Enter new password"]', timeout=10000)
+            password_field1 = await self.page.wait_for_selector('input[placeholder="Enter new password"]', timeout=STEP_TIMEOUTS_MS["element"])
             await password_field1.fill(password)
             
             # Verify first field was filled correctly
             field1_value = await password_field1.input_value()
             if field1_value == password:
-                print("✅ Filled first password field successfully")
+                logger.info("✅ Filled first password field successfully")
             else:
-                print(f"⚠️  First field fill issue: expected '{password}', got '{field1_value}'")
+                logger.warning(f"⚠️  First field fill issue: got {len(field1_value)} characters, expected {len(password)}")
             
             # Second password field - "Enter new password again"  
-            password_field2 = await self.page.wait_for_selector('input[placeholder="Enter new password again"]', timeout=10000)
+            password_field2 = await self.page.wait_for_selector('input[placeholder="Enter new password again"]', timeout=STEP_TIMEOUTS_MS["element"])
             await password_field2.fill(password)
             
             # Verify second field was filled correctly
             field2_value = await password_field2.input_value()
             if field2_value == password:
-                print("✅ Filled second password field successfully")
+                logger.info("✅ Filled second password field successfully")
             else:
-                print(f"⚠️  Second field fill issue: expected '{password}', got '{field2_value}'")
+                logger.warning(f"⚠️  Second field fill issue: got {len(field2_value)} characters, expected {len(password)}")
             
         except Exception as e:
             # Fallback: try generic password selectors
@@ -523,166 +490,165 @@ class CapCutPasswordResetBot:
                 # Verify fallback method worked
                 field1_val = await password_inputs[0].input_value()
                 field2_val = await password_inputs[1].input_value()
-                print(f"✅ Filled {len(password_inputs)} password fields using fallback method")
-                print(f"   Field 1: {'✓' if field1_val == password else '✗'} Field 2: {'✓' if field2_val == password else '✗'}")
+                logger.info(f"✅ Filled {len(password_inputs)} password fields using fallback method")
+                logger.info(f"   Field 1: {'✓' if field1_val == password else '✗'} Field 2: {'✓' if field2_val == password else '✗'}")
             else:
                 raise Exception(f"Could not find password fields. Found {len(password_inputs)} password inputs")
         
         self.new_password = password
         
     async def confirm_password_reset(self):
-        """STEP 12: Click confirm password button"""
-        # Wait a moment to ensure password fields are fully processed
-        await asyncio.sleep(2)
-        
-        confirm_button = await self.page.query_selector('button:has-text("Confirm")')
-        if confirm_button:
-            print("🔍 Checking button state before clicking...")
-            is_enabled = await confirm_button.is_enabled()
-            is_visible = await confirm_button.is_visible()
-            print(f"   Button enabled: {is_enabled}, visible: {is_visible}")
-            
-            # Check if there are any validation errors before clicking
-            page_content_before = await self.page.content()
-            if "error" in page_content_before.lower():
-                print("⚠️  Found error on page before clicking submit")
-            
-            # Listen for network requests to see if form is actually submitted
-            requests_made = []
-            def track_request(request):
-                if 'capcut.com' in request.url and request.method == 'POST':
-                    requests_made.append(f"POST {request.url}")
-                    print(f"🌐 Form submission request: {request.url}")
-            
-            self.page.on('request', track_request)
-            
-            # Double-check that button is clickable and click it
-            await confirm_button.scroll_into_view_if_needed()
-            print("🔄 Clicking confirm button...")
-            await confirm_button.click()
-            
-            # Wait to see if any POST requests are made
-            await asyncio.sleep(3)
-            
-            # Remove listener
-            self.page.remove_listener('request', track_request)
-            
-            print(f"📡 POST requests made: {len(requests_made)}")
-            for req in requests_made:
-                print(f"   {req}")
-            
-            if len(requests_made) == 0:
-                print("❌ NO form submission requests detected! Form might not be submitting.")
-            
-            await self.page.wait_for_load_state('networkidle')
-            
-            # Check the page after clicking to see what happened
-            current_url = self.page.url
-            print(f"📍 URL after click: {current_url}")
-            
-            # If URL changed from forget-password page, that's SUCCESS!
-            if 'forget-password' not in current_url or 'my-edit' in current_url or 'login' in current_url:
-                print("✅ Page navigated away from password reset - this indicates SUCCESS!")
-                return  # Navigation means success
-            
-            # Only check content if we're still on the same page
-            try:
-                page_content_after = await self.page.content()
-                if "error" in page_content_after.lower() or "invalid" in page_content_after.lower():
-                    print("⚠️  Possible error on page (but form was likely still submitted)")
-            except Exception:
-                # Page is navigating - that's success!
-                print("✅ Page is navigating - password reset successful!")
-            
-        else:
+        """STEP 12: Click confirm password button and capture CapCut's answer"""
+        try:
+            confirm_button = await self.page.wait_for_selector('button:has-text("Confirm"):not([disabled])', state='visible', timeout=STEP_TIMEOUTS_MS["element"])
+        except Exception:
             raise Exception("Could not find Confirm password button")
         
-    async def verify_success(self) -> bool:
-        """STEP 13: Wait 1 minute for password reset to complete"""
-        print("⏳ Waiting 1 minute for password reset to complete...")
+        await confirm_button.scroll_into_view_if_needed()
+        logger.info("🔄 Clicking confirm button...")
         
-        # Wait 1 minute (60 seconds) for password reset to fully process
-        for remaining in range(60, 0, -10):
-            print(f"⏳ Waiting {remaining} more seconds for password reset to complete...")
-            await asyncio.sleep(10)
+        # The reset API's response (not a timer) tells us whether it worked
+        try:
+            async with self.page.expect_response(is_capcut_account_post, timeout=STEP_TIMEOUTS_MS["reset_request"]) as response_info:
+                await confirm_button.click()
+            self.reset_response = await response_info.value
+            logger.info(f"🌐 Password reset request answered: {self.reset_response.status} {self.reset_response.url}")
+        except PlaywrightTimeoutError:
+            logger.error("❌ NO password reset request detected! Form might not be submitting.")
+            self.reset_response = None
         
-        print("✅ Password reset processing time complete")
-        return True
+    async def verify_success(self) -> bool:
+        """STEP 13: Confirm the reset from the API response (or a redirect off the reset page)"""
+        if self.reset_response is not None:
+            ok = self.reset_response.status < 400
+            try:
+                body = await self.reset_response.json()
+                ok = ok and reset_response_succeeded(body)
+                logger.info(f"📡 Reset API response: {body}")
+            except Exception:
+                # Non-JSON answer - the HTTP status is all we have
+                pass
+            if ok:
+                logger.info("✅ Reset API confirmed new password")
+            else:
+                logger.error("❌ Reset API rejected the new password")
+            return ok
+        
+        # No API response seen - fall back to CapCut redirecting away from the reset page
+        try:
+            await self.page.wait_for_url(lambda url: 'forget-password' not in url, timeout=STEP_TIMEOUTS_MS["redirect"])
+            logger.info(f"✅ Page navigated away from password reset ({self.page.url}) - this indicates SUCCESS!")
+            return True
+        except PlaywrightTimeoutError:
+            logger.error(f"❌ Still on the reset page after {STEP_TIMEOUTS_MS['redirect'] // 1000}s: {self.page.url}")
+            return False
         
     async def close_browser(self):
-        """STEP 14: Close browser and cleanup"""
+        """STEP 14: Close the incognito context (the pooled browser stays warm)"""
         if self.browser:
-            await self.browser.close()
-        
-        # Clean up temp directory to prevent disk space issues on Render
-        if hasattr(self, 'temp_dir') and self.temp_dir:
             try:
-                shutil.rmtree(self.temp_dir, ignore_errors=True)
-                print(f"🧹 Cleaned up temp directory: {self.temp_dir}")
+                await self.browser.close()
             except Exception as e:
-                print(f"⚠️  Could not clean temp dir: {e}")
+                logger.warning(f"⚠️  Could not close browser context: {e}")
+            self.browser = None
+        
+        if self.block_stats:
+            resource_blocker.record_run(self.block_stats)
+            self.block_stats = None
+        
+        if self._owns_pool:
+            await browser_pool.stop()
+            self._owns_pool = False
+        
+        if self._owns_listener:
+            await self.mail_listener.stop()
+            self._owns_listener = False
         
     async def run_complete_flow(self) -> tuple[bool, str]:
         """
         Run the entire 14-step flow.
         Returns: (success: bool, new_password: str)
         """
-        try:
-            print("🤖 Starting CapCut password reset bot...")
-            
-            print("Step 1-2: Launching incognito browser...")
-            await self.launch_incognito_browser()
-            
-            print("Step 2: Navigating to login page...")
-            await self.navigate_to_login()
-            
-            print("Step 3: Entering email...")
-            await self.enter_email(self.capcut_email)
-            
-            print("Step 4: Clicking continue...")
-            await self.click_continue()
-            
-            print("Step 5: Clicking forgot password...")
-            await self.click_forgot_password()
-            
-            print("Step 6: Verifying email is prefilled...")
-            await self.verify_email_prefilled()
-            
-            print("Step 7: Submitting forgot password form...")
-            await self.submit_forgot_password_form()
-            
-            print("Step 8: Getting reset link from Gmail...")
-            reset_link = await self.get_reset_link_from_email()
-            
-            print("Step 9: Navigating to password reset page...")
-            await self.navigate_to_reset_link(reset_link)
-            
-            print("Step 10-11: Entering new password...")
-            new_password = self.generate_strong_password()
-            await self.enter_new_password(new_password)
-            
-            print("Step 12: Confirming password reset...")
+        timer = self.timer = FlowTimer()
+        self._browser_ready = self._listener_ready = None
+        graph = FlowGraph(timer)
+        
+        async def generate_password():
+            return self.generate_strong_password()
+        
+        async def request_reset_email():
+            logger.info("Step 1-7: Requesting password reset email...")
+            await self.request_reset_email()
+        
+        async def wait_for_reset_link():
+            logger.info("Step 8: Getting reset link from Gmail...")
+            return await self.get_reset_link_from_email()
+        
+        async def navigate_to_reset_link():
+            logger.info("Step 9: Navigating to password reset page...")
+            await self.navigate_to_reset_link(graph.results["imap_wait"])
+        
+        async def enter_new_password():
+            logger.info("Step 10-11: Entering new password...")
+            await self.enter_new_password(graph.results["password"])
+        
+        async def confirm_password_reset():
+            logger.info("Step 12: Confirming password reset...")
             await self.confirm_password_reset()
-            
-            print("Step 13: Verifying success...")
-            success = await self.verify_success()
+        
+        async def verify_success():
+            logger.info("Step 13: Verifying success...")
+            return await self.verify_success()
+        
+        # Independent from the start: IMAP connect, browser launch ("launch" is timed
+        # inside ensure_browser - the browser form may be the one that waits for it),
+        # password generation and the forgot password request itself
+        graph.add("mail_listener", self.ensure_mail_listener)
+        graph.add("launch", self.ensure_browser, timed=False)
+        graph.add("password", generate_password, timed=False)
+        graph.add("forgot_request", request_reset_email)
+        graph.add("imap_wait", wait_for_reset_link, after=("forgot_request",))
+        # Runs during imap_wait
+        graph.add("reset_preconnect", self.preconnect_reset_page, after=("launch", "forgot_request"))
+        graph.add("reset_navigation", navigate_to_reset_link, after=("imap_wait", "reset_preconnect"))
+        graph.add("password_entry", enter_new_password, after=("reset_navigation", "password"))
+        graph.add("confirm", confirm_password_reset, after=("password_entry",))
+        graph.add("verify", verify_success, after=("confirm",))
+        
+        try:
+            logger.info("🤖 Starting CapCut password reset bot...")
+            results = await graph.run()
+            success, new_password = results["verify"], results["password"]
             
             if success:
-                print(f"✅ Password reset successful!")
-                print(f"New password: {new_password}")
-                print("Step 14: Closing browser...")
-                await self.close_browser()
+                logger.info(f"✅ Password reset successful!")
+                # Keep consent/tour flags (never auth cookies) for the next run
+                await storage_state_store.capture(self.browser)
+                logger.info("Step 14: Closing browser...")
+                with timer.span("close"):
+                    await self.close_browser()
                 return (True, new_password)
             else:
-                print(f"❌ Password reset failed - no success toast appeared")
-                print("Step 14: Closing browser...")
-                await self.close_browser()
+                logger.error("❌ Password reset failed - CapCut did not confirm the new password")
+                storage_state_store.failed()
+                logger.info("Step 14: Closing browser...")
+                with timer.span("close"):
+                    await self.close_browser()
                 return (False, None)
                 
         except Exception as e:
-            print(f"❌ Error during password reset: {e}")
+            logger.error(f"❌ Error during password reset: {e}")
+            storage_state_store.failed()
             await self.close_browser()
             return (False, None)
+        except asyncio.CancelledError:
+            # The graph has already awaited its cancelled steps - release what they opened
+            logger.warning("⚠️  Password reset cancelled - closing browser context")
+            await self.close_browser()
+            raise
+        finally:
+            timer.finish()
+            logger.info(f"⏱️  Step timings ({timer.total_ms / 1000:.1f}s total): {timer.summary()}")
 
 
 # Test function
@@ -703,4 +669,5 @@ async def main():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     asyncio.run(main())
\ No newline at end of file
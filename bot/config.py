@@ -15,12 +15,56 @@ class Settings(BaseSettings):
     # IMAP Configuration
     IMAP_HOST: str = os.getenv("IMAP_HOST", "imap.gmail.com")
     IMAP_PORT: int = int(os.getenv("IMAP_PORT", "993"))
+    IMAP_SSL: bool = os.getenv("IMAP_SSL", "true").lower() == "true"  # false for the local mock (mock/imap_server.py)
+    # Threads for blocking mailbox calls made from async code (services/mailbox_io.py)
+    MAILBOX_IO_WORKERS: int = int(os.getenv("MAILBOX_IO_WORKERS", "2"))
+    # Handled reset emails are moved here (a Gmail label) to keep INBOX small - empty leaves them in INBOX
+    IMAP_PROCESSED_FOLDER: str = os.getenv("IMAP_PROCESSED_FOLDER", "CapCut Resets")
     
     # Bot Configuration
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     HEADLESS: bool = os.getenv("HEADLESS", "false").lower() == "true"
     DEBUG: bool = os.getenv("DEBUG", "true").lower() == "true"
     
+    # Site the flows run against - point at mock/capcut_server.py for offline runs
+    CAPCUT_BASE_URL: str = os.getenv("CAPCUT_BASE_URL", "https://www.capcut.com").rstrip("/")
+    
+    # Account pool - JSON list of {"id", "email", "reset_recipient", "gmail_email", "gmail_app_password"}
+    # (see services/accounts.py); empty means the single CAPCUT_EMAIL account
+    CAPCUT_ACCOUNTS: str = os.getenv("CAPCUT_ACCOUNTS", "")
+    
+    # Reset job queue - number of password resets run at the same time (0 = one per account)
+    MAX_CONCURRENT_RESETS: int = int(os.getenv("MAX_CONCURRENT_RESETS", "0"))
+    
+    # Warm browser pool - browsers launched at startup, one incognito context per reset
+    BROWSER_POOL_SIZE: int = int(os.getenv("BROWSER_POOL_SIZE", "1"))
+    # Recycle a pooled browser between flows after this many runs / above this process tree RSS (0 = never)
+    BROWSER_MAX_RUNS: int = int(os.getenv("BROWSER_MAX_RUNS", "50"))
+    BROWSER_MAX_RSS_MB: int = int(os.getenv("BROWSER_MAX_RSS_MB", "1200"))
+    
+    # Requests aborted during flows - resource types and third-party domains (comma separated)
+    BLOCK_RESOURCES: bool = os.getenv("BLOCK_RESOURCES", "true").lower() == "true"
+    BLOCKED_RESOURCE_TYPES: str = os.getenv("BLOCKED_RESOURCE_TYPES", "image,media,font")
+    BLOCKED_DOMAINS: str = os.getenv(
+        "BLOCKED_DOMAINS",
+        "google-analytics.com,googletagmanager.com,doubleclick.net,facebook.net,facebook.com,"
+        "analytics.tiktok.com,mon.tiktokv.com,mcs.tiktokv.com,hotjar.com,clarity.ms,sentry.io,bat.bing.com"
+    )
+
+    # Replay the recorded forgot password request over HTTP before falling back to the browser form
+    HTTP_FAST_PATH: bool = os.getenv("HTTP_FAST_PATH", "true").lower() == "true"
+    HTTP_FAST_PATH_TIMEOUT: float = float(os.getenv("HTTP_FAST_PATH_TIMEOUT", "15"))
+
+    # Consent cookies and dismissed-tour flags carried between runs (never auth tokens)
+    PERSIST_STORAGE_STATE: bool = os.getenv("PERSIST_STORAGE_STATE", "true").lower() == "true"
+    DROP_STORAGE_STATE_ON_FAILURE: bool = os.getenv("DROP_STORAGE_STATE_ON_FAILURE", "true").lower() == "true"
+
+    # Finished flows kept per step for the GET /bot/metrics percentiles
+    FLOW_METRICS_WINDOW: int = int(os.getenv("FLOW_METRICS_WINDOW", "500"))
+
+    # Where the bot keeps small state files between runs (working browser engine, ...)
+    STATE_DIR: str = os.getenv("STATE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".state"))
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
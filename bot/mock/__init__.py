@@ -0,0 +1 @@
+"""Local stand-ins for CapCut and Gmail, used to exercise the bot without touching the real site"""
@@ -0,0 +1,188 @@
+"""
+Offline benchmark of the password reset flow
+Starts the mock CapCut site and the mock IMAP server, points the bot at
+them and runs N complete flows (real browser, real IMAP listener), then
+reports per-step latency percentiles, the success rate and how far the
+event loop lagged - so changes to the bot can be measured on one machine
+without capcut.com or Gmail.
+
+Each concurrent lane owns one account (bench+N@example.com, all delivered
+to one shared inbox), like the production account pool.
+
+Run from the bot directory:
+    python -m mock.benchmark --flows 20 --concurrency 2 --email-delay 1.5
+    python -m mock.benchmark --serve    # only run the mocks, prints the env to point bot.py at them
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+from mock import capcut_server
+from mock.imap_server import MockImapServer, build_message
+from mock.loop_lag import LoopLagMonitor
+
+INBOX = "bench@example.com"
+SENDER = "CapCut <admin@mail.capcut.com>"
+RESET_EMAIL_SUBJECT = "CapCut password reset request"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the reset flow against local CapCut/IMAP mocks")
+    parser.add_argument("--flows", type=int, default=5, help="complete flows to run (default 5)")
+    parser.add_argument("--concurrency", type=int, default=1, help="flows at once, one account each (default 1)")
+    parser.add_argument("--email-delay", type=float, default=1.0, help="seconds before the reset email lands (default 1.0)")
+    parser.add_argument("--email-jitter", type=float, default=0.0, help="extra random delay, up to this many seconds")
+    parser.add_argument("--no-fast-path", action="store_true", help="always use the browser form (HTTP_FAST_PATH=false)")
+    parser.add_argument("--headed", action="store_true", help="show the browser")
+    parser.add_argument("--verbose", action="store_true", help="log the bot's steps")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    parser.add_argument("--serve", action="store_true", help="only start the mocks and wait")
+    return parser.parse_args()
+
+
+def start_mocks(args: argparse.Namespace) -> tuple[str, MockImapServer]:
+    web_port = capcut_server.free_port()
+    capcut_server.serve_in_thread(web_port)
+    imap = MockImapServer().start_in_thread()
+
+    def send_reset_email(email: str, link: str) -> None:
+        delay = args.email_delay + random.uniform(0, args.email_jitter)
+        imap.deliver(INBOX, build_message(SENDER, email, RESET_EMAIL_SUBJECT, capcut_server.reset_email_html(link)), delay)
+
+    capcut_server.on_reset_requested = send_reset_email
+    return f"http://127.0.0.1:{web_port}", imap
+
+
+def bot_environment(args: argparse.Namespace, base_url: str, imap: MockImapServer, state_dir: str) -> dict:
+    """Settings that point the bot at the mocks - config.py reads them on import"""
+    return {
+        "CAPCUT_BASE_URL": base_url,
+        "IMAP_HOST": "127.0.0.1",
+        "IMAP_PORT": str(imap.port),
+        "IMAP_SSL": "false",
+        "CAPCUT_EMAIL": "bench+1@example.com",
+        "CAPCUT_ACCOUNTS": "",
+        "GMAIL_EMAIL": INBOX,
+        "GMAIL_APP_PASSWORD": "mock",
+        "HTTP_FAST_PATH": "false" if args.no_fast_path else "true",
+        "STATE_DIR": state_dir,
+    }
+
+
+async def run_flows(args: argparse.Namespace) -> dict:
+    # Imported after the environment is set - these read config.settings at import
+    from bot import CapCutPasswordResetBot
+    from services.browser_pool import browser_pool
+    from services.flow_timing import FlowMetrics
+    from services.forgot_request import http_forgot_request
+    from services.mail_listener import listener_for
+
+    metrics = FlowMetrics(window=args.flows)
+    listener = listener_for(INBOX)
+    await browser_pool.start(headless=not args.headed)
+    await listener.start(INBOX, "mock")
+
+    remaining = iter(range(args.flows))
+    results = []
+
+    async def lane(number: int):
+        account = f"bench+{number}@example.com"
+        for _ in remaining:
+            bot = CapCutPasswordResetBot(
+                capcut_email=account,
+                gmail_email=INBOX,
+                gmail_app_password="mock",
+                headless=not args.headed,
+                reset_recipient=account
+            )
+            success, new_password = await bot.run_complete_flow()
+            # Only count it if the mock really got the new password
+            success = success and any(
+                email == account and password == new_password
+                for email, password, _ in capcut_server.password_changes
+            )
+            metrics.record(bot.timer, success)
+            results.append({"account": account, "success": success, "strategy": bot.forgot_strategy, "total_ms": bot.timer.total_ms})
+
+    started = time.perf_counter()
+    try:
+        async with LoopLagMonitor() as loop_lag:
+            await asyncio.gather(*(lane(number) for number in range(1, args.concurrency + 1)))
+    finally:
+        await listener.stop()
+        await http_forgot_request.close()
+        await browser_pool.stop()
+    wall_seconds = time.perf_counter() - started
+
+    succeeded = sum(1 for result in results if result["success"])
+    return {
+        "flows": len(results),
+        "succeeded": succeeded,
+        "success_rate": succeeded / len(results) if results else 0.0,
+        "wall_seconds": round(wall_seconds, 2),
+        "flows_per_minute": round(len(results) / wall_seconds * 60, 2) if wall_seconds else 0.0,
+        "strategies": {name: sum(1 for r in results if r["strategy"] == name) for name in {r["strategy"] for r in results}},
+        "settings": {
+            "concurrency": args.concurrency,
+            "email_delay": args.email_delay,
+            "email_jitter": args.email_jitter,
+            "fast_path": not args.no_fast_path,
+        },
+        "steps": metrics.summary()["steps"],
+        "loop_lag": loop_lag.summary(),
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{report['succeeded']}/{report['flows']} flows succeeded ({report['success_rate']:.0%}) "
+          f"in {report['wall_seconds']:.1f}s - {report['flows_per_minute']:.1f} flows/min")
+    print(f"forgot password requests: {report['strategies']}")
+    lag = report["loop_lag"]
+    print(f"event loop lag: mean {lag['mean_ms']:.1f}ms, p99 {lag['p99_ms']:.1f}ms, max {lag['max_ms']:.1f}ms")
+    print(f"\n{'step':<22}{'n':>4}{'fail':>6}{'mean':>9}{'p50':>9}{'p90':>9}{'p95':>9}{'max':>9}   (ms)")
+    for step, stats in report["steps"].items():
+        print(
+            f"{step:<22}{stats['count']:>4}{stats['failures']:>6}{stats['mean_ms']:>9.0f}"
+            f"{stats['p50_ms']:>9.0f}{stats['p90_ms']:>9.0f}{stats['p95_ms']:>9.0f}{stats['max_ms']:>9.0f}"
+        )
+
+
+def main():
+    args = parse_args()
+    # The bot logs its steps - quiet unless asked
+    logging.basicConfig(level=logging.INFO if args.verbose or args.serve else logging.WARNING, format="%(message)s")
+    base_url, imap = start_mocks(args)
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        environment = bot_environment(args, base_url, imap, state_dir)
+        if args.serve:
+            capcut_server.KNOWN_ACCOUNTS.add(environment["CAPCUT_EMAIL"])
+            print("Mocks running - point the bot at them with:")
+            for key, value in environment.items():
+                print(f"  export {key}={value}")
+            with contextlib.suppress(KeyboardInterrupt):
+                while True:
+                    time.sleep(3600)
+            return
+
+        os.environ.update(environment)
+        capcut_server.KNOWN_ACCOUNTS.update(f"bench+{n}@example.com" for n in range(1, args.concurrency + 1))
+        report = asyncio.run(run_flows(args))
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if report["succeeded"] == report["flows"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark the reset link extractor on the sample email corpus
+Reports, per sample and overall, whether services/reset_link.py found the
+expected link (and code), and what one extraction costs in microseconds.
+The regex the IMAP listener used before is run on the same corpus for
+comparison.
+
+Run from the bot directory:
+    python -m mock.benchmark_reset_link --iterations 2000 --json results.json
+"""
+
+import argparse
+import html
+import json
+import re
+import statistics
+import sys
+import time
+import urllib.parse
+
+from mock.reset_email_corpus import SAMPLES
+from services.reset_link import extract_reset_link, extract_verification_code
+
+
+def previous_listener_extract(body: str):
+    """The listener's extractor before services/reset_link.py, kept for comparison"""
+    if not body:
+        return None
+    urls = re.findall(r'https?://[^\s<>"{}|\\^`\[\]]+', body)
+    urls.extend(re.findall(r'href=["\']([^"\']*)["\']', body, re.IGNORECASE))
+    for url in dict.fromkeys(urls):
+        if any(keyword in url.lower() for keyword in ['reset', 'verify', 'forget', 'password', 'change-pwd']):
+            clean_url = urllib.parse.unquote(html.unescape(url)).rstrip('.,;!)')
+            if not clean_url.startswith('http'):
+                clean_url = 'https://' + clean_url.lstrip('/')
+            return clean_url
+    return None
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark reset link extraction on the sample corpus")
+    parser.add_argument("--iterations", type=int, default=1000, help="extractions per sample for timing (default 1000)")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    return parser.parse_args()
+
+
+def time_us(func, body: str, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func(body)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def run(iterations: int) -> dict:
+    samples = []
+    for sample in SAMPLES:
+        link = extract_reset_link(sample["body"])
+        previous = previous_listener_extract(sample["body"])
+        result = {
+            "name": sample["name"],
+            "bytes": len(sample["body"]),
+            "ok": link == sample["link"],
+            "found": link,
+            "previous_ok": previous == sample["link"],
+            "us": round(time_us(extract_reset_link, sample["body"], iterations), 1),
+            "previous_us": round(time_us(previous_listener_extract, sample["body"], iterations), 1),
+        }
+        if "code" in sample:
+            code = extract_verification_code(sample["body"])
+            result["code_ok"] = code == sample["code"]
+            result["ok"] = result["ok"] and result["code_ok"]
+        samples.append(result)
+
+    return {
+        "samples": samples,
+        "accuracy": sum(s["ok"] for s in samples) / len(samples),
+        "previous_accuracy": sum(s["previous_ok"] for s in samples) / len(samples),
+        "median_us": statistics.median(s["us"] for s in samples),
+        "max_us": max(s["us"] for s in samples),
+        "previous_median_us": statistics.median(s["previous_us"] for s in samples),
+        "iterations": iterations,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"{'sample':<34}{'bytes':>7}{'us':>9}  {'ok':<4}{'prev us':>9}  prev ok")
+    for s in report["samples"]:
+        print(f"{s['name']:<34}{s['bytes']:>7}{s['us']:>9.1f}  {'yes' if s['ok'] else 'NO':<4}"
+              f"{s['previous_us']:>9.1f}  {'yes' if s['previous_ok'] else 'no'}")
+        if not s["ok"]:
+            print(f"    got {s['found']}")
+    print(f"\naccuracy {report['accuracy']:.0%} (previous listener regex {report['previous_accuracy']:.0%}), "
+          f"median {report['median_us']:.1f}us, max {report['max_us']:.1f}us per email "
+          f"(previous median {report['previous_median_us']:.1f}us)")
+
+
+def main():
+    args = parse_args()
+    report = run(args.iterations)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if report["accuracy"] == 1 else 1)
+
+
+if __name__ == "__main__":
+    main()
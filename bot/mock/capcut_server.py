@@ -0,0 +1,213 @@
+"""
+Minimal mock of CapCut's forgot password flow
+Serves the pages the bot drives - login (email -> continue -> forgot
+password -> send) and the reset page the emailed link opens - with the
+same selectors as capcut.com, plus the passport endpoints behind them.
+send_code only accepts requests carrying the cookies the login page sets,
+which is what the HTTP fast path has to get right. Each accepted request
+issues a reset token; on_reset_requested (set by the benchmark) gets the
+account and its reset link to email.
+
+Run standalone: python -m mock.capcut_server [port]
+"""
+
+import secrets
+import socket
+import sys
+import threading
+import time
+from typing import Callable, Optional
+from urllib.parse import parse_qs
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse
+
+SEND_CODE_PATH = "/passport/web/email/send_code/"
+RESET_PASSWORD_PATH = "/passport/web/email/reset_password/"
+RESET_PAGE_PATH = "/forget-password"
+KNOWN_ACCOUNTS = {"bot@example.com"}
+
+app = FastAPI(title="Mock CapCut")
+# (email, time) of every accepted forgot password request
+sent_requests: list[tuple[str, float]] = []
+# Unused reset tokens -> account email
+reset_tokens: dict[str, str] = {}
+# (email, new password, time) of every completed reset
+password_changes: list[tuple[str, str, float]] = []
+# Called with (email, reset link) for every accepted forgot password request
+on_reset_requested: Optional[Callable[[str, str], None]] = None
+
+LOGIN_PAGE = """<!doctype html>
+<html><head><title>Log in | CapCut</title></head>
+<body>
+<div id="cookie-banner">We use cookies. <button id="accept-cookies" onclick="this.parentNode.style.display='none'">Accept all</button></div>
+<form onsubmit="return false">
+  <input type="email" name="email" placeholder="Enter email" autocomplete="email">
+  <button id="continue" type="button">Continue</button>
+  <div id="password-step" style="display:none">
+    <input type="password" placeholder="Enter password">
+    <div class="forget-pwd-btn">Forgot password?</div>
+  </div>
+  <div id="forgot-step" style="display:none">
+    <p>We'll email you a link to reset your password.</p>
+    <button id="send" type="button">Send</button>
+  </div>
+  <p id="status"></p>
+</form>
+<script>
+const $ = (id) => document.getElementById(id);
+const email = document.querySelector('input[type=email]');
+$('continue').onclick = () => {
+  if (!email.value) return;
+  $('continue').style.display = 'none';
+  setTimeout(() => { $('password-step').style.display = 'block'; }, 150);
+};
+document.querySelector('.forget-pwd-btn').onclick = () => {
+  $('password-step').style.display = 'none';
+  setTimeout(() => { $('forgot-step').style.display = 'block'; }, 150);
+};
+$('send').onclick = async () => {
+  // Passport mix_mode: every byte XOR 5, hex encoded
+  const mixed = Array.from(new TextEncoder().encode(email.value), (b) => (b ^ 5).toString(16).padStart(2, '0')).join('');
+  const response = await fetch('SEND_CODE_PATH?aid=348188&account_sdk_source=web', {
+    method: 'POST',
+    headers: {'content-type': 'application/x-www-form-urlencoded'},
+    body: 'mix_mode=1&email=' + mixed + '&type=31'
+  });
+  const body = await response.json();
+  $('status').textContent = body.message === 'success' ? 'Email sent' : 'Something went wrong';
+};
+</script>
+</body></html>
+""".replace("SEND_CODE_PATH", SEND_CODE_PATH)
+
+RESET_PAGE = """<!doctype html>
+<html><head><title>Reset password | CapCut</title></head>
+<body>
+<form onsubmit="return false">
+  <input type="password" placeholder="Enter new password">
+  <input type="password" placeholder="Enter new password again">
+  <button id="confirm" type="button" disabled>Confirm</button>
+  <p id="status"></p>
+</form>
+<script>
+const fields = document.querySelectorAll('input[type=password]');
+const confirmButton = document.getElementById('confirm');
+fields.forEach((field) => field.addEventListener('input', () => {
+  confirmButton.disabled = !(fields[0].value && fields[0].value === fields[1].value);
+}));
+confirmButton.onclick = async () => {
+  const response = await fetch('RESET_PASSWORD_PATH', {
+    method: 'POST',
+    headers: {'content-type': 'application/json'},
+    body: JSON.stringify({token: 'TOKEN', password: fields[0].value})
+  });
+  const body = await response.json();
+  if (body.message === 'success') {
+    setTimeout(() => { window.location.href = '/my-edit'; }, 100);
+  } else {
+    document.getElementById('status').textContent = 'Reset failed';
+  }
+};
+</script>
+</body></html>
+""".replace("RESET_PASSWORD_PATH", RESET_PASSWORD_PATH)
+
+EXPIRED_PAGE = "<html><head><title>CapCut</title></head><body><p>This link has expired or is invalid.</p></body></html>"
+
+
+def decode_mixed(value: str) -> str:
+    """Undo the passport SDK's mix_mode (every byte XOR 5, hex encoded)"""
+    return bytes(byte ^ 5 for byte in bytes.fromhex(value)).decode()
+
+
+def reset_email_html(link: str) -> str:
+    """Body of the reset email, shaped like CapCut's (the link sits in an href)"""
+    return (
+        "<p>Hi,</p><p>We received a request to reset the password of your CapCut account.</p>"
+        f'<p><a href="{link}" style="color:#fff">Reset password</a></p>'
+        "<p>If you didn't request this, you can ignore this email.</p>"
+    )
+
+
+@app.get("/login", response_class=HTMLResponse)
+async def login_page():
+    response = HTMLResponse(LOGIN_PAGE)
+    response.set_cookie("ttwid", secrets.token_hex(16))
+    return response
+
+
+@app.post(SEND_CODE_PATH)
+async def send_code(request: Request):
+    if "ttwid" not in request.cookies:
+        return JSONResponse({"message": "error", "data": {"error_code": 1105, "description": "missing cookie"}})
+
+    # Parsed by hand - request.form() would need python-multipart
+    form = {key: values[0] for key, values in parse_qs((await request.body()).decode()).items()}
+    email = form.get("email", "")
+    if form.get("mix_mode") == "1":
+        try:
+            email = decode_mixed(email)
+        except ValueError:
+            email = ""
+    if email not in KNOWN_ACCOUNTS:
+        return JSONResponse({"message": "error", "data": {"error_code": 1011, "description": "account not found"}})
+
+    sent_requests.append((email, time.time()))
+    token = secrets.token_urlsafe(16)
+    reset_tokens[token] = email
+    if on_reset_requested:
+        link = f"{request.base_url}{RESET_PAGE_PATH.lstrip('/')}?token={token}"
+        on_reset_requested(email, link)
+    return {"message": "success", "data": {}}
+
+
+@app.get(RESET_PAGE_PATH, response_class=HTMLResponse)
+async def reset_page(token: str = ""):
+    if token not in reset_tokens:
+        return HTMLResponse(EXPIRED_PAGE)
+    return HTMLResponse(RESET_PAGE.replace("TOKEN", token))
+
+
+@app.post(RESET_PASSWORD_PATH)
+async def reset_password(request: Request):
+    body = await request.json()
+    email = reset_tokens.pop(body.get("token", ""), None)
+    if email is None:
+        return JSONResponse({"message": "error", "data": {"error_code": 1202, "description": "link expired"}})
+    if len(body.get("password") or "") < 8:
+        reset_tokens[body["token"]] = email
+        return JSONResponse({"message": "error", "data": {"error_code": 1051, "description": "password too weak"}})
+    password_changes.append((email, body["password"], time.time()))
+    return {"message": "success", "data": {}}
+
+
+@app.get("/my-edit", response_class=HTMLResponse)
+async def my_edit():
+    return HTMLResponse("<html><head><title>My edits | CapCut</title></head><body><p>Welcome back</p></body></html>")
+
+
+@app.get("/mock/sent")
+async def list_sent():
+    return [{"email": email, "at": at} for email, at in sent_requests]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_in_thread(port: int) -> tuple[uvicorn.Server, threading.Thread]:
+    """Run the mock on a background thread; returns once it accepts connections"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="127.0.0.1", port=int(sys.argv[1]) if len(sys.argv) > 1 else 5055)
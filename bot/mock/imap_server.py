@@ -0,0 +1,537 @@
+"""
+Minimal in-memory IMAP server standing in for Gmail
+Speaks the part of IMAP4rev1 the bot's mail code uses (LOGIN, SELECT,
+STATUS, UID SEARCH, UID FETCH, IDLE, CREATE and UID MOVE/COPY/STORE/EXPUNGE)
+over plain TCP, one mailbox per login.
+Tests and the benchmark drop reset emails in with deliver(), optionally
+after a delay, and clients in IDLE are told about them right away.
+response_delay makes every command answer that much later, like a slow
+Gmail connection.
+
+Run standalone: python -m mock.imap_server [port]
+"""
+
+import asyncio
+import email.utils
+import logging
+import re
+import sys
+import threading
+import time
+from email import message_from_bytes
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CAPABILITIES = "IMAP4rev1 IDLE UIDPLUS MOVE LITERAL+"
+UIDVALIDITY = 1
+
+
+class StoredMessage:
+    def __init__(self, uid: int, raw: bytes, internal_date: float):
+        self.uid = uid
+        self.raw = raw
+        self.internal_date = internal_date
+        self.flags: set = set()
+        self.parsed = message_from_bytes(raw)
+
+    @property
+    def header_bytes(self) -> bytes:
+        end = self.raw.find(b"\r\n\r\n")
+        return self.raw if end < 0 else self.raw[:end + 4]
+
+    def header(self, name: str) -> str:
+        return " ".join(str(value) for value in self.parsed.get_all(name, []))
+
+
+class Folder:
+    def __init__(self):
+        self.messages: List[StoredMessage] = []
+        self.uid_next = 1
+
+    def append(self, raw: bytes, internal_date: float) -> StoredMessage:
+        message = StoredMessage(self.uid_next, raw, internal_date)
+        self.uid_next += 1
+        self.messages.append(message)
+        return message
+
+    def remove(self, messages: List[StoredMessage]) -> List[int]:
+        """Drop messages; returns their sequence numbers, highest first (the order to report EXPUNGE in)"""
+        numbers = sorted((self.messages.index(message) + 1 for message in messages), reverse=True)
+        for number in numbers:
+            del self.messages[number - 1]
+        return numbers
+
+
+class MockImapServer:
+    """One asyncio IMAP server; mailboxes are created on first login or delivery"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, response_delay: float = 0):
+        self.host = host
+        self.port = port
+        self.response_delay = response_delay
+        self.mailboxes: Dict[str, Dict[str, Folder]] = {}
+        self.connections: List["_Connection"] = []
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def has_folder(self, user: str, name: str) -> bool:
+        return ("INBOX" if name.upper() == "INBOX" else name) in self.mailboxes.get(user.lower(), {})
+
+    def folder(self, user: str, name: str = "INBOX") -> Folder:
+        folders = self.mailboxes.setdefault(user.lower(), {"INBOX": Folder()})
+        # INBOX is case-insensitive, other names are not
+        return folders.setdefault("INBOX" if name.upper() == "INBOX" else name, Folder())
+
+    async def serve(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Mock IMAP server listening on {self.host}:{self.port}")
+
+    def start_in_thread(self) -> "MockImapServer":
+        """Run the server on its own event loop thread; returns once it is listening"""
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.serve())
+            ready.set()
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="mock-imap", daemon=True)
+        self._thread.start()
+        ready.wait(10)
+        return self
+
+    def stop(self) -> None:
+        if self.loop and self._server:
+            self.loop.call_soon_threadsafe(self._server.close)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def deliver(self, user: str, raw: bytes, delay: float = 0) -> None:
+        """Add a message to the user's INBOX after `delay` seconds (thread-safe)"""
+        self.loop.call_soon_threadsafe(self.loop.call_later, delay, self._append, user, raw)
+
+    def _append(self, user: str, raw: bytes) -> None:
+        folder = self.folder(user)
+        message = folder.append(raw, time.time())
+        logger.info(f"Mock IMAP delivered UID {message.uid} to {user}")
+        for connection in self.connections:
+            if connection.selected is folder:
+                connection.notify_exists()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connection = _Connection(self, reader, writer)
+        self.connections.append(connection)
+        try:
+            await connection.run()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.remove(connection)
+            writer.close()
+
+
+def _tokenize(text: str) -> list:
+    """Split command arguments into atoms, "quoted strings" and (nested lists)"""
+    tokens: list = []
+    stack = [tokens]
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == " ":
+            i += 1
+        elif char == "(":
+            stack[-1].append([])
+            stack.append(stack[-1][-1])
+            i += 1
+        elif char == ")":
+            stack.pop()
+            i += 1
+        elif char == '"':
+            value, i = [], i + 1
+            while text[i] != '"':
+                if text[i] == "\\":
+                    i += 1
+                value.append(text[i])
+                i += 1
+            stack[-1].append(_Quoted("".join(value)))
+            i += 1
+        else:
+            # Atoms run to a space or paren outside [...] - BODY[HEADER.FIELDS (A B)] is one atom
+            start, depth = i, 0
+            while i < len(text) and (depth or text[i] not in " ()"):
+                depth += {"[": 1, "]": -1}.get(text[i], 0)
+                i += 1
+            stack[-1].append(text[start:i])
+    return tokens
+
+
+class _Quoted(str):
+    pass
+
+
+def _in_set(value: int, sequence_set: str, largest: int) -> bool:
+    for part in sequence_set.split(","):
+        if ":" in part:
+            low, high = (largest if bound == "*" else int(bound) for bound in part.split(":"))
+            if min(low, high) <= value <= max(low, high):
+                return True
+        elif value == (largest if part == "*" else int(part)):
+            return True
+    return False
+
+
+class _Connection:
+    def __init__(self, server: MockImapServer, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.user: Optional[str] = None
+        self.selected: Optional[Folder] = None
+        self.readonly = False
+        self.idling = False
+        self._pending_exists = False
+
+    def send(self, line: str) -> None:
+        self.writer.write(line.encode() + b"\r\n")
+
+    def notify_exists(self) -> None:
+        if self.idling:
+            self.send(f"* {len(self.selected.messages)} EXISTS")
+        else:
+            self._pending_exists = True
+
+    async def _read_command(self) -> Optional[str]:
+        line = await self.reader.readline()
+        if not line:
+            return None
+        line = line.rstrip(b"\r\n")
+        # Inline literals: ... {N} / {N+}
+        while True:
+            match = re.search(rb"\{(\d+)(\+?)\}$", line)
+            if not match:
+                break
+            if not match.group(2):
+                self.send("+ Ready for literal")
+                await self.writer.drain()
+            literal = await self.reader.readexactly(int(match.group(1)))
+            rest = (await self.reader.readline()).rstrip(b"\r\n")
+            quoted = literal.replace(b"\\", b"\\\\").replace(b'"', b'\\"')
+            line = line[:match.start()] + b'"' + quoted + b'"' + rest
+        return line.decode(errors="replace")
+
+    async def run(self) -> None:
+        self.send("* OK Mock IMAP ready")
+        await self.writer.drain()
+        while True:
+            line = await self._read_command()
+            if line is None:
+                return
+            tag, _, rest = line.partition(" ")
+            command, _, args = rest.partition(" ")
+            command = command.upper()
+            if command == "UID":
+                command, _, args = args.partition(" ")
+                command, uid_mode = command.upper(), True
+            else:
+                uid_mode = False
+
+            handler = getattr(self, f"cmd_{command.lower()}", None)
+            if self.server.response_delay:
+                await asyncio.sleep(self.server.response_delay)
+            try:
+                if handler is None:
+                    raise _CommandError("BAD", f"Unknown command {command}")
+                result = await handler(tag, _tokenize(args), uid_mode)
+            except _CommandError as e:
+                self.send(f"{tag} {e.status} {e}")
+            except Exception as e:
+                logger.exception("Mock IMAP command failed")
+                self.send(f"{tag} BAD {command} failed: {e}")
+            else:
+                if self._pending_exists and self.selected is not None:
+                    self._pending_exists = False
+                    self.send(f"* {len(self.selected.messages)} EXISTS")
+                if result is False:
+                    await self.writer.drain()
+                    return
+                self.send(f"{tag} OK {result or command + ' completed'}")
+            await self.writer.drain()
+
+    def _require_selected(self) -> Folder:
+        if self.selected is None:
+            raise _CommandError("BAD", "No mailbox selected")
+        return self.selected
+
+    async def cmd_capability(self, tag, args, uid_mode):
+        self.send(f"* CAPABILITY {CAPABILITIES}")
+
+    async def cmd_noop(self, tag, args, uid_mode):
+        pass
+
+    async def cmd_check(self, tag, args, uid_mode):
+        pass
+
+    async def cmd_close(self, tag, args, uid_mode):
+        self._require_selected()
+        self.selected = None
+
+    async def cmd_login(self, tag, args, uid_mode):
+        if len(args) < 2 or not args[1]:
+            raise _CommandError("NO", "[AUTHENTICATIONFAILED] Invalid credentials")
+        self.user = str(args[0]).lower()
+        self.server.folder(self.user)
+        return "LOGIN completed"
+
+    async def cmd_logout(self, tag, args, uid_mode):
+        self.send("* BYE Mock IMAP logging out")
+        self.send(f"{tag} OK LOGOUT completed")
+        return False
+
+    async def cmd_select(self, tag, args, uid_mode, readonly=False):
+        if self.user is None:
+            raise _CommandError("BAD", "Not authenticated")
+        folder = self.server.folder(self.user, str(args[0]))
+        self.selected, self.readonly = folder, readonly
+        self.send("* FLAGS (\\Answered \\Flagged \\Deleted \\Seen \\Draft)")
+        self.send(f"* {len(folder.messages)} EXISTS")
+        self.send("* 0 RECENT")
+        self.send(f"* OK [UIDVALIDITY {UIDVALIDITY}] UIDs valid")
+        self.send(f"* OK [UIDNEXT {folder.uid_next}] Predicted next UID")
+        return f"[{'READ-ONLY' if readonly else 'READ-WRITE'}] SELECT completed"
+
+    async def cmd_examine(self, tag, args, uid_mode):
+        return await self.cmd_select(tag, args, uid_mode, readonly=True)
+
+    async def cmd_status(self, tag, args, uid_mode):
+        name = str(args[0])
+        folder = self.server.folder(self.user, name)
+        values = {
+            "MESSAGES": len(folder.messages),
+            "RECENT": 0,
+            "UIDNEXT": folder.uid_next,
+            "UIDVALIDITY": UIDVALIDITY,
+            "UNSEEN": sum(1 for m in folder.messages if "\\Seen" not in m.flags),
+        }
+        items = " ".join(f"{item} {values[item.upper()]}" for item in args[1] if item.upper() in values)
+        self.send(f'* STATUS "{name}" ({items})')
+
+    async def cmd_idle(self, tag, args, uid_mode):
+        self._require_selected()
+        self.idling = True
+        self.send("+ idling")
+        await self.writer.drain()
+        try:
+            line = await self.reader.readline()
+        finally:
+            self.idling = False
+        if not line:
+            return False
+        return "IDLE terminated"
+
+    async def cmd_search(self, tag, args, uid_mode):
+        folder = self._require_selected()
+        if args and str(args[0]).upper() == "CHARSET":
+            args = args[2:]
+        largest_uid = folder.messages[-1].uid if folder.messages else 0
+        hits = []
+        for number, message in enumerate(folder.messages, start=1):
+            if self._matches(message, number, args, len(folder.messages), largest_uid):
+                hits.append(message.uid if uid_mode else number)
+        self.send("* SEARCH" + "".join(f" {hit}" for hit in hits))
+
+    def _matches(self, message: StoredMessage, number: int, keys: list, count: int, largest_uid: int) -> bool:
+        keys = list(keys)
+        while keys:
+            key = keys.pop(0)
+            if isinstance(key, list):
+                if not self._matches(message, number, key, count, largest_uid):
+                    return False
+                continue
+            name = key.upper()
+            if name == "ALL":
+                continue
+            elif name == "NOT":
+                if self._matches(message, number, [keys.pop(0)], count, largest_uid):
+                    return False
+            elif name == "UID":
+                if not _in_set(message.uid, keys.pop(0), largest_uid):
+                    return False
+            elif name in ("SUBJECT", "FROM", "TO", "CC", "BCC"):
+                if keys.pop(0).lower() not in message.header(name).lower():
+                    return False
+            elif name == "HEADER":
+                field, value = keys.pop(0), keys.pop(0)
+                if value.lower() not in message.header(field).lower():
+                    return False
+            elif name in ("SINCE", "BEFORE", "ON"):
+                day = time.strptime(keys.pop(0), "%d-%b-%Y")[:3]
+                received = time.localtime(message.internal_date)[:3]
+                if {"SINCE": received < day, "BEFORE": received >= day, "ON": received != day}[name]:
+                    return False
+            elif name == "SEEN":
+                if "\\Seen" not in message.flags:
+                    return False
+            elif name == "UNSEEN":
+                if "\\Seen" in message.flags:
+                    return False
+            elif re.fullmatch(r"[\d*:,]+", key):
+                if not _in_set(number, key, count):
+                    return False
+            else:
+                raise _CommandError("BAD", f"Unsupported search key {key}")
+        return True
+
+    def _messages(self, folder: Folder, sequence_set: str, uid_mode: bool) -> List[StoredMessage]:
+        largest = (folder.messages[-1].uid if folder.messages else 0) if uid_mode else len(folder.messages)
+        return [
+            message for number, message in enumerate(folder.messages, start=1)
+            if _in_set(message.uid if uid_mode else number, sequence_set, largest)
+        ]
+
+    def _target(self, name: str) -> Folder:
+        if not self.server.has_folder(self.user, name):
+            raise _CommandError("NO", "[TRYCREATE] No such mailbox")
+        return self.server.folder(self.user, name)
+
+    async def cmd_create(self, tag, args, uid_mode):
+        if self.user is None:
+            raise _CommandError("BAD", "Not authenticated")
+        if self.server.has_folder(self.user, str(args[0])):
+            raise _CommandError("NO", "[ALREADYEXISTS] Mailbox exists")
+        self.server.folder(self.user, str(args[0]))
+
+    async def cmd_copy(self, tag, args, uid_mode, move=False):
+        folder = self._require_selected()
+        target = self._target(str(args[1]))
+        messages = self._messages(folder, args[0], uid_mode)
+        for message in messages:
+            copy = target.append(message.raw, message.internal_date)
+            copy.flags = set(message.flags)
+        if move:
+            for number in folder.remove(messages):
+                self.send(f"* {number} EXPUNGE")
+
+    async def cmd_move(self, tag, args, uid_mode):
+        await self.cmd_copy(tag, args, uid_mode, move=True)
+
+    async def cmd_store(self, tag, args, uid_mode):
+        folder = self._require_selected()
+        operation = str(args[1]).upper()
+        flags = set(args[2] if isinstance(args[2], list) else [args[2]])
+        for message in self._messages(folder, args[0], uid_mode):
+            if operation.startswith("+"):
+                message.flags |= flags
+            elif operation.startswith("-"):
+                message.flags -= flags
+            else:
+                message.flags = set(flags)
+            if not operation.endswith(".SILENT"):
+                number = folder.messages.index(message) + 1
+                self.send(f"* {number} FETCH (UID {message.uid} FLAGS ({' '.join(sorted(message.flags))}))")
+
+    async def cmd_expunge(self, tag, args, uid_mode):
+        folder = self._require_selected()
+        candidates = self._messages(folder, args[0], uid_mode) if uid_mode else folder.messages
+        for number in folder.remove([message for message in candidates if "\\Deleted" in message.flags]):
+            self.send(f"* {number} EXPUNGE")
+
+    async def cmd_fetch(self, tag, args, uid_mode):
+        folder = self._require_selected()
+        sequence_set, items = args[0], args[1] if isinstance(args[1], list) else [args[1]]
+        largest = (folder.messages[-1].uid if folder.messages else 0) if uid_mode else len(folder.messages)
+        for number, message in enumerate(folder.messages, start=1):
+            if not _in_set(message.uid if uid_mode else number, sequence_set, largest):
+                continue
+            self._send_fetch(number, message, items, uid_mode)
+
+    def _send_fetch(self, number: int, message: StoredMessage, items: list, uid_mode: bool) -> None:
+        names = [str(item).upper() for item in items]
+        if uid_mode and "UID" not in names:
+            names.insert(0, "UID")
+        parts: List[str] = []
+        literals: List[bytes] = []
+        for name in names:
+            if name == "UID":
+                parts.append(f"UID {message.uid}")
+            elif name == "FLAGS":
+                parts.append(f"FLAGS ({' '.join(sorted(message.flags))})")
+            elif name == "RFC822.SIZE":
+                parts.append(f"RFC822.SIZE {len(message.raw)}")
+            elif name == "INTERNALDATE":
+                parts.append(f'INTERNALDATE "{time.strftime("%d-%b-%Y %H:%M:%S +0000", time.gmtime(message.internal_date))}"')
+            elif name in ("RFC822", "RFC822.HEADER") or name.startswith(("BODY[", "BODY.PEEK[")):
+                section = name[name.index("[") + 1:name.rindex("]")] if "[" in name else ""
+                if name == "RFC822.HEADER":
+                    section = "HEADER"
+                literals.append(self._section(message, section))
+                if not name.startswith("BODY.PEEK") and name != "RFC822.HEADER":
+                    message.flags.add("\\Seen")
+                label = name if name.startswith("RFC822") else f"BODY[{section}]"
+                parts.append(f"{label} {{{len(literals[-1])}}}")
+        # Literal sections go last so each FETCH is one "(prefix {n}" line plus data
+        literal_parts = [part for part in parts if part.endswith("}")]
+        plain_parts = [part for part in parts if not part.endswith("}")]
+        if not literal_parts:
+            self.send(f"* {number} FETCH ({' '.join(plain_parts)})")
+            return
+        prefix = " ".join(plain_parts)
+        for index, (part, data) in enumerate(zip(literal_parts, literals)):
+            lead = f"* {number} FETCH ({prefix} " if index == 0 else " "
+            self.writer.write(f"{lead}{part}".encode() + b"\r\n" + data)
+        self.writer.write(b")\r\n")
+
+    @staticmethod
+    def _section(message: StoredMessage, section: str) -> bytes:
+        section = section.upper()
+        if section == "":
+            return message.raw
+        if section == "HEADER":
+            return message.header_bytes
+        if section == "TEXT":
+            return message.raw[len(message.header_bytes):]
+        match = re.fullmatch(r"HEADER\.FIELDS(\.NOT)? \((.*)\)", section)
+        if match:
+            wanted = {field.lower() for field in match.group(2).split()}
+            lines = []
+            for name, value in message.parsed.items():
+                if (name.lower() in wanted) != bool(match.group(1)):
+                    lines.append(f"{name}: {value}")
+            return ("\r\n".join(lines) + "\r\n\r\n").encode()
+        raise _CommandError("BAD", f"Unsupported FETCH section {section}")
+
+
+class _CommandError(Exception):
+    def __init__(self, status: str, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def build_message(sender: str, recipient: str, subject: str, html: str, sent_at: Optional[float] = None) -> bytes:
+    """An RFC 822 HTML email as the mock delivers it"""
+    return (
+        f"From: {sender}\r\n"
+        f"To: {recipient}\r\n"
+        f"Delivered-To: {recipient}\r\n"
+        f"Subject: {subject}\r\n"
+        f"Date: {email.utils.formatdate(sent_at or time.time())}\r\n"
+        f"Message-ID: {email.utils.make_msgid(domain='mock.local')}\r\n"
+        "MIME-Version: 1.0\r\n"
+        "Content-Type: text/html; charset=utf-8\r\n"
+        "\r\n"
+        f"{html}\r\n"
+    ).encode()
+
+
+async def _serve_forever(port: int) -> None:
+    await MockImapServer(port=port).serve()
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_serve_forever(int(sys.argv[1]) if len(sys.argv) > 1 else 1143))
@@ -0,0 +1,63 @@
+"""
+Event loop lag monitor
+A task that sleeps for a short interval over and over and records how late
+it wakes up. Anything that blocks the loop (synchronous IMAP, file or
+socket I/O, CPU work) shows up as lag about as long as the blocking call,
+so checks can assert the loop stayed responsive while a reset ran.
+"""
+
+import asyncio
+import statistics
+import time
+from typing import List, Optional
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+        self._sleeping_since: Optional[float] = None
+
+    async def __aenter__(self) -> "LoopLagMonitor":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    def start(self) -> None:
+        self.samples = []
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # A block that just ended hasn't been sampled yet - the sleep is still overdue
+            if self._sleeping_since is not None:
+                self.samples.append(max(time.perf_counter() - self._sleeping_since - self.interval, 0.0))
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._sleeping_since = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(time.perf_counter() - self._sleeping_since - self.interval, 0.0))
+            self._sleeping_since = None
+
+    @property
+    def max_ms(self) -> float:
+        return max(self.samples, default=0.0) * 1000
+
+    def summary(self) -> dict:
+        ordered = sorted(self.samples)
+        return {
+            "samples": len(ordered),
+            "mean_ms": round(statistics.fmean(ordered) * 1000, 1) if ordered else 0.0,
+            "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 1) if ordered else 0.0,
+            "max_ms": round(self.max_ms, 1),
+        }
@@ -0,0 +1,151 @@
+"""
+Sample CapCut emails for the reset link extractor
+Bodies shaped like what lands in the inbox: CapCut's HTML template with
+logo, footer and app store links, plain text parts, tracking redirects,
+translated button text, entity-encoded and protocol-relative hrefs - plus
+emails that must NOT yield a link (marketing, code-only). Each sample has
+the expected link (None for none) and, where there is one, the code.
+"""
+
+from mock.capcut_server import reset_email_html
+
+TOKEN = "b2f9c1a7e4d84c0f9a3e6d2b7c5a1f08"
+RESET_URL = f"https://www.capcut.com/forget-password?token={TOKEN}&lang=en"
+
+FOOTER = """
+<table class="footer" width="100%"><tr><td style="color:#8a8a8a;font-size:12px">
+  <a href="https://www.capcut.com/help-center"><img src="https://lf16-web.capcut.com/obj/logo-gray.png" alt="CapCut"></a>
+  <p>Get the app:
+    <a href="https://apps.apple.com/app/capcut-video-editor/id1500855883">App Store</a> |
+    <a href="https://play.google.com/store/apps/details?id=com.lemon.lvoverseas">Google Play</a></p>
+  <p><a href="https://www.capcut.com/clause/privacy">Privacy Policy</a> |
+     <a href="https://www.capcut.com/clause/terms-of-service">Terms of Service</a> |
+     <a href="https://www.capcut.com/email/unsubscribe?uid=99481&amp;sig=2c9a">Unsubscribe</a></p>
+  <p>Bytedance Pte. Ltd., 1 Raffles Quay, #26-10, Singapore 048583</p>
+</td></tr></table>
+"""
+
+
+def _template(content: str) -> str:
+    """CapCut's table layout: logo header, content, footer"""
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>CapCut</title>
+<style>.btn {{ background:#000000; color:#ffffff; padding:12px 32px; }} td {{ font-family: Arial; }}</style>
+</head><body style="background:#f5f5f5">
+<table width="600" align="center" cellpadding="0" cellspacing="0">
+  <tr><td><a href="https://www.capcut.com/"><img src="https://lf16-web.capcut.com/obj/capcut-logo.png" alt="CapCut" width="120"></a></td></tr>
+  <tr><td>{content}</td></tr>
+</table>
+{FOOTER}
+</body></html>"""
+
+
+SAMPLES = [
+    {
+        "name": "mock server email",
+        "body": reset_email_html(f"http://127.0.0.1:5055/forget-password?token={TOKEN}"),
+        "link": f"http://127.0.0.1:5055/forget-password?token={TOKEN}",
+    },
+    {
+        "name": "html template, button",
+        "body": _template(f"""
+            <h2>Reset your password</h2>
+            <p>Hi there, we received a request to reset the password for your CapCut account (bo***@gmail.com).</p>
+            <table><tr><td class="btn-cell"><a class="btn" href="{RESET_URL.replace('&', '&amp;')}" target="_blank">Reset password</a></td></tr></table>
+            <p>This link expires in 24 hours. If you didn't request a password reset, you can ignore this email.</p>"""),
+        "link": RESET_URL,
+    },
+    {
+        "name": "html template, link repeated as text",
+        "body": _template(f"""
+            <p>Click the button below to reset your password.</p>
+            <a class="button" href="{RESET_URL.replace('&', '&amp;')}"><span><b>Reset password</b></span></a>
+            <p>Or paste this link into your browser:<br>{RESET_URL.replace('&', '&amp;')}</p>"""),
+        "link": RESET_URL,
+    },
+    {
+        "name": "plain text part",
+        "body": (
+            "Hi,\n\nWe received a request to reset the password of your CapCut account.\n"
+            f"Open this link to choose a new password: {RESET_URL}.\n\n"
+            "If you didn't request this, ignore this email.\n"
+            "Unsubscribe: https://www.capcut.com/email/unsubscribe?uid=99481\n"
+        ),
+        "link": RESET_URL,
+    },
+    {
+        "name": "plain text, angle brackets",
+        "body": f"Reset your CapCut password:\n<{RESET_URL}>\n\nHelp: <https://www.capcut.com/help-center>\n",
+        "link": RESET_URL,
+    },
+    {
+        "name": "tracking redirect",
+        "body": _template(
+            '<p>Reset your password</p><a class="btn" href="https://click.mail.capcut.com/ls/click?upn=1d8e'
+            '&amp;url=https%3A%2F%2Fwww.capcut.com%2Fforget-password%3Ftoken%3D' + TOKEN + '%26lang%3Den">Reset password</a>'
+        ),
+        "link": RESET_URL,
+    },
+    {
+        "name": "protocol-relative href",
+        "body": _template(f'<p>Forgot your password?</p><a href="//www.capcut.com/forget-password?token={TOKEN}">Choose a new password</a>'),
+        "link": f"https://www.capcut.com/forget-password?token={TOKEN}",
+    },
+    {
+        "name": "uppercase tags, single quotes",
+        "body": f"<HTML><BODY><P>Password reset</P><A HREF='{RESET_URL.replace('&', '&amp;')}' CLASS='BTN'>RESET PASSWORD</A></BODY></HTML>",
+        "link": RESET_URL,
+    },
+    {
+        "name": "spanish",
+        "body": _template(
+            "<p>Hemos recibido una solicitud para restablecer la contraseña de tu cuenta de CapCut.</p>"
+            f'<a class="btn" href="https://www.capcut.com/forget-password?token={TOKEN}&amp;lang=es">Restablecer contraseña</a>'
+        ),
+        "link": f"https://www.capcut.com/forget-password?token={TOKEN}&lang=es",
+    },
+    {
+        "name": "indonesian",
+        "body": _template(
+            "<p>Kami menerima permintaan untuk mengatur ulang kata sandi akun CapCut Anda.</p>"
+            f'<a href="https://www.capcut.com/forget-password?token={TOKEN}&amp;lang=id-ID">Atur ulang kata sandi</a>'
+        ),
+        "link": f"https://www.capcut.com/forget-password?token={TOKEN}&lang=id-ID",
+    },
+    {
+        "name": "percent-encoded token",
+        "body": _template('<a class="btn" href="https://www.capcut.com/forget-password?token=Ab%2Bcd%2F9%3D%3D">Reset password</a>'),
+        "link": "https://www.capcut.com/forget-password?token=Ab%2Bcd%2F9%3D%3D",
+    },
+    {
+        "name": "regional host",
+        "body": _template(f'<p>Reset password</p><a href="https://www.capcut.cn/forget-password?ticket={TOKEN}">Reset</a>'),
+        "link": f"https://www.capcut.cn/forget-password?ticket={TOKEN}",
+    },
+    {
+        "name": "code only",
+        "body": _template(
+            "<p>Your CapCut verification code is:</p><p style=\"font-size:28px;letter-spacing:6px\"><b>482913</b></p>"
+            "<p>The code expires in 10 minutes.</p>"
+        ),
+        "link": None,
+        "code": "482913",
+    },
+    {
+        "name": "marketing email",
+        "body": _template(
+            "<h2>New templates this week</h2>"
+            '<a href="https://www.capcut.com/templates?utm_source=email&amp;utm_campaign=weekly">Browse templates</a>'
+            '<a href="https://www.capcut.com/tools/ai-video-editor">Try the AI editor</a>'
+        ),
+        "link": None,
+    },
+    {
+        "name": "password changed notice",
+        "body": _template(
+            "<p>The password of your CapCut account was changed on 14 Oct 2026.</p>"
+            "<p>If this wasn't you, <a href=\"https://www.capcut.com/help-center/account-security\">contact support</a>.</p>"
+        ),
+        "link": None,
+    },
+]
@@ -1,87 +1,117 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+import asyncio
 import logging
 import os
-import traceback
 import sys
 
-# Add parent directory to path to import bot.py
+# Add parent directory to path to import bot.py and services
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Import the WORKING bot class from bot.py (not the broken services/capcut_bot.py)
-from bot import CapCutPasswordResetBot
+from services.reset_jobs import reset_jobs
+from services.accounts import CapCutAccount, accounts
+from services.flow_timing import flow_metrics
+from services.browser_pool import browser_pool
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 class ResetPasswordRequest(BaseModel):
-    email: str = None  # Will use CAPCUT_EMAIL from env if not provided
+    account_id: str = None  # Account from the pool (GET /bot/accounts); default account if not provided
+    email: str = None  # Alternative to account_id - a CapCut email
     new_password: str = None  # Optional, generates if not provided
+    kind: str = "manual"  # session_start, session_end, manual - sets queue priority
+    callback_url: str = None  # Optional, POSTed {"job_id", "status"} when the job finishes
 
 class ResetPasswordResponse(BaseModel):
     success: bool
     new_password: str = None
     message: str
+    timings: list[dict] = []  # {"step", "start_ms", "duration_ms", "ok", "critical"} per flow step
+
+class JobAcceptedResponse(BaseModel):
+    job_id: str
+    account_id: str
+    status: str
+
+
+def _account(request: ResetPasswordRequest) -> CapCutAccount:
+    account = accounts.resolve(account_id=request.account_id, email=request.email)
+    if not account:
+        raise HTTPException(status_code=404, detail=f"Unknown account {request.account_id!r}")
+    if not account.email:
+        raise HTTPException(status_code=500, detail="Error: CAPCUT_EMAIL environment variable not set")
+    return account
+
+
+@router.get("/accounts")
+async def list_accounts():
+    """CapCut accounts the bot can rotate (ids for account_id)"""
+    return [account.to_dict() for account in accounts.all()]
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Per-step duration percentiles (ms) over recent reset flows"""
+    return flow_metrics.summary()
+
+
+@router.get("/memory")
+async def get_memory():
+    """RSS of each warm browser's process tree, the bot and the container (MB), and recycle counts"""
+    return browser_pool.memory_stats()
+
+
+@router.post("/jobs", response_model=JobAcceptedResponse, status_code=202)
+async def submit_reset_job(request: ResetPasswordRequest):
+    """
+    Queue a CapCut password reset and return immediately
+
+    Session-start rotations run ahead of end-of-session rotations.
+    Poll GET /bot/jobs/{job_id} (or pass callback_url) for the result.
+    """
+    job = reset_jobs.submit(_account(request), kind=request.kind, callback_url=request.callback_url)
+    return JobAcceptedResponse(job_id=job.id, account_id=job.account.id, status=job.status)
+
+
+@router.get("/jobs/{job_id}")
+async def get_reset_job(job_id: str):
+    """Get status (and new password once succeeded) of a queued reset"""
+    job = reset_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
 
 @router.post("/reset-password", response_model=ResetPasswordResponse)
 async def reset_password(request: ResetPasswordRequest):
     """
     Reset CapCut password using forgot password flow
-    
+
     Called by backend scheduler when:
     - Session starts (needs initial password)
     - Session ends (needs new password for next user)
-    
-    Returns: {"success": true, "new_password": "..."}
+
+    Synchronous variant of POST /bot/jobs - runs through the same queue
+    and holds the request open until the job finishes. Concurrent calls for
+    the same account share one rotation and get the same new password.
+
+    Returns: {"success": true, "new_password": "...", "timings": [{"step": "imap_wait", "duration_ms": ...}, ...]}
+    (a failed job's timings, with the failing step, are on GET /bot/jobs/{job_id})
     """
-    try:
-        # Get credentials from environment
-        capcut_email = request.email or os.getenv('CAPCUT_EMAIL')
-        gmail_email = os.getenv('GMAIL_EMAIL')
-        gmail_app_password = os.getenv('GMAIL_APP_PASSWORD')
-        
-        if not capcut_email:
-            raise ValueError("CAPCUT_EMAIL environment variable not set")
-        if not gmail_email:
-            raise ValueError("GMAIL_EMAIL environment variable not set")
-        if not gmail_app_password:
-            raise ValueError("GMAIL_APP_PASSWORD environment variable not set")
-        
-        logger.info(f"Starting password reset for {capcut_email}")
-        
-        # Use the WORKING CapCutPasswordResetBot class from bot.py
-        # This has cookies handling, robust selectors, and anti-detection
-        bot = CapCutPasswordResetBot(
-            capcut_email=capcut_email,
-            gmail_email=gmail_email,
-            gmail_app_password=gmail_app_password,
-            headless=True  # Run headless in production
+    job = reset_jobs.submit(_account(request), kind=request.kind, callback_url=request.callback_url)
+    # Shield so a dropped client connection doesn't cancel the shared job future
+    await asyncio.shield(job.done)
+
+    if job.status == "succeeded":
+        return ResetPasswordResponse(
+            success=True,
+            new_password=job.new_password,
+            message=job.message,
+            timings=job.timings
         )
-        
-        # Run the complete 14-step flow
-        success, new_password = await bot.run_complete_flow()
-        
-        if success and new_password:
-            logger.info(f"Password reset successful for {capcut_email}")
-            return ResetPasswordResponse(
-                success=True,
-                new_password=new_password,
-                message="Password reset successfully"
-            )
-        else:
-            logger.error(f"Password reset failed for {capcut_email}")
-            raise HTTPException(
-                status_code=500,
-                detail="Password reset failed - bot did not succeed"
-            )
-            
-    except HTTPException:
-        raise
-    except Exception as e:
-        error_msg = f"Error: {str(e)}"
-        logger.error(f"Error in reset_password: {error_msg}")
-        logger.error(f"Full traceback: {traceback.format_exc()}")
-        raise HTTPException(
-            status_code=500,
-            detail=error_msg
-        )
\ No newline at end of file
+
+    raise HTTPException(
+        status_code=500,
+        detail=job.message
+    )
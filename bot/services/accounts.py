@@ -0,0 +1,96 @@
+"""
+CapCut accounts the bot can rotate
+Each account is a CapCut login plus the Gmail inbox that receives its reset
+emails (often a +alias of one shared inbox, so the recipient address tells
+the emails apart). Configured through CAPCUT_ACCOUNTS as a JSON list:
+
+    [{"id": "cc1", "email": "shop+cc1@gmail.com"},
+     {"id": "cc2", "email": "other@example.com", "reset_recipient": "shop+cc2@gmail.com",
+      "gmail_email": "shop@gmail.com", "gmail_app_password": "..."}]
+
+Without it the single CAPCUT_EMAIL / GMAIL_EMAIL account is used, with id "default".
+"""
+
+import json
+import logging
+from typing import Dict, List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ACCOUNT_ID = "default"
+
+
+class CapCutAccount:
+    def __init__(
+        self,
+        id: str,
+        email: str,
+        reset_recipient: Optional[str] = None,
+        gmail_email: Optional[str] = None,
+        gmail_app_password: Optional[str] = None
+    ):
+        self.id = id
+        self.email = email
+        # Address the reset email is sent to - the CapCut login unless aliased
+        self.reset_recipient = (reset_recipient or email).lower()
+        self.gmail_email = gmail_email or settings.GMAIL_EMAIL
+        self.gmail_app_password = gmail_app_password or settings.GMAIL_APP_PASSWORD
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "email": self.email,
+            "reset_recipient": self.reset_recipient,
+            "gmail_email": self.gmail_email,
+        }
+
+
+class AccountRegistry:
+    def __init__(self, accounts: List[CapCutAccount]):
+        if not accounts:
+            raise ValueError("At least one CapCut account must be configured")
+        self._accounts: Dict[str, CapCutAccount] = {}
+        for account in accounts:
+            if account.id in self._accounts:
+                raise ValueError(f"Duplicate CapCut account id {account.id!r}")
+            self._accounts[account.id] = account
+
+    @classmethod
+    def from_settings(cls) -> "AccountRegistry":
+        if not settings.CAPCUT_ACCOUNTS:
+            return cls([CapCutAccount(id=DEFAULT_ACCOUNT_ID, email=settings.CAPCUT_EMAIL)])
+        try:
+            entries = json.loads(settings.CAPCUT_ACCOUNTS)
+            return cls([CapCutAccount(**entry) for entry in entries])
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid CAPCUT_ACCOUNTS: {e}")
+
+    @property
+    def default(self) -> CapCutAccount:
+        return next(iter(self._accounts.values()))
+
+    def all(self) -> List[CapCutAccount]:
+        return list(self._accounts.values())
+
+    def get(self, account_id: str) -> Optional[CapCutAccount]:
+        return self._accounts.get(account_id)
+
+    def resolve(self, account_id: Optional[str] = None, email: Optional[str] = None) -> Optional[CapCutAccount]:
+        """
+        Account for a reset request: by id, else by CapCut email (an unknown
+        email gets the default inbox), else the default account.
+        """
+        if account_id:
+            return self.get(account_id)
+        if email:
+            for account in self._accounts.values():
+                if account.email.lower() == email.strip().lower():
+                    return account
+            return CapCutAccount(id=email.strip().lower(), email=email.strip())
+        return self.default
+
+
+# Singleton instance
+accounts = AccountRegistry.from_settings()
@@ -0,0 +1,388 @@
+"""
+Warm Playwright browser pool
+Browsers are launched once (on app startup) and every reset flow gets a
+fresh, isolated incognito context, so browser launch cost stays off the
+password rotation path. The engine that launched successfully on this host
+is remembered across restarts and tried first.
+
+Long-lived browsers grow (caches, leaked renderers), so after every flow
+the browser's process tree RSS is measured and a browser is recycled once
+it has served BROWSER_MAX_RUNS flows or passes BROWSER_MAX_RSS_MB - only
+when no flow is using it.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Optional, Set
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright
+
+from config import settings
+from services import process_memory
+
+logger = logging.getLogger(__name__)
+
+# Firefox is more reliable in VPS environments, Chromium is the fallback
+ENGINES = ("firefox", "chromium")
+# Set to a per-launch id in each browser's environment to find its processes
+LAUNCH_ID_ENV = "CAPCUT_BOT_BROWSER_ID"
+
+# Firefox doesn't need as many arguments and is more stable in Docker
+FIREFOX_ARGS = [
+    '--no-remote',
+    '--no-first-run',
+    '--disable-dev-tools',
+    '--disable-extensions'
+]
+
+# Chromium with maximum stability settings for VPS
+CHROMIUM_ARGS = [
+    # Core headless settings
+    '--headless=new',
+    '--virtual-time-budget=5000',
+    '--run-all-compositor-stages-before-draw',
+
+    # Disable all GPU and hardware acceleration
+    '--disable-gpu',
+    '--disable-gpu-sandbox',
+    '--disable-software-rasterizer',
+    '--disable-accelerated-2d-canvas',
+    '--disable-accelerated-video-decode',
+    '--disable-accelerated-video-encode',
+    '--disable-gpu-memory-buffer-video-frames',
+    '--disable-gpu-rasterization',
+    '--disable-features=VizDisplayCompositor,VizHitTestSurfaceLayer',
+    '--use-gl=swiftshader-webgl',
+    '--use-angle=swiftshader',
+
+    # Memory and process management
+    '--single-process',
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--memory-pressure-off',
+    '--max_old_space_size=4096',
+
+    # Disable unnecessary features
+    '--no-first-run',
+    '--disable-extensions',
+    '--disable-plugins',
+    '--disable-background-timer-throttling',
+    '--disable-renderer-backgrounding',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-background-networking',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-translate',
+    '--disable-features=TranslateUI,BlinkGenPropertyTrees',
+    '--disable-ipc-flooding-protection',
+    '--disable-hang-monitor',
+    '--disable-prompt-on-repost',
+    '--disable-domain-reliability',
+    '--disable-component-extensions-with-background-pages',
+
+    # Audio and media
+    '--mute-audio',
+    '--disable-audio-output',
+
+    # Logging and debugging (minimize noise)
+    '--disable-logging',
+    '--silent',
+    '--disable-crash-reporter',
+    '--disable-in-process-stack-traces',
+    '--log-level=3',
+
+    # Automation detection bypass
+    '--disable-blink-features=AutomationControlled',
+    '--disable-web-security',
+    '--disable-features=VizDisplayCompositor',
+    '--no-default-browser-check',
+    '--disable-login-animations',
+
+    # Additional stability flags for VPS
+    '--disable-dbus',
+    '--disable-dev-tools',
+    '--disable-infobars',
+    '--disable-notifications',
+    '--disable-popup-blocking',
+    '--disable-save-password-bubble',
+    '--disable-session-crashed-bubble',
+    '--disable-password-generation',
+    '--disable-permissions-api',
+    '--ignore-certificate-errors',
+    '--ignore-ssl-errors',
+    '--ignore-certificate-errors-spki-list'
+]
+
+
+class PooledBrowser:
+    """A warm browser, the processes it runs in and the flows it has served"""
+
+    def __init__(self, browser: Browser, engine: str, pids: Set[int]):
+        self.browser = browser
+        self.engine = engine
+        self.pids = pids  # top processes of this browser's tree
+        self.launched_at = time.time()
+        self.runs = 0
+        self.active = 0  # open contexts
+        self.rss_bytes = 0
+        self.processes = 0
+        self.retire_reason: Optional[str] = None
+
+    def measure(self) -> None:
+        self.rss_bytes, self.processes = process_memory.tree_rss(self.pids)
+
+    def to_dict(self) -> dict:
+        return {
+            "engine": self.engine,
+            "runs": self.runs,
+            "active": self.active,
+            "rss_mb": round(self.rss_bytes / 2**20, 1),
+            "processes": self.processes,
+            "age_seconds": round(time.time() - self.launched_at),
+            "retiring": self.retire_reason,
+        }
+
+
+class BrowserPool:
+    def __init__(self, size: int, engine_file: str, max_runs: int = 0, max_rss_mb: int = 0):
+        self.size = max(1, size)
+        self.engine_file = engine_file
+        self.max_runs = max_runs
+        self.max_rss_bytes = max_rss_mb * 2**20
+        self.engine: Optional[str] = None
+        self.headless = True
+        self._playwright: Optional[Playwright] = None
+        self._browsers: list[PooledBrowser] = []
+        self._next = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.recycled = 0
+
+    @property
+    def running(self) -> bool:
+        return self._playwright is not None
+
+    def _load_engine(self) -> Optional[str]:
+        try:
+            with open(self.engine_file) as f:
+                engine = json.load(f).get("engine")
+            return engine if engine in ENGINES else None
+        except (OSError, ValueError):
+            return None
+
+    def _save_engine(self, engine: str) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.engine_file) or ".", exist_ok=True)
+            with open(self.engine_file, "w") as f:
+                json.dump({"engine": engine}, f)
+        except OSError as e:
+            logger.warning(f"Could not remember browser engine in {self.engine_file}: {e}")
+
+    async def start(self, headless: bool = True) -> None:
+        """Start Playwright and pre-launch `size` browsers (called on app startup)"""
+        # Created here so it binds to the running loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self.running:
+                return
+            self.headless = headless
+            self.engine = self._load_engine()
+            self._playwright = await async_playwright().start()
+            try:
+                for _ in range(self.size):
+                    self._browsers.append(await self._launch_pooled())
+            except Exception:
+                await self._shutdown()
+                raise
+            logger.info(f"Browser pool ready: {self.size} x {self.engine}")
+
+    async def stop(self) -> None:
+        """Close all browsers and Playwright (called on app shutdown)"""
+        if self._lock is None:
+            return
+        async with self._lock:
+            await self._shutdown()
+
+    async def _shutdown(self) -> None:
+        for pooled in self._browsers:
+            try:
+                await pooled.browser.close()
+            except Exception:
+                pass
+        self._browsers = []
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _launch(self, env: Optional[dict] = None) -> Browser:
+        """Launch a browser, trying the engine that worked last time first"""
+        order = [self.engine] if self.engine else []
+        order += [engine for engine in ENGINES if engine not in order]
+
+        for engine in order:
+            try:
+                if engine == "firefox":
+                    browser = await self._playwright.firefox.launch(
+                        headless=self.headless,
+                        args=FIREFOX_ARGS if self.headless else [],
+                        env=env
+                    )
+                else:
+                    # Force headless for VPS stability
+                    browser = await self._playwright.chromium.launch(headless=True, args=CHROMIUM_ARGS, env=env)
+            except Exception as e:
+                logger.warning(f"Launching {engine} failed: {e}")
+                continue
+
+            if engine != self._load_engine():
+                self._save_engine(engine)
+            self.engine = engine
+            return browser
+
+        raise RuntimeError(f"No browser engine could be launched (tried {', '.join(order)})")
+
+    async def _launch_pooled(self) -> PooledBrowser:
+        """Launch a browser and note which processes it runs in"""
+        # Only this browser's processes inherit the id - browsers launched or
+        # spawning renderers meanwhile aren't counted as part of this one
+        launch_id = uuid.uuid4().hex
+        browser = await self._launch(env={**os.environ, LAUNCH_ID_ENV: launch_id})
+        pids = process_memory.tagged_roots(os.getpid(), LAUNCH_ID_ENV, launch_id)
+        pooled = PooledBrowser(browser, self.engine, pids)
+        pooled.measure()
+        return pooled
+
+    async def _replace(self, index: int, reason: str) -> None:
+        """Close and relaunch the browser at `index` (caller holds the lock)"""
+        old = self._browsers[index]
+        try:
+            await old.browser.close()
+        except Exception:
+            pass
+        try:
+            self._browsers[index] = await self._launch_pooled()
+        except Exception as e:
+            # Left closed - the next checkout sees it disconnected and tries again
+            logger.error(f"Relaunching pooled browser #{index} failed: {e}")
+            return
+        self.recycled += 1
+        logger.info(
+            f"Recycled pooled browser #{index} ({reason}; {old.runs} runs, "
+            f"{old.rss_bytes / 2**20:.0f} MB -> {self._browsers[index].rss_bytes / 2**20:.0f} MB)"
+        )
+
+    async def _checkout(self) -> PooledBrowser:
+        """Round-robin over pooled browsers, skipping retiring ones and relaunching any that died"""
+        if not self.running:
+            raise RuntimeError("Browser pool is not running")
+        async with self._lock:
+            count = len(self._browsers)
+            order = [(self._next + offset) % count for offset in range(count)]
+            self._next += 1
+            # Prefer a browser that isn't waiting to be recycled
+            index = next((i for i in order if not self._browsers[i].retire_reason), order[0])
+            pooled = self._browsers[index]
+            if not pooled.browser.is_connected():
+                logger.warning(f"Pooled {self.engine} browser disconnected - relaunching")
+                await self._replace(index, "disconnected")
+            elif pooled.retire_reason and not pooled.active:
+                await self._replace(index, pooled.retire_reason)
+            pooled = self._browsers[index]
+            pooled.active += 1
+            return pooled
+
+    def _checkin(self, pooled: PooledBrowser) -> None:
+        """A flow closed its context - count the run and check the browser in the background"""
+        pooled.active -= 1
+        pooled.runs += 1
+        if not self.running:
+            return
+        task = asyncio.create_task(self._after_run(pooled))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _after_run(self, pooled: PooledBrowser) -> None:
+        pooled.measure()
+        logger.info(
+            f"Pooled {pooled.engine} browser after run {pooled.runs}: "
+            f"{pooled.rss_bytes / 2**20:.0f} MB in {pooled.processes} process(es)"
+        )
+        if not pooled.retire_reason:
+            if self.max_runs and pooled.runs >= self.max_runs:
+                pooled.retire_reason = f"served {pooled.runs} runs"
+            elif self.max_rss_bytes and pooled.rss_bytes >= self.max_rss_bytes:
+                pooled.retire_reason = f"RSS {pooled.rss_bytes / 2**20:.0f} MB over {self.max_rss_bytes / 2**20:.0f} MB"
+        if not pooled.retire_reason or pooled.active:
+            # A busy browser is recycled after its last flow
+            return
+        async with self._lock:
+            if pooled in self._browsers and not pooled.active and self.running:
+                await self._replace(self._browsers.index(pooled), pooled.retire_reason)
+
+    async def new_context(self, **options) -> BrowserContext:
+        """
+        Fresh incognito context on a warm browser. The caller closes it when
+        the flow is done; the browser itself stays up for the next flow.
+        """
+        pooled = await self._checkout()
+        # Shielded so a cancelled caller (e.g. a sibling flow step failed) still
+        # gets the context that may be created anyway, and closes it
+        creating = asyncio.ensure_future(pooled.browser.new_context(**options))
+        try:
+            context = await asyncio.shield(creating)
+        except BaseException:
+            creating.add_done_callback(lambda task: self._discard_context(pooled, task))
+            raise
+        context.once("close", lambda _: self._checkin(pooled))
+        return context
+
+    def _discard_context(self, pooled: PooledBrowser, creating: asyncio.Future) -> None:
+        """The flow that asked for this context is gone - close it if it was created"""
+        if creating.cancelled() or creating.exception() is not None:
+            pooled.active -= 1
+            return
+        context = creating.result()
+        context.once("close", lambda _: self._checkin(pooled))
+        task = asyncio.ensure_future(self._close_context(context))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _close_context(self, context: BrowserContext) -> None:
+        try:
+            await context.close()
+        except Exception as e:
+            logger.warning(f"Could not close abandoned browser context: {e}")
+
+    def memory_stats(self) -> dict:
+        """RSS of each pooled browser's process tree, the bot process and the container (MB)"""
+        for pooled in self._browsers:
+            pooled.measure()
+        bot_tree_bytes, bot_tree_processes = process_memory.tree_rss([os.getpid()])
+        return {
+            "available": process_memory.available(),
+            "browsers": [pooled.to_dict() for pooled in self._browsers],
+            "browsers_rss_mb": round(sum(p.rss_bytes for p in self._browsers) / 2**20, 1),
+            "bot_rss_mb": round(process_memory.rss_bytes(os.getpid()) / 2**20, 1),
+            # The bot, the Playwright driver and every browser
+            "total_rss_mb": round(bot_tree_bytes / 2**20, 1),
+            "total_processes": bot_tree_processes,
+            "container": process_memory.container_memory(),
+            "recycled": self.recycled,
+            "max_runs": self.max_runs,
+            "max_rss_mb": round(self.max_rss_bytes / 2**20),
+        }
+
+
+# Singleton instance
+browser_pool = BrowserPool(
+    size=settings.BROWSER_POOL_SIZE,
+    engine_file=os.path.join(settings.STATE_DIR, "browser_engine.json"),
+    max_runs=settings.BROWSER_MAX_RUNS,
+    max_rss_mb=settings.BROWSER_MAX_RSS_MB
+)
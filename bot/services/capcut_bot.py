@@ -8,12 +8,17 @@ import logging
 import random
 from datetime import datetime
 from playwright.async_api import async_playwright, TimeoutError
-from .gmail_handler import get_capcut_reset_link
+from .gmail_handler import get_capcut_reset_link_async
 from .password_generator import generate_strong_password
+from .selector_resolver import selector_resolver
+from .resource_blocker import resource_blocker
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Budget for each step's selector race (all candidates are tried at once)
+STEP_TIMEOUT_MS = 15000
+
 
 async def reset_password_forgot_flow(email: str, new_password: str) -> dict:
     """
@@ -71,6 +76,8 @@ async def reset_password_forgot_flow(email: str, new_password: str) -> dict:
                 locale='en-US'
             )
             
+            # Skip images, fonts, media and trackers - networkidle then only waits on what the flow needs
+            block_stats = await resource_blocker.attach(context)
             page = await context.new_page()
             
             try:
@@ -82,7 +89,7 @@ async def reset_password_forgot_flow(email: str, new_password: str) -> dict:
                 
                 # Step 2: Navigate to CapCut login page
                 logger.info("Step 2: Navigating to CapCut login page")
-                login_url = "https://www.capcut.com/login"
+                login_url = f"{settings.CAPCUT_BASE_URL}/login"
                 await page.goto(login_url, timeout=60000, wait_until='networkidle')
                 await asyncio.sleep(5)
                 
@@ -106,16 +113,11 @@ async def reset_password_forgot_flow(email: str, new_password: str) -> dict:
                 ]
                 
                 email_input = None
-                for selector in email_selectors:
-                    try:
-                        logger.info(f"Trying selector: {selector}")
-                        email_input = await page.wait_for_selector(selector, timeout=5000)
-                        if email_input and await email_input.is_visible():
-                            logger.info(f"Found email input with selector: {selector}")
-                            break
-                        email_input = None
-                    except TimeoutError:
-                        continue
+                try:
+                    email_input, selector = await selector_resolver.resolve(page, "forgot_flow.email", email_selectors, STEP_TIMEOUT_MS)
+                    logger.info(f"Found email input with selector: {selector}")
+                except TimeoutError:
+                    pass
                 
                 if not email_input:
                     # Log page HTML for debugging
@@ -151,15 +153,11 @@ async def reset_password_forgot_flow(email: str, new_password: str) -> dict:
                 ]
                 
                 continue_btn = None
-                for selector in continue_selectors:
-                    try:
-                        continue_btn = await page.wait_for_selector(selector, timeout=5000)
-                        if continue_btn and await continue_btn.is_visible():
-                            logger.info(f"Found continue button with selector: {selector}")
-                            break
-                        continue_btn = None
-                    except TimeoutError:
-                        continue
+                try:
+                    continue_btn, selector = await selector_resolver.resolve(page, "forgot_flow.continue", continue_selectors, STEP_TIMEOUT_MS)
+                    logger.info(f"Found continue button with selector: {selector}")
+                except TimeoutError:
+                    pass
                 
                 if not continue_btn:
                     raise Exception("Could not find Continue button")
@@ -182,15 +180,11 @@ async def reset_password_forgot_flow(email: str, new_password: str) -> dict:
                 ]
                 
                 forgot_btn = None
-                for selector in forgot_password_selectors:
-                    try:
-                        forgot_btn = await page.wait_for_selector(selector, timeout=5000)
-                        if forgot_btn and await forgot_btn.is_visible():
-                            logger.info(f"Found forgot password with selector: {selector}")
-                            break
-                        forgot_btn = None
-                    except TimeoutError:
-                        continue
+                try:
+                    forgot_btn, selector = await selector_resolver.resolve(page, "forgot_flow.forgot_password", forgot_password_selectors, STEP_TIMEOUT_MS)
+                    logger.info(f"Found forgot password with selector: {selector}")
+                except TimeoutError:
+                    pass
                 
                 if not forgot_btn:
                     raise Exception("Could not find forgot password button")
@@ -209,15 +203,11 @@ async def reset_password_forgot_flow(email: str, new_password: str) -> dict:
                 ]
                 
                 confirm_btn = None
-                for selector in confirm_selectors:
-                    try:
-                        confirm_btn = await page.wait_for_selector(selector, timeout=5000)
-                        if confirm_btn and await confirm_btn.is_visible():
-                            logger.info(f"Found confirm button with selector: {selector}")
-                            break
-                        confirm_btn = None
-                    except TimeoutError:
-                        continue
+                try:
+                    confirm_btn, selector = await selector_resolver.resolve(page, "forgot_flow.confirm", confirm_selectors, STEP_TIMEOUT_MS)
+                    logger.info(f"Found confirm button with selector: {selector}")
+                except TimeoutError:
+                    pass
                 
                 if not confirm_btn:
                     raise Exception("Could not find confirm button")
@@ -227,7 +217,7 @@ async def reset_password_forgot_flow(email: str, new_password: str) -> dict:
                 
                 # Step 7: Fetch reset email from Gmail using IMAP
                 logger.info("Step 7: Fetching reset email from Gmail")
-                reset_link = get_capcut_reset_link(settings.GMAIL_EMAIL, settings.GMAIL_APP_PASSWORD)
+                reset_link = await get_capcut_reset_link_async(settings.GMAIL_EMAIL, settings.GMAIL_APP_PASSWORD)
                 
                 if not reset_link:
                     raise Exception("Could not fetch reset email or extract reset link")
@@ -289,15 +279,12 @@ async def reset_password_forgot_flow(email: str, new_password: str) -> dict:
                     'button[type="submit"]'
                 ]
                 
-                for selector in submit_selectors:
-                    try:
-                        submit_btn = await page.wait_for_selector(selector, timeout=5000)
-                        if submit_btn and await submit_btn.is_visible():
-                            await submit_btn.click()
-                            logger.info(f"Clicked submit with selector: {selector}")
-                            break
-                    except TimeoutError:
-                        continue
+                try:
+                    submit_btn, selector = await selector_resolver.resolve(page, "forgot_flow.submit", submit_selectors, STEP_TIMEOUT_MS)
+                    await submit_btn.click()
+                    logger.info(f"Clicked submit with selector: {selector}")
+                except TimeoutError:
+                    logger.warning("Could not find password reset submit button")
                 
                 await asyncio.sleep(5)
                 
@@ -306,6 +293,7 @@ async def reset_password_forgot_flow(email: str, new_password: str) -> dict:
                 
             finally:
                 await browser.close()
+                resource_blocker.record_run(block_stats)
                 
     except Exception as e:
         error_msg = f"Password reset failed: {str(e)}"
@@ -0,0 +1,110 @@
+"""
+Dependency graph of async flow steps
+Steps declare which steps they need; each starts as soon as those have
+finished, so independent work (IMAP connect, browser launch, password
+generation, preconnecting to the reset page) overlaps instead of queueing.
+The first failure cancels everything still running. After a run the
+critical path - the chain of steps that decided the end-to-end time - is
+written to the flow timer.
+
+Cleanup contract: run() only returns or raises once every cancelled step
+has finished unwinding, so a step's own finally/except blocks have run by
+then. Whatever a step hands over to its owner (the bot's browser context,
+its mail listener) is released by the owner after run(), on success,
+failure and cancellation alike.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from services.flow_timing import FlowTimer
+
+
+class FlowStep:
+    def __init__(self, name: str, func: Callable[[], Awaitable[Any]], after: Iterable[str], timed: bool):
+        self.name = name
+        self.func = func
+        self.after = tuple(after)
+        self.timed = timed
+        self.started: Optional[float] = None
+        self.ended: Optional[float] = None
+
+
+class FlowGraph:
+    def __init__(self, timer: FlowTimer):
+        self.timer = timer
+        self.steps: Dict[str, FlowStep] = {}
+        self.results: Dict[str, Any] = {}
+
+    def add(self, name: str, func: Callable[[], Awaitable[Any]], after: Iterable[str] = (), timed: bool = True) -> None:
+        """Add a step; dependencies must already be added (so the graph has no cycles)"""
+        after = tuple(after)
+        for dependency in after:
+            if dependency not in self.steps:
+                raise ValueError(f"Step {name} depends on unknown step {dependency}")
+        self.steps[name] = FlowStep(name, func, after, timed)
+
+    async def _run_step(self, step: FlowStep, tasks: Dict[str, asyncio.Task]) -> Any:
+        if step.after:
+            await asyncio.gather(*(tasks[dependency] for dependency in step.after))
+        step.started = time.perf_counter()
+        try:
+            if step.timed:
+                with self.timer.span(step.name):
+                    result = await step.func()
+            else:
+                result = await step.func()
+        except Exception:
+            step.ended = time.perf_counter()
+            raise
+        # Cancelled steps are left without an end - they did not decide the run's time
+        step.ended = time.perf_counter()
+        self.results[step.name] = result
+        return result
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every step; returns their results by name or raises the first failure"""
+        tasks: Dict[str, asyncio.Task] = {}
+        for step in self.steps.values():
+            tasks[step.name] = asyncio.ensure_future(self._run_step(step, tasks))
+        try:
+            done, _ = await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_EXCEPTION)
+            failed = [task for task in done if not task.cancelled() and task.exception() is not None]
+            if failed:
+                # Dependents re-raise their dependency's error - report the step that failed first
+                raise min(failed, key=lambda task: self.steps[_name_of(tasks, task)].ended or float("inf")).exception()
+            return self.results
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            self._record_critical_path()
+
+    def critical_path(self) -> List[str]:
+        """Walk back from the last step to finish through the dependency each step waited on longest"""
+        finished = [step for step in self.steps.values() if step.ended is not None]
+        if not finished:
+            return []
+        step = max(finished, key=lambda s: s.ended)
+        path = [step.name]
+        while True:
+            waited_on = [self.steps[name] for name in step.after if self.steps[name].ended is not None]
+            if not waited_on:
+                break
+            step = max(waited_on, key=lambda s: s.ended)
+            path.append(step.name)
+        return path[::-1]
+
+    def _record_critical_path(self) -> None:
+        path = self.critical_path()
+        if not path:
+            return
+        ended = self.steps[path[-1]].ended
+        self.timer.critical_path = path
+        self.timer.critical_path_ms = round((ended - self.timer.started) * 1000, 1)
+
+
+def _name_of(tasks: Dict[str, asyncio.Task], task: asyncio.Task) -> str:
+    return next(name for name, candidate in tasks.items() if candidate is task)
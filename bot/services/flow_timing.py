@@ -0,0 +1,126 @@
+"""
+Step-level timing of password reset flows
+Each flow records a span per step (launch, login navigation, email entry,
+forgot submit, IMAP wait, reset navigation, password entry, confirm,
+verify). Steps run concurrently where they can (services/flow_graph.py), so
+the flow also records its critical path. The spans come back with the reset
+result, and every finished flow is added to rolling per-step samples served
+as percentiles by GET /bot/metrics - to see where a rotation spends its
+time and to spot a step getting slower.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class FlowTimer:
+    """Spans of one flow, in the order the steps started"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.spans: List[dict] = []
+        # Set by FlowGraph: the steps that decided the end-to-end time
+        self.critical_path: List[str] = []
+        self.critical_path_ms: Optional[float] = None
+
+    @contextmanager
+    def span(self, step: str):
+        """Time a step; a step that raises is recorded with ok=False"""
+        start = time.perf_counter()
+        entry = {"step": step, "start_ms": round((start - self.started) * 1000, 1), "duration_ms": None, "ok": True}
+        self.spans.append(entry)
+        try:
+            yield entry
+        except BaseException:
+            entry["ok"] = False
+            raise
+        finally:
+            entry["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    def finish(self) -> None:
+        self.finished = time.perf_counter()
+
+    @property
+    def total_ms(self) -> float:
+        return round(((self.finished or time.perf_counter()) - self.started) * 1000, 1)
+
+    def to_list(self) -> List[dict]:
+        """Spans, each marked with whether it is on the critical path"""
+        return [dict(span, critical=span["step"] in self.critical_path) for span in self.spans]
+
+    def summary(self) -> str:
+        """One line for the flow log, e.g. 'launch 0.4s, imap_wait 12.3s | critical path: ...'"""
+        steps = ", ".join(
+            f"{span['step']} {span['duration_ms'] / 1000:.1f}s" + ("" if span["ok"] else " (failed)")
+            for span in self.spans if span["duration_ms"] is not None
+        )
+        if not self.critical_path:
+            return steps
+        return f"{steps} | critical path: {' -> '.join(self.critical_path)} ({self.critical_path_ms / 1000:.1f}s)"
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted samples"""
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class FlowMetrics:
+    """Rolling per-step duration samples across finished flows"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._lock = threading.Lock()
+        self._durations: Dict[str, deque] = {}
+        self._failures: Dict[str, int] = {}
+        self._flows = {"succeeded": 0, "failed": 0}
+
+    def record(self, timer: FlowTimer, success: bool) -> None:
+        with self._lock:
+            self._flows["succeeded" if success else "failed"] += 1
+            for span in timer.spans:
+                if span["duration_ms"] is None:
+                    continue
+                step = span["step"]
+                self._durations.setdefault(step, deque(maxlen=self.window)).append(span["duration_ms"])
+                if not span["ok"]:
+                    self._failures[step] = self._failures.get(step, 0) + 1
+            self._durations.setdefault("total", deque(maxlen=self.window)).append(timer.total_ms)
+            if timer.critical_path_ms is not None:
+                self._durations.setdefault("critical_path", deque(maxlen=self.window)).append(timer.critical_path_ms)
+
+    def summary(self) -> dict:
+        """Per step: sample count, failures, mean, percentiles and max (ms)"""
+        with self._lock:
+            samples = {step: sorted(durations) for step, durations in self._durations.items()}
+            failures = dict(self._failures)
+            flows = dict(self._flows)
+
+        steps = {}
+        for step, ordered in samples.items():
+            stats = {
+                "count": len(ordered),
+                "failures": failures.get(step, 0),
+                "mean_ms": round(sum(ordered) / len(ordered), 1),
+            }
+            for pct in PERCENTILES:
+                stats[f"p{pct}_ms"] = _percentile(ordered, pct)
+            stats["max_ms"] = ordered[-1]
+            steps[step] = stats
+        return {"window": self.window, "flows": flows, "steps": steps}
+
+
+# Singleton instance
+flow_metrics = FlowMetrics(window=settings.FLOW_METRICS_WINDOW)
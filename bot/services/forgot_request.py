@@ -0,0 +1,191 @@
+"""
+Ways of asking CapCut to send the password reset email
+The browser flow (login page -> continue -> forgot password -> send) only
+exists to fire one POST at CapCut's passport API. When a browser run sees
+that POST succeed it is recorded as a template (the account email replaced
+by a placeholder), and later runs replay it over a pooled HTTP client
+instead, skipping browser startup and page rendering. If the replay is
+rejected the caller falls back to the next strategy (the browser form).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional
+from urllib.parse import quote, quote_plus, urlsplit
+
+import httpx
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+EMAIL_PLACEHOLDER = "{{email}}"
+
+# How the email may appear in the recorded request. "mixed" is the passport
+# SDK's mix_mode obfuscation: every byte XOR 5, hex encoded.
+EMAIL_ENCODINGS: Dict[str, Callable[[str], str]] = {
+    "plain": lambda email: email,
+    "url": lambda email: quote(email, safe=""),
+    "form": lambda email: quote_plus(email),
+    "mixed": lambda email: "".join(f"{byte ^ 5:02x}" for byte in email.encode()),
+}
+
+# Recorded headers that must not be replayed verbatim
+SKIPPED_HEADERS = {"cookie", "content-length", "host", "connection", "accept-encoding"}
+
+
+def reset_response_succeeded(body) -> bool:
+    """CapCut passport APIs answer {"message": "success", ...} or carry an error_code"""
+    if not isinstance(body, dict):
+        return True
+    data = body.get("data") if isinstance(body.get("data"), dict) else {}
+    if body.get("error_code") or data.get("error_code"):
+        return False
+    message = str(body.get("message", "success")).lower()
+    return message not in ("error", "fail", "failed")
+
+
+class ForgotRequestStrategy(ABC):
+    """Asks CapCut to email a password reset link for an account"""
+
+    name = "base"
+
+    @abstractmethod
+    async def request_reset(self, email: str) -> bool:
+        """True once CapCut accepted the request; False (or raise) to try the next strategy"""
+
+
+class _SharedTransport(httpx.AsyncBaseTransport):
+    """Per-flow client view of the pooled transport - closing the client keeps the pool"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class HttpReplayStrategy(ForgotRequestStrategy):
+    """Replays the forgot password POST a browser run recorded"""
+
+    name = "http"
+
+    def __init__(self, template_file: str, enabled: bool, timeout: float):
+        self.template_file = template_file
+        self.enabled = enabled
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._transport: Optional[httpx.AsyncHTTPTransport] = None
+
+    def load_template(self) -> Optional[dict]:
+        try:
+            with open(self.template_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def record(self, email: str, method: str, url: str, headers: dict, body: Optional[str], referer: str) -> bool:
+        """
+        Save a successful forgot password request as a replay template.
+        Returns False if the account email can't be found in it (nothing to substitute).
+        """
+        for encoding, encode in EMAIL_ENCODINGS.items():
+            value = encode(email)
+            if value in url or (body and value in body):
+                break
+        else:
+            logger.warning("Forgot password request doesn't contain the account email - not recording it")
+            return False
+
+        template = {
+            "method": method,
+            "url": url.replace(value, EMAIL_PLACEHOLDER),
+            "body": body.replace(value, EMAIL_PLACEHOLDER) if body else None,
+            "email_encoding": encoding,
+            "referer": referer,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in SKIPPED_HEADERS and not k.startswith(":")},
+            "recorded_at": time.time(),
+        }
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.template_file) or ".", exist_ok=True)
+                tmp_file = f"{self.template_file}.tmp"
+                with open(tmp_file, "w") as f:
+                    json.dump(template, f, indent=2)
+                os.replace(tmp_file, self.template_file)
+            except OSError as e:
+                logger.warning(f"Could not save forgot password template to {self.template_file}: {e}")
+                return False
+        logger.info(f"Recorded forgot password request template ({method} {urlsplit(url).path}, email {encoding})")
+        return True
+
+    def _client(self, template: dict) -> httpx.AsyncClient:
+        if self._transport is None:
+            self._transport = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+                retries=1
+            )
+        # Own cookie jar per flow, shared keep-alive connections
+        return httpx.AsyncClient(
+            transport=_SharedTransport(self._transport),
+            headers=template.get("headers") or {},
+            timeout=self.timeout,
+            follow_redirects=True
+        )
+
+    async def request_reset(self, email: str) -> bool:
+        if not self.enabled:
+            return False
+        template = self.load_template()
+        if not template:
+            logger.info("No recorded forgot password request yet - using the browser")
+            return False
+
+        value = EMAIL_ENCODINGS[template.get("email_encoding", "plain")](email)
+        url = template["url"].replace(EMAIL_PLACEHOLDER, value)
+        body = template["body"].replace(EMAIL_PLACEHOLDER, value) if template.get("body") else None
+
+        started = time.monotonic()
+        async with self._client(template) as client:
+            # Fresh first-party cookies (ttwid, region...) exactly like the login page would set
+            referer = template.get("referer")
+            if referer:
+                await client.get(referer, headers={"Accept": "text/html,application/xhtml+xml"})
+
+            response = await client.request(template["method"], url, content=body)
+
+        if response.status_code >= 400:
+            logger.warning(f"Replayed forgot password request failed with HTTP {response.status_code}")
+            return False
+        try:
+            payload = response.json()
+        except ValueError:
+            logger.warning("Replayed forgot password request answered with non-JSON - not trusting it")
+            return False
+        if not reset_response_succeeded(payload):
+            logger.warning(f"CapCut rejected the replayed forgot password request: {payload}")
+            return False
+
+        logger.info(f"Forgot password request sent over HTTP in {(time.monotonic() - started) * 1000:.0f}ms")
+        return True
+
+    async def close(self) -> None:
+        """Close pooled connections (called on app shutdown)"""
+        if self._transport is not None:
+            await self._transport.aclose()
+            self._transport = None
+
+
+# Singleton instance
+http_forgot_request = HttpReplayStrategy(
+    template_file=os.path.join(settings.STATE_DIR, "forgot_request.json"),
+    enabled=settings.HTTP_FAST_PATH,
+    timeout=settings.HTTP_FAST_PATH_TIMEOUT
+)
@@ -0,0 +1,278 @@
+"""
+Persistent IMAP IDLE listener for CapCut reset emails
+One authenticated connection per Gmail inbox, owned by the bot app, sits in
+IDLE on a dedicated thread. New CapCut reset emails are pushed to waiting
+flows through futures keyed by the time each flow requested its reset, instead
+of every flow logging in and searching the inbox every 2 seconds. When several
+accounts share an inbox (+aliases), emails go to the flow whose account they
+were addressed to. Each wake-up reads only the headers of mail above the
+last seen UID (services/mail_scanner.py), and handled reset emails are moved
+out of INBOX.
+"""
+
+import asyncio
+import logging
+import socket
+import threading
+import time
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from imap_tools import MailBox, MailBoxUnencrypted
+
+from config import settings
+from services.mail_scanner import INITIAL_LOOKBACK, fetch_new_reset_emails, inbox_status, move_out_of_inbox
+from services.reset_link import extract_reset_link
+
+logger = logging.getLogger(__name__)
+
+# Accept emails dated this long before the request (mail server clock skew)
+CLOCK_SKEW_SECONDS = 30
+# Re-issue IDLE this often - also bounds how long stop() can take
+IDLE_TIMEOUT_SECONDS = 60
+# Emails nobody was waiting for yet are kept this long for late waiters
+UNCLAIMED_TTL_SECONDS = 600
+RECONNECT_MAX_SECONDS = 60
+# How long stop() waits for a fetch or move in progress to finish
+STOP_TIMEOUT_SECONDS = 30
+
+
+class ResetMailListener:
+    def __init__(self, host: str, port: int, ssl: bool = True):
+        self.host = host
+        self.port = port
+        self.ssl = ssl
+        self.email: Optional[str] = None
+        self.app_password: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._ready = threading.Event()
+        # Resolved from the listener thread once connected - start() awaits it without holding a thread
+        self._ready_future: Optional[Tuple[asyncio.Future, asyncio.AbstractEventLoop]] = None
+        self._mailbox: Optional[MailBox] = None
+        # True only while the thread sits in IDLE - the one state stop() may cut short
+        self._idling = False
+        self._lock = threading.Lock()
+        self._last_uid = 0
+        self._uidvalidity = 0
+        # requested_at -> (future, loop, recipient) of flows waiting for a reset link
+        self._waiters: Dict[float, Tuple[asyncio.Future, asyncio.AbstractEventLoop, Optional[str]]] = {}
+        # (email timestamp, reset link, recipients) not yet handed to a flow
+        self._unclaimed: List[Tuple[float, str, FrozenSet[str]]] = []
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    async def start(self, email: str, app_password: str) -> None:
+        """Connect and start IDLE on the listener thread (called on app startup)"""
+        if self.running:
+            return
+        self.email = email
+        self.app_password = app_password
+        # Fresh stop flag per thread - a previous thread may still be leaving IDLE
+        self._stopping = threading.Event()
+        self._ready.clear()
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        self._ready_future = (ready, loop)
+        self._thread = threading.Thread(target=self._run, args=(self._stopping,), name="imap-idle", daemon=True)
+        self._thread.start()
+        # Wait until the inbox baseline is taken so no email sent after this is missed
+        try:
+            await asyncio.wait_for(ready, timeout=30)
+        except asyncio.TimeoutError:
+            logger.warning("IMAP listener still connecting - continuing")
+
+    async def stop(self) -> None:
+        """
+        Stop the listener thread (called on app shutdown). IDLE is broken off
+        at once; a fetch or move in progress finishes first, so a handled email
+        still leaves INBOX. Returns once the thread has exited.
+        """
+        self._stopping.set()
+        with self._lock:
+            waiters, self._waiters = self._waiters, {}
+            # Break out of IDLE now instead of after up to IDLE_TIMEOUT_SECONDS
+            if self._idling and self._mailbox is not None:
+                try:
+                    self._mailbox.client.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        for future, loop, _ in waiters.values():
+            loop.call_soon_threadsafe(_cancel_future, future)
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            await asyncio.get_running_loop().run_in_executor(None, thread.join, STOP_TIMEOUT_SECONDS)
+            if thread.is_alive():
+                logger.warning(f"IMAP listener thread still running {STOP_TIMEOUT_SECONDS}s after stop")
+
+    async def wait_for_link(self, requested_at: float, timeout: float, recipient: Optional[str] = None) -> str:
+        """
+        Wait for the reset link from an email sent after `requested_at`
+        (time.time() when the forgot password form was submitted), addressed
+        to `recipient` if given.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        recipient = recipient.lower() if recipient else None
+
+        with self._lock:
+            link = self._claim_unclaimed(requested_at, recipient)
+            if link is None:
+                # Keys must be unique - nudge identical request times apart
+                while requested_at in self._waiters:
+                    requested_at += 1e-6
+                self._waiters[requested_at] = (future, loop, recipient)
+
+        if link is not None:
+            return link
+
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            raise Exception(f"Could not find password reset link in email after {timeout} seconds")
+        finally:
+            with self._lock:
+                self._waiters.pop(requested_at, None)
+
+    def reset_requested(self, recipient: Optional[str] = None) -> None:
+        """
+        A new reset email was just requested for `recipient`. CapCut invalidates
+        the links it sent before, so unclaimed ones (e.g. from a failed earlier
+        attempt) are dropped rather than handed to the new flow.
+        """
+        recipient = recipient.lower() if recipient else None
+        with self._lock:
+            self._unclaimed = [entry for entry in self._unclaimed if not _addressed_to(entry[2], recipient)]
+
+    def _claim_unclaimed(self, requested_at: float, recipient: Optional[str]) -> Optional[str]:
+        cutoff = time.time() - UNCLAIMED_TTL_SECONDS
+        self._unclaimed = [entry for entry in self._unclaimed if entry[0] >= cutoff]
+        matches = [
+            index for index, (sent_at, _, recipients) in enumerate(self._unclaimed)
+            if sent_at >= requested_at - CLOCK_SKEW_SECONDS and _addressed_to(recipients, recipient)
+        ]
+        if not matches:
+            return None
+        # The newest link is the only one still valid
+        newest = max(matches, key=lambda index: self._unclaimed[index][0])
+        return self._unclaimed.pop(newest)[1]
+
+    def _deliver(self, sent_at: float, link: str, recipients: FrozenSet[str]) -> None:
+        """Hand a link to the earliest waiting flow it could belong to (listener thread)"""
+        with self._lock:
+            for requested_at in sorted(self._waiters):
+                future, loop, recipient = self._waiters[requested_at]
+                if sent_at < requested_at - CLOCK_SKEW_SECONDS or not _addressed_to(recipients, recipient):
+                    continue
+                del self._waiters[requested_at]
+                if future.done():
+                    continue
+                loop.call_soon_threadsafe(_resolve_future, future, link)
+                logger.info(f"Delivered reset link for {recipient or 'any recipient'} to flow waiting since {requested_at:.0f}")
+                return
+            self._unclaimed.append((sent_at, link, recipients))
+
+    def _run(self, stopping: threading.Event) -> None:
+        delay = 1
+        while not stopping.is_set():
+            try:
+                mailbox_class = MailBox if self.ssl else MailBoxUnencrypted
+                with mailbox_class(self.host, self.port).login(self.email, self.app_password, initial_folder='INBOX') as mailbox:
+                    uidvalidity, uid_next = inbox_status(mailbox.client)
+                    if uidvalidity != self._uidvalidity:
+                        # First connect, or INBOX was renumbered - UIDs from before mean nothing now
+                        self._last_uid = uid_next - 1
+                        if self._uidvalidity:
+                            # A reset email may have landed while we were away - look back like mail_scanner does
+                            self._last_uid = max(self._last_uid - INITIAL_LOOKBACK, 0)
+                            logger.warning(f"UIDVALIDITY of {self.email} changed - rescanning from UID {self._last_uid + 1}")
+                        self._uidvalidity = uidvalidity
+                    logger.info(f"IMAP listener connected to {self.host} (watching UIDs > {self._last_uid})")
+                    with self._lock:
+                        self._mailbox = mailbox
+                    self._set_ready()
+                    delay = 1
+
+                    while not stopping.is_set():
+                        # Catch up first: covers mail that arrived while reconnecting
+                        self._fetch_new(mailbox)
+                        with self._lock:
+                            # Checked under the lock stop() takes - it either sees us idling or we see it
+                            if stopping.is_set():
+                                break
+                            self._idling = True
+                        try:
+                            mailbox.idle.wait(timeout=IDLE_TIMEOUT_SECONDS)
+                        finally:
+                            with self._lock:
+                                self._idling = False
+            except Exception as e:
+                if stopping.is_set():
+                    break
+                logger.warning(f"IMAP listener error, reconnecting in {delay}s: {e}")
+                stopping.wait(delay)
+                delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+            finally:
+                with self._lock:
+                    self._mailbox = None
+
+    def _set_ready(self) -> None:
+        self._ready.set()
+        if self._ready_future is not None:
+            future, loop = self._ready_future
+            self._ready_future = None
+            try:
+                loop.call_soon_threadsafe(_resolve_future, future, None)
+            except RuntimeError:
+                # start()'s loop is gone (e.g. a one-off script exited)
+                pass
+
+    def _fetch_new(self, mailbox: MailBox) -> None:
+        # Headers of new UIDs only; bodies just for reset emails
+        mails, self._last_uid = fetch_new_reset_emails(mailbox.client, self._last_uid)
+        consumed = []
+        for mail in mails:
+            link = extract_reset_link(mail.body)
+            if not link:
+                logger.warning(f"CapCut email UID {mail.uid} has no reset link")
+                continue
+            # Unparseable Date header - fall back to now
+            sent_at = mail.sent_at or time.time()
+            recipients = mail.recipients
+            logger.info(f"New CapCut reset email UID {mail.uid} to {', '.join(sorted(recipients)) or '?'}: {mail.subject}")
+            self._deliver(sent_at, link, recipients)
+            consumed.append(mail.uid)
+        move_out_of_inbox(mailbox.client, consumed, settings.IMAP_PROCESSED_FOLDER)
+
+
+def _addressed_to(recipients: FrozenSet[str], recipient: Optional[str]) -> bool:
+    """Flows without a recipient, and emails without readable recipients, match anything"""
+    return recipient is None or not recipients or recipient in recipients
+
+
+def _resolve_future(future: asyncio.Future, link: str) -> None:
+    if not future.done():
+        future.set_result(link)
+
+
+def _cancel_future(future: asyncio.Future) -> None:
+    if not future.done():
+        future.cancel()
+
+
+# Singleton instance (the GMAIL_EMAIL inbox)
+mail_listener = ResetMailListener(host=settings.IMAP_HOST, port=settings.IMAP_PORT, ssl=settings.IMAP_SSL)
+_listeners: Dict[str, ResetMailListener] = {settings.GMAIL_EMAIL.lower(): mail_listener}
+
+
+def listener_for(gmail_email: str) -> ResetMailListener:
+    """The listener for a Gmail inbox - one connection per inbox, however many accounts use it"""
+    key = gmail_email.lower()
+    if key not in _listeners:
+        _listeners[key] = ResetMailListener(host=settings.IMAP_HOST, port=settings.IMAP_PORT, ssl=settings.IMAP_SSL)
+    return _listeners[key]
+
+
+def all_listeners() -> List[ResetMailListener]:
+    return list(_listeners.values())
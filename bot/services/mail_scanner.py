@@ -0,0 +1,243 @@
+"""
+Incremental UID scanning of the reset inbox
+Each poll looks only at mail that arrived since the previous one: the
+headers of UIDs above the cursor are fetched with BODY.PEEK[HEADER.FIELDS],
+bodies are downloaded only for CapCut reset emails, and consumed reset
+emails are moved out of INBOX so the inbox - and every scan of it - stays
+small. Cursors are (UIDVALIDITY, last seen UID) per inbox, persisted in
+STATE_DIR so a restart resumes instead of rescanning history. Works on any
+imaplib connection, including imap_tools' MailBox.client.
+"""
+
+import email
+import email.utils
+import imaplib
+import json
+import logging
+import os
+import re
+import threading
+from email.header import decode_header, make_header
+from email.message import Message
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+RESET_EMAIL_SUBJECT = "CapCut password reset request"
+CAPCUT_SENDER_KEYWORDS = ("capcut", "tiktok", "bytedance")
+RESET_SUBJECT_KEYWORDS = ("reset", "password", "verify", "verification", "code", "confirm")
+HEADER_FIELDS = "FROM TO DELIVERED-TO SUBJECT DATE"
+# A new (or invalidated) cursor starts this many UIDs back, so a reset email
+# that landed just before the first scan is still found
+INITIAL_LOOKBACK = 20
+
+
+class ScannedMail:
+    """A new reset email: parsed headers, plus the full message once downloaded"""
+
+    def __init__(self, uid: int, headers: Message):
+        self.uid = uid
+        self.headers = headers
+        self.message: Optional[Message] = None
+
+    def _header(self, name: str) -> str:
+        value = self.headers.get(name, "")
+        try:
+            return str(make_header(decode_header(value)))
+        except Exception:
+            return str(value)
+
+    @property
+    def subject(self) -> str:
+        return self._header("Subject")
+
+    @property
+    def sender(self) -> str:
+        return self._header("From")
+
+    @property
+    def recipients(self) -> FrozenSet[str]:
+        """To plus Delivered-To (Gmail keeps +aliases in To; Delivered-To covers forwarding and Bcc)"""
+        values = self.headers.get_all("To", []) + self.headers.get_all("Delivered-To", [])
+        return frozenset(address.strip().lower() for _, address in email.utils.getaddresses(values) if address)
+
+    @property
+    def sent_at(self) -> Optional[float]:
+        try:
+            return email.utils.parsedate_to_datetime(self.headers.get("Date", "")).timestamp()
+        except (TypeError, ValueError):
+            return None
+
+    @property
+    def body(self) -> str:
+        """HTML body if there is one, else the text body"""
+        if self.message is None:
+            return ""
+        text = ""
+        for part in self.message.walk():
+            content_type = part.get_content_type()
+            if content_type not in ("text/html", "text/plain"):
+                continue
+            payload = part.get_payload(decode=True) or b""
+            content = payload.decode(part.get_content_charset() or "utf-8", errors="replace")
+            if content_type == "text/html":
+                return content
+            text = text or content
+        return text
+
+
+def is_reset_email(mail: ScannedMail) -> bool:
+    subject = mail.subject.lower()
+    if RESET_EMAIL_SUBJECT.lower() in subject:
+        return True
+    sender = mail.sender.lower()
+    return any(keyword in sender for keyword in CAPCUT_SENDER_KEYWORDS) and any(
+        keyword in subject for keyword in RESET_SUBJECT_KEYWORDS
+    )
+
+
+def _check(response: Tuple[str, list], what: str) -> list:
+    status, data = response
+    if status != "OK":
+        raise imaplib.IMAP4.error(f"{what} failed: {data}")
+    return data
+
+
+def _fetched(data: list) -> List[Tuple[int, bytes]]:
+    """(UID, literal) pairs from an imaplib UID FETCH response"""
+    results = []
+    for item in data:
+        if isinstance(item, tuple):
+            match = re.search(rb"UID (\d+)", item[0])
+            if match:
+                results.append((int(match.group(1)), item[1]))
+    return results
+
+
+def inbox_status(client: imaplib.IMAP4) -> Tuple[int, int]:
+    """(UIDVALIDITY, UIDNEXT) of INBOX - works whether or not it is selected"""
+    data = _check(client.status("INBOX", "(UIDVALIDITY UIDNEXT)"), "STATUS")
+    values = dict(re.findall(rb"(UIDVALIDITY|UIDNEXT) (\d+)", data[0]))
+    return int(values[b"UIDVALIDITY"]), int(values[b"UIDNEXT"])
+
+
+def fetch_new_reset_emails(client: imaplib.IMAP4, after_uid: int) -> Tuple[List[ScannedMail], int]:
+    """
+    Reset emails with UIDs above `after_uid` in the selected folder, bodies downloaded.
+    Returns them with the highest UID seen (the new cursor).
+    """
+    data = _check(client.uid("FETCH", f"{after_uid + 1}:*", f"(UID BODY.PEEK[HEADER.FIELDS ({HEADER_FIELDS})])"), "UID FETCH headers")
+    last_uid = after_uid
+    matches = []
+    for uid, header_bytes in _fetched(data):
+        # "N:*" always returns the newest message, even if its UID is below N
+        if uid <= after_uid:
+            continue
+        last_uid = max(last_uid, uid)
+        mail = ScannedMail(uid, email.message_from_bytes(header_bytes))
+        if is_reset_email(mail):
+            matches.append(mail)
+
+    if matches:
+        uid_set = ",".join(str(mail.uid) for mail in matches)
+        bodies = dict(_fetched(_check(client.uid("FETCH", uid_set, "(UID BODY.PEEK[])"), "UID FETCH bodies")))
+        for mail in matches:
+            if mail.uid in bodies:
+                mail.message = email.message_from_bytes(bodies[mail.uid])
+    return [mail for mail in matches if mail.message is not None], last_uid
+
+
+def move_out_of_inbox(client: imaplib.IMAP4, uids: Iterable[int], folder: str) -> bool:
+    """
+    Move consumed emails from the selected INBOX to `folder` (a label on Gmail),
+    creating it on first use. No-op when folder is empty.
+    """
+    uid_set = ",".join(str(uid) for uid in sorted(set(uids)))
+    if not uid_set or not folder:
+        return False
+    mailbox = '"' + folder.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    try:
+        # Asked after login - servers (Gmail) advertise MOVE/UIDPLUS only to authenticated clients
+        capabilities = set(_check(client.capability(), "CAPABILITY")[0].decode().upper().split())
+        for attempt in range(2):
+            if "MOVE" in capabilities:
+                status, data = client.uid("MOVE", uid_set, mailbox)
+            else:
+                status, data = client.uid("COPY", uid_set, mailbox)
+                if status == "OK":
+                    _check(client.uid("STORE", uid_set, "+FLAGS.SILENT", "(\\Deleted)"), "UID STORE")
+                    # Without UIDPLUS a plain EXPUNGE could remove other \Deleted mail - leave it flagged
+                    if "UIDPLUS" in capabilities:
+                        _check(client.uid("EXPUNGE", uid_set), "UID EXPUNGE")
+            if status == "OK":
+                logger.info(f"Moved reset email UID(s) {uid_set} to {folder}")
+                return True
+            if attempt == 0 and b"TRYCREATE" in b" ".join(part for part in data if isinstance(part, bytes)):
+                client.create(mailbox)
+                continue
+            logger.warning(f"Could not move UID(s) {uid_set} to {folder}: {data}")
+            return False
+    except imaplib.IMAP4.error as e:
+        logger.warning(f"Could not move UID(s) {uid_set} to {folder}: {e}")
+    return False
+
+
+class MailScanner:
+    def __init__(self, cursor_file: str, processed_folder: str):
+        self.cursor_file = cursor_file
+        self.processed_folder = processed_folder
+        self._lock = threading.Lock()
+        self._cursors: Optional[Dict[str, Dict[str, int]]] = None
+
+    def _load(self) -> Dict[str, Dict[str, int]]:
+        if self._cursors is None:
+            try:
+                with open(self.cursor_file) as f:
+                    self._cursors = json.load(f)
+            except (OSError, ValueError):
+                self._cursors = {}
+        return self._cursors
+
+    def _save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.cursor_file) or ".", exist_ok=True)
+            tmp_file = f"{self.cursor_file}.tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(self._cursors, f, indent=2, sort_keys=True)
+            os.replace(tmp_file, self.cursor_file)
+        except OSError as e:
+            logger.warning(f"Could not save mail cursors to {self.cursor_file}: {e}")
+
+    def scan(self, client: imaplib.IMAP4, inbox: str) -> List[ScannedMail]:
+        """New reset emails in `inbox` since the last scan; selects INBOX and advances the cursor"""
+        _check(client.select("INBOX"), "SELECT INBOX")
+        uidvalidity, uid_next = inbox_status(client)
+        key = inbox.lower()
+        with self._lock:
+            cursor = self._load().get(key)
+        if cursor is None or cursor.get("uidvalidity") != uidvalidity:
+            # First scan, or the server renumbered INBOX - old UIDs mean nothing now
+            if cursor is not None:
+                logger.info(f"UIDVALIDITY of {inbox} changed - rescanning the last {INITIAL_LOOKBACK} emails")
+            last_uid = max(uid_next - 1 - INITIAL_LOOKBACK, 0)
+        else:
+            last_uid = cursor["last_uid"]
+
+        mails, new_last_uid = fetch_new_reset_emails(client, last_uid)
+        with self._lock:
+            self._load()[key] = {"uidvalidity": uidvalidity, "last_uid": new_last_uid}
+            self._save()
+        return mails
+
+    def consume(self, client: imaplib.IMAP4, mails: Iterable[ScannedMail]) -> None:
+        """Move handled reset emails out of INBOX"""
+        move_out_of_inbox(client, (mail.uid for mail in mails), self.processed_folder)
+
+
+# Singleton instance
+mail_scanner = MailScanner(
+    cursor_file=os.path.join(settings.STATE_DIR, "mail_cursors.json"),
+    processed_folder=settings.IMAP_PROCESSED_FOLDER
+)
@@ -0,0 +1,58 @@
+"""
+Dedicated executor for blocking mailbox I/O
+imaplib and imap_tools are synchronous. Anything that talks to a mailbox
+from async code runs here instead of on the event loop, so /health and
+other flows stay responsive while a login, search or fetch is in progress.
+Calls get a threading.Event that is set when the awaiting task is
+cancelled; long-running mailbox code checks it (and waits on it instead of
+sleeping) so a cancelled reset frees its worker promptly.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.MAILBOX_IO_WORKERS, thread_name_prefix="mailbox-io")
+        return _executor
+
+
+async def run_mailbox_io(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run func(*args, cancel=<threading.Event>, **kwargs) on the mailbox executor.
+    If the awaiting task is cancelled the event is set and CancelledError propagates.
+    """
+    cancel = threading.Event()
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_get_executor(), functools.partial(func, *args, cancel=cancel, **kwargs))
+    try:
+        return await future
+    except asyncio.CancelledError:
+        cancel.set()
+        logger.info(f"Cancelled mailbox call {getattr(func, '__name__', func)}")
+        raise
+
+
+def shutdown() -> None:
+    """Stop the executor - queued calls are dropped, running ones finish (called on app shutdown)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
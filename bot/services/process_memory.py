@@ -0,0 +1,122 @@
+"""
+Resident memory of process trees, read from /proc
+Browsers run as a tree of processes under the Playwright driver (browser,
+renderers, GPU/utility helpers), so a browser's footprint is the summed RSS
+of its tree. A browser's processes are found by an environment variable
+set only for its launch, which every process of the tree inherits. Linux only: elsewhere every reading is 0 and callers treat
+memory as unknown.
+"""
+
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+# cgroup v2, then v1 - the container's memory limit and usage
+CGROUP_LIMIT_FILES = ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes")
+CGROUP_USAGE_FILES = ("/sys/fs/cgroup/memory.current", "/sys/fs/cgroup/memory/memory.usage_in_bytes")
+
+
+def available() -> bool:
+    return os.path.isdir("/proc/self")
+
+
+def _parent_map() -> Dict[int, int]:
+    """pid -> parent pid for every running process"""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces and parens - fields follow the last ")"
+        fields = stat[stat.rfind(")") + 2:].split()
+        parents[int(entry)] = int(fields[1])
+    return parents
+
+
+def descendants(root: int, parents: Optional[Dict[int, int]] = None) -> Set[int]:
+    """All processes below `root` (not including it)"""
+    if not available():
+        return set()
+    parents = parents if parents is not None else _parent_map()
+    children: Dict[int, List[int]] = {}
+    for pid, parent in parents.items():
+        children.setdefault(parent, []).append(pid)
+    found: Set[int] = set()
+    stack = list(children.get(root, []))
+    while stack:
+        pid = stack.pop()
+        if pid not in found:
+            found.add(pid)
+            stack.extend(children.get(pid, []))
+    return found
+
+
+def _has_environ(pid: int, entry: bytes) -> bool:
+    try:
+        with open(f"/proc/{pid}/environ", "rb") as f:
+            return entry in f.read().split(b"\0")
+    except OSError:
+        return False
+
+
+def tagged_roots(root: int, name: str, value: str) -> Set[int]:
+    """Top processes below `root` started with the environment variable name=value"""
+    if not available():
+        return set()
+    parents = _parent_map()
+    entry = f"{name}={value}".encode()
+    tagged = {pid for pid in descendants(root, parents) if _has_environ(pid, entry)}
+    return {pid for pid in tagged if parents.get(pid) not in tagged}
+
+
+def rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def tree_rss(roots: Iterable[int]) -> tuple[int, int]:
+    """(summed RSS in bytes, live process count) of the given roots and everything below them"""
+    if not available():
+        return 0, 0
+    parents = _parent_map()
+    pids: Set[int] = set()
+    for root in roots:
+        if root in parents:
+            pids.add(root)
+            pids |= descendants(root, parents)
+    readings = [rss_bytes(pid) for pid in pids]
+    return sum(readings), sum(1 for rss in readings if rss)
+
+
+def _read_cgroup(files: Iterable[str]) -> Optional[int]:
+    for path in files:
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # "max" (v2) or a huge number (v1) means no limit
+        if value.isdigit() and int(value) < 1 << 60:
+            return int(value)
+        return None
+    return None
+
+
+def container_memory() -> dict:
+    """The container's memory limit and current usage in MB, None where not limited/readable"""
+    limit = _read_cgroup(CGROUP_LIMIT_FILES)
+    usage = _read_cgroup(CGROUP_USAGE_FILES)
+    return {
+        "limit_mb": round(limit / 2**20) if limit else None,
+        "usage_mb": round(usage / 2**20) if usage else None,
+    }
@@ -0,0 +1,230 @@
+"""
+Asynchronous password reset jobs
+Callers submit a reset and get a job id back immediately; a small pool of
+workers runs jobs from a priority queue (session-start rotations first).
+Resets of one account never overlap: a submission for an account that
+already has a queued or running job joins that job and shares its result.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+import traceback
+import uuid
+from typing import Optional
+
+import httpx
+
+from config import settings
+from services.accounts import CapCutAccount, accounts
+from services.flow_timing import flow_metrics
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first: a user is waiting on a session-start rotation
+JOB_PRIORITIES = {
+    "session_start": 0,
+    "session_end": 1,
+    "manual": 2,
+}
+
+# Finished jobs are kept this long for GET /bot/jobs/{id}
+FINISHED_JOB_TTL_SECONDS = 3600
+
+
+class ResetJob:
+    def __init__(self, account: CapCutAccount, kind: str, callback_url: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.account = account
+        self.email = account.email
+        self.kind = kind
+        self.priority = JOB_PRIORITIES.get(kind, JOB_PRIORITIES["manual"])
+        self.callback_urls = [callback_url] if callback_url else []
+        self.coalesced = 0  # later submissions that joined this job
+        self.status = "queued"  # queued, running, succeeded, failed
+        self.new_password: Optional[str] = None
+        self.message: Optional[str] = None
+        self.timings: list[dict] = []  # step spans of the flow that ran
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.done = asyncio.get_running_loop().create_future()
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "account_id": self.account.id,
+            "kind": self.kind,
+            "status": self.status,
+            "success": self.status == "succeeded",
+            "new_password": self.new_password,
+            "message": self.message,
+            "coalesced": self.coalesced,
+            "timings": self.timings,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+async def execute_reset(account: CapCutAccount) -> tuple[bool, Optional[str], str, list[dict]]:
+    """
+    Run the complete CapCut forgot-password flow for one account.
+    Returns: (success, new_password, message, step timing spans)
+    """
+    # Imported lazily - bot.py pulls in Playwright
+    from bot import CapCutPasswordResetBot
+
+    capcut_email = account.email
+    if not account.gmail_email:
+        raise ValueError(f"No Gmail inbox configured for account {account.id} (GMAIL_EMAIL)")
+    if not account.gmail_app_password:
+        raise ValueError(f"No Gmail app password configured for account {account.id} (GMAIL_APP_PASSWORD)")
+
+    logger.info(f"Starting password reset for {capcut_email} (account {account.id})")
+
+    # Use the WORKING CapCutPasswordResetBot class from bot.py
+    # This has cookies handling, robust selectors, and anti-detection
+    bot = CapCutPasswordResetBot(
+        capcut_email=capcut_email,
+        gmail_email=account.gmail_email,
+        gmail_app_password=account.gmail_app_password,
+        reset_recipient=account.reset_recipient,
+        headless=True  # Run headless in production
+    )
+
+    # Run the complete 14-step flow
+    success, new_password = await bot.run_complete_flow()
+    flow_metrics.record(bot.timer, success=bool(success and new_password))
+
+    if success and new_password:
+        logger.info(f"Password reset successful for {capcut_email}")
+        return True, new_password, "Password reset successfully", bot.timer.to_list()
+
+    logger.error(f"Password reset failed for {capcut_email}")
+    return False, None, "Password reset failed - bot did not succeed", bot.timer.to_list()
+
+
+class ResetJobQueue:
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.jobs: dict[str, ResetJob] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._sequence = itertools.count()
+        self._workers: list[asyncio.Task] = []
+        self._http: Optional[httpx.AsyncClient] = None
+        # account -> its queued/running job, and a lock held while a flow runs for it
+        self._in_flight: dict[str, ResetJob] = {}
+        self._account_locks: dict[str, asyncio.Lock] = {}
+
+    async def start(self):
+        """Start worker tasks (called on app startup)"""
+        self._queue = asyncio.PriorityQueue()
+        self._http = httpx.AsyncClient(timeout=10.0)
+        self._workers = [asyncio.create_task(self._worker(n)) for n in range(self.concurrency)]
+        logger.info(f"Reset job queue started with {self.concurrency} worker(s)")
+
+    async def stop(self):
+        """Cancel workers (called on app shutdown)"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._http:
+            await self._http.aclose()
+
+    @staticmethod
+    def _account_key(email: str) -> str:
+        return email.strip().lower()
+
+    def submit(self, account: CapCutAccount, kind: str = "manual", callback_url: Optional[str] = None) -> ResetJob:
+        """
+        Queue a reset and return immediately. If the account already has a
+        queued or running reset, that job is returned instead - two flows for
+        one account would race for the same reset email.
+        """
+        self._prune()
+        email = account.email
+        account_key = self._account_key(email)
+        job = self._in_flight.get(account_key)
+        if job:
+            job.coalesced += 1
+            if callback_url and callback_url not in job.callback_urls:
+                job.callback_urls.append(callback_url)
+            priority = JOB_PRIORITIES.get(kind, JOB_PRIORITIES["manual"])
+            if job.status == "queued" and priority < job.priority:
+                # Queue it again at the more urgent priority; the stale entry is skipped
+                job.priority = priority
+                self._queue.put_nowait((job.priority, next(self._sequence), job.id))
+            logger.info(f"Coalesced {kind} reset for {email} into {job.status} job {job.id}")
+            return job
+
+        job = ResetJob(account=account, kind=kind, callback_url=callback_url)
+        self.jobs[job.id] = job
+        self._in_flight[account_key] = job
+        # Sequence number keeps FIFO order within a priority
+        self._queue.put_nowait((job.priority, next(self._sequence), job.id))
+        logger.info(f"Queued {kind} reset job {job.id} for {email} (queue depth {self._queue.qsize()})")
+        return job
+
+    def get(self, job_id: str) -> Optional[ResetJob]:
+        return self.jobs.get(job_id)
+
+    def _prune(self):
+        cutoff = time.time() - FINISHED_JOB_TTL_SECONDS
+        for job_id in [j.id for j in self.jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    async def _worker(self, number: int):
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self.jobs.get(job_id)
+            try:
+                # Skip entries left behind when a job was re-queued at a higher priority
+                if job and job.status == "queued":
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: ResetJob):
+        job.status = "running"
+        account_key = self._account_key(job.email)
+        lock = self._account_locks.setdefault(account_key, asyncio.Lock())
+        timings = []
+
+        try:
+            # Belt and braces with coalescing: never two flows on one account
+            async with lock:
+                job.started_at = time.time()
+                logger.info(f"Running {job.kind} reset job {job.id} (waited {job.started_at - job.created_at:.1f}s)")
+                success, new_password, message, timings = await execute_reset(job.account)
+        except Exception as e:
+            logger.error(f"Error in reset job {job.id}: {e}")
+            logger.error(f"Full traceback: {traceback.format_exc()}")
+            success, new_password, message = False, None, f"Error: {str(e)}"
+        finally:
+            if self._in_flight.get(account_key) is job:
+                del self._in_flight[account_key]
+
+        job.status = "succeeded" if success else "failed"
+        job.new_password = new_password
+        job.message = message
+        job.timings = timings
+        job.finished_at = time.time()
+        if not job.done.done():
+            job.done.set_result(job)
+
+        for callback_url in job.callback_urls:
+            await self._send_callback(job, callback_url)
+
+    async def _send_callback(self, job: ResetJob, callback_url: str):
+        """Tell the caller the job finished - it fetches the result via GET /bot/jobs/{id}"""
+        try:
+            await self._http.post(callback_url, json={"job_id": job.id, "status": job.status})
+        except Exception as e:
+            logger.warning(f"Callback for job {job.id} to {callback_url} failed: {e}")
+
+
+# Singleton instance - one worker per account unless capped
+reset_jobs = ResetJobQueue(concurrency=settings.MAX_CONCURRENT_RESETS or len(accounts.all()))
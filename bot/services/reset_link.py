@@ -0,0 +1,150 @@
+"""
+Reset link extraction from CapCut emails
+One pass of precompiled regexes over the email body collects every <a>
+link with its visible text, plus bare URLs (text parts), and each
+candidate is scored - CapCut host, reset-looking path, token
+parameter and "Reset password"-style anchor text count for it; unsubscribe,
+help, legal, social and app store links count against it. Tracking
+redirects that carry the real link in a query parameter are unwrapped.
+No browser and no per-call regex compilation.
+"""
+
+import html
+import re
+from typing import List, Optional
+from urllib.parse import unquote, urlsplit
+
+ANCHOR_RE = re.compile(r"<a\b([^>]*)>(.*?)</a\s*>", re.IGNORECASE | re.DOTALL)
+ATTR_RE = re.compile(r"""([\w-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""")
+ALT_RE = re.compile(r"""<img\b[^>]*?\balt\s*=\s*["']([^"']*)["'][^>]*>""", re.IGNORECASE)
+TAG_RE = re.compile(r"<[^>]+>")
+HIDDEN_RE = re.compile(r"<(style|script|head)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+URL_RE = re.compile(r"https?://[^\s<>\"'{}|\\^`\[\]]+", re.IGNORECASE)
+CAPCUT_HOST_RE = re.compile(r"(^|\.)capcut\.(com|cn|net)$")
+RELATED_HOST_RE = re.compile(r"(^|\.)(tiktok|bytedance|byteoversea)\.com$")
+RESET_PATH_RE = re.compile(r"forget-password|forgot-password|reset|change-pwd|password", re.IGNORECASE)
+TOKEN_PARAM_RE = re.compile(r"(?:^|&)(?:token|ticket|verify_ticket|reset_token|code)=", re.IGNORECASE)
+# A whole URL as a query parameter value (tracking redirects), raw or percent-encoded
+WRAPPED_URL_RE = re.compile(r"=(https?(?::|%3A)[^&]+)", re.IGNORECASE)
+RESET_TEXT_RE = re.compile(r"reset|password|change|confirm|verify|contrase|kata sandi|senha|mot de passe", re.IGNORECASE)
+BUTTON_RE = re.compile(r"btn|button", re.IGNORECASE)
+UNWANTED_RE = re.compile(
+    r"unsubscribe|privacy|terms|legal|help|support|feedback|preferences|"
+    r"apps\.apple\.com|play\.google\.com|facebook|twitter|instagram|youtube|linkedin|"
+    r"\.(png|jpe?g|gif|svg)(\?|$)",
+    re.IGNORECASE,
+)
+CODE_RE = re.compile(r"(?:code|verification)\D{0,20}?(\d{4,8})\b|\b(\d{6})\b", re.IGNORECASE)
+TRAILING_PUNCTUATION = ".,;:!?)]'\""
+# Below this a link is not taken for a reset link
+MIN_SCORE = 4
+
+
+class LinkCandidate:
+    def __init__(self, url: str, text: str = "", attributes: str = ""):
+        self.url = url
+        self.text = text
+        self.attributes = attributes
+        self.score = 0
+
+    def __repr__(self) -> str:
+        return f"LinkCandidate({self.url!r}, score={self.score})"
+
+
+def _anchors(body: str) -> List[LinkCandidate]:
+    """<a href> links with their visible text (image alt text included)"""
+    links = []
+    for match in ANCHOR_RE.finditer(body):
+        attributes = {name.lower(): next(value for value in values if value is not None) for name, *values in ATTR_RE.findall(match.group(1))}
+        href = attributes.get("href", "").strip()
+        if not href:
+            continue
+        inner = match.group(2)
+        text = TAG_RE.sub(" ", ALT_RE.sub(r" \1 ", inner)) if "<" in inner else inner
+        links.append(LinkCandidate(
+            href,
+            text=" ".join(html.unescape(text).split()),
+            attributes=f"{attributes.get('class', '')} {attributes.get('style', '')}"
+        ))
+    return links
+
+
+def _normalize(url: str) -> Optional[str]:
+    url = html.unescape(url).strip().rstrip(TRAILING_PUNCTUATION)
+    if url.startswith("//"):
+        url = "https:" + url
+    elif url.lower().startswith("www."):
+        url = "https://" + url
+    return url if url.lower().startswith(("http://", "https://")) else None
+
+
+def _score(candidate: LinkCandidate) -> int:
+    parts = urlsplit(candidate.url)
+    host = (parts.hostname or "").lower()
+    score = 0
+    if CAPCUT_HOST_RE.search(host):
+        score += 3
+    elif RELATED_HOST_RE.search(host):
+        score += 1
+    if RESET_PATH_RE.search(parts.path):
+        score += 4
+    if TOKEN_PARAM_RE.search(parts.query):
+        score += 3
+    if RESET_TEXT_RE.search(candidate.text):
+        score += 3
+    if BUTTON_RE.search(candidate.attributes):
+        score += 1
+    if UNWANTED_RE.search(parts.netloc + parts.path) or UNWANTED_RE.search(candidate.text):
+        score -= 6
+    return score
+
+
+def candidates(body: str) -> List[LinkCandidate]:
+    """Every link in the body (HTML or text), best reset link candidate first"""
+    if not body:
+        return []
+    # Bare URLs too (text bodies, <https://...>) - anchors come first, so they win the dedupe
+    found = _anchors(body) + [LinkCandidate(match.group(0)) for match in URL_RE.finditer(body)]
+
+    results: List[LinkCandidate] = []
+    seen_raw = set()
+    seen = set()
+    for candidate in found:
+        if candidate.url in seen_raw:
+            continue
+        seen_raw.add(candidate.url)
+        url = _normalize(candidate.url)
+        if url is None:
+            continue
+        # Tracking redirects: the real link rides along in a query parameter
+        wrapped = [unquote(value) for value in WRAPPED_URL_RE.findall(url)] if "=" in url else []
+        for link in [url] + wrapped:
+            if link in seen:
+                continue
+            seen.add(link)
+            unwrapped = LinkCandidate(link, candidate.text, candidate.attributes)
+            unwrapped.score = _score(unwrapped) - (2 if link == url and wrapped else 0)
+            results.append(unwrapped)
+    # Stable sort - equal scores keep document order
+    return sorted(results, key=lambda candidate: -candidate.score)
+
+
+def best_candidate(body: str) -> Optional[LinkCandidate]:
+    ranked = candidates(body)
+    return ranked[0] if ranked and ranked[0].score >= MIN_SCORE else None
+
+
+def extract_reset_link(body: str) -> Optional[str]:
+    """Find the password reset URL in an email body (HTML or text)"""
+    best = best_candidate(body)
+    return best.url if best else None
+
+
+def extract_verification_code(body: str) -> Optional[str]:
+    """A 4-8 digit code after "code"/"verification", or any standalone 6-digit number"""
+    if not body:
+        return None
+    # Visible text only, URLs removed - tokens and styles are full of digits
+    text = html.unescape(TAG_RE.sub(" ", URL_RE.sub(" ", HIDDEN_RE.sub(" ", body))))
+    match = CODE_RE.search(text)
+    return (match.group(1) or match.group(2)) if match else None
@@ -0,0 +1,143 @@
+"""
+Concurrent selector resolution with learned ordering
+All candidate selectors for a step are raced in a single wait (the first
+visible match wins) instead of being tried one by one with a 5s timeout
+each. Per-step hit counts are persisted, so the selector that usually wins
+is preferred when several match at once. Counts are kept in memory and
+written at most every SAVE_INTERVAL_SECONDS (off the event loop), plus
+once on shutdown.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+RESOLVE_ATTEMPTS = 3
+# Hit counts recorded since the last save are written at most this often
+SAVE_INTERVAL_SECONDS = 30
+
+
+class SelectorResolver:
+    def __init__(self, stats_file: str):
+        self.stats_file = stats_file
+        self._lock = threading.Lock()
+        self._stats: Optional[Dict[str, Dict[str, int]]] = None
+        self._dirty = False
+        self._saved_at = 0.0
+        # One writer at a time - saves share the temp file
+        self._save_lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, int]]:
+        if self._stats is None:
+            try:
+                with open(self.stats_file) as f:
+                    self._stats = json.load(f)
+            except (OSError, ValueError):
+                self._stats = {}
+        return self._stats
+
+    def flush(self) -> None:
+        """Write hit counts recorded since the last save (also called on shutdown)"""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                # Snapshot under the lock - record() may run while the file is written
+                snapshot = json.dumps(self._stats, indent=2, sort_keys=True)
+                self._dirty = False
+                self._saved_at = time.monotonic()
+            try:
+                os.makedirs(os.path.dirname(self.stats_file) or ".", exist_ok=True)
+                tmp_file = f"{self.stats_file}.tmp"
+                with open(tmp_file, "w") as f:
+                    f.write(snapshot)
+                os.replace(tmp_file, self.stats_file)
+            except OSError as e:
+                logger.warning(f"Could not save selector stats to {self.stats_file}: {e}")
+                with self._lock:
+                    self._dirty = True
+
+    def _save_due(self) -> bool:
+        with self._lock:
+            return self._dirty and time.monotonic() - self._saved_at >= SAVE_INTERVAL_SECONDS
+
+    def ordered(self, step: str, candidates: List[str]) -> List[str]:
+        """Candidates with historically winning selectors first (ties keep the given order)"""
+        with self._lock:
+            hits = self._load().get(step, {})
+            return sorted(candidates, key=lambda selector: -hits.get(selector, 0))
+
+    def record(self, step: str, selector: str) -> None:
+        with self._lock:
+            step_hits = self._load().setdefault(step, {})
+            step_hits[selector] = step_hits.get(selector, 0) + 1
+            self._dirty = True
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return json.loads(json.dumps(self._load()))
+
+    @staticmethod
+    def _visible(page, selector: str):
+        return page.locator(f"{selector} >> visible=true")
+
+    def _race_locator(self, page, ordered: List[str]):
+        """One locator matching a visible element of any candidate"""
+        combined = self._visible(page, ordered[0])
+        for selector in ordered[1:]:
+            combined = combined.or_(self._visible(page, selector))
+        return combined.first
+
+    async def resolve(self, page, step: str, candidates: List[str], timeout_ms: float) -> Tuple[object, str]:
+        """
+        Wait for the first visible match among candidates.
+        Returns (element_handle, winning_selector); raises TimeoutError if none appear.
+        """
+        ordered = self.ordered(step, candidates)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        # A match can vanish between the race and the lookup (re-render) - race again
+        for _ in range(RESOLVE_ATTEMPTS):
+            await self._race_locator(page, ordered).wait_for(state="attached", timeout=timeout_ms)
+            for selector in ordered:
+                locator = self._visible(page, selector).first
+                if await locator.count():
+                    element = await locator.element_handle()
+                    logger.info(f"Step {step}: matched {selector!r} in {(loop.time() - started) * 1000:.0f}ms")
+                    self.record(step, selector)
+                    if self._save_due():
+                        await asyncio.to_thread(self.flush)
+                    return element, selector
+
+        raise Exception(f"Step {step}: matched elements kept disappearing")
+
+    def resolve_sync(self, page, step: str, candidates: List[str], timeout_ms: float) -> Tuple[object, str]:
+        """resolve() for the Playwright sync API"""
+        ordered = self.ordered(step, candidates)
+
+        for _ in range(RESOLVE_ATTEMPTS):
+            self._race_locator(page, ordered).wait_for(state="attached", timeout=timeout_ms)
+            for selector in ordered:
+                locator = self._visible(page, selector).first
+                if locator.count():
+                    element = locator.element_handle()
+                    logger.info(f"Step {step}: matched {selector!r}")
+                    self.record(step, selector)
+                    if self._save_due():
+                        self.flush()
+                    return element, selector
+
+        raise Exception(f"Step {step}: matched elements kept disappearing")
+
+
+# Singleton instance
+selector_resolver = SelectorResolver(stats_file=os.path.join(settings.STATE_DIR, "selector_stats.json"))
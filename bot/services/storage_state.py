@@ -0,0 +1,129 @@
+"""
+Sanitized browser storage state shared between runs
+After a successful flow the context's consent cookies and dismissed
+tour/onboarding flags are saved, and new contexts are seeded with them so
+the cookie banner and guide overlays don't come up on every run. Anything
+that could authenticate (session cookies, tokens) is never written.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from typing import Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cookies/localStorage keys worth keeping: consent choices and dismissed UI
+KEEP_PATTERN = re.compile(
+    r"consent|cookie|gdpr|ccpa|privacy|banner|tour|guide|onboard|tutorial|tooltip|intro|dismiss|modal|popup|has_seen|visited",
+    re.IGNORECASE
+)
+# Never kept, even if they also match KEEP_PATTERN
+AUTH_PATTERN = re.compile(
+    r"(^|[_.-])(sid|uid)([_.-]|$)|sess|token|auth|passport|login|odin|csrf|xsrf|jwt|ttwid|secret|ticket|credential|password",
+    re.IGNORECASE
+)
+# Flags are short; anything longer is more likely an opaque credential blob
+MAX_VALUE_LENGTH = 512
+
+
+def _keep(name: str, value: str) -> bool:
+    return (
+        bool(KEEP_PATTERN.search(name))
+        and not AUTH_PATTERN.search(name)
+        and len(value or "") <= MAX_VALUE_LENGTH
+    )
+
+
+def sanitize_storage_state(state: dict) -> dict:
+    """Reduce a Playwright storage_state() to consent cookies and UI flags"""
+    cookies = [
+        cookie for cookie in state.get("cookies", [])
+        if _keep(cookie.get("name", ""), cookie.get("value", "")) and not cookie.get("httpOnly")
+    ]
+
+    origins = []
+    for origin in state.get("origins", []):
+        entries = [
+            entry for entry in origin.get("localStorage", [])
+            if _keep(entry.get("name", ""), entry.get("value", ""))
+        ]
+        if entries:
+            origins.append({"origin": origin["origin"], "localStorage": entries})
+
+    return {"cookies": cookies, "origins": origins}
+
+
+class StorageStateStore:
+    def __init__(self, path: str, enabled: bool, drop_on_failure: bool):
+        self.path = path
+        self.enabled = enabled
+        self.drop_on_failure = drop_on_failure
+        self._lock = threading.Lock()
+
+    def load(self) -> Optional[dict]:
+        """Saved state for new_context(storage_state=...), or None to start empty"""
+        if not self.enabled:
+            return None
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Re-sanitize in case the file was written by an older version or by hand
+        state = sanitize_storage_state(state)
+        return state if state["cookies"] or state["origins"] else None
+
+    def save(self, state: dict) -> None:
+        """Sanitize and persist a storage_state() snapshot"""
+        if not self.enabled:
+            return
+        state = sanitize_storage_state(state)
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(state, f, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not save storage state to {self.path}: {e}")
+                return
+        logger.info(
+            f"Saved storage state: {len(state['cookies'])} cookie(s), "
+            f"{sum(len(o['localStorage']) for o in state['origins'])} localStorage flag(s)"
+        )
+
+    async def capture(self, context) -> None:
+        """Save the sanitized state of a browser context after a successful flow"""
+        if not self.enabled:
+            return
+        try:
+            self.save(await context.storage_state())
+        except Exception as e:
+            logger.warning(f"Could not capture storage state: {e}")
+
+    def failed(self) -> None:
+        """A flow failed - forget the saved state if configured to"""
+        if not self.drop_on_failure:
+            return
+        with self._lock:
+            try:
+                os.remove(self.path)
+                logger.info("Dropped saved storage state after a failed run")
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not drop storage state {self.path}: {e}")
+
+
+# Singleton instance
+storage_state_store = StorageStateStore(
+    path=os.path.join(settings.STATE_DIR, "storage_state.json"),
+    enabled=settings.PERSIST_STORAGE_STATE,
+    drop_on_failure=settings.DROP_STORAGE_STATE_ON_FAILURE
+)
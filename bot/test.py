@@ -1,4 +1,5 @@
 import asyncio
+import logging
 import os
 from bot import CapCutPasswordResetBot
 from dotenv import load_dotenv
@@ -39,4 +40,6 @@ async def test_bot():
         print("- Verify reset email arrived in Gmail")
 
 if __name__ == "__main__":
+    # The bot logs its steps - show them like the old print output
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     asyncio.run(test_bot())
\ No newline at end of file
@@ -0,0 +1,11 @@
+"""
+Test setup
+config.py reads the environment on import, so keep the bot's state files
+(replay template, selector stats, ...) in a throwaway directory before any
+test imports it. Tests run against the mocks in mock/ - no browsers needed.
+"""
+
+import os
+import tempfile
+
+os.environ["STATE_DIR"] = tempfile.mkdtemp(prefix="capcut-bot-tests-")
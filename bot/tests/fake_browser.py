@@ -0,0 +1,66 @@
+"""
+Stand-ins for Playwright's Browser and BrowserContext, enough for the pool
+and the launch step - contexts take `delay` seconds to open, like a real
+browser under load.
+"""
+
+import asyncio
+
+from services.browser_pool import BrowserPool, PooledBrowser
+
+
+class FakeContext:
+    def __init__(self, page_delay: float = 0):
+        self.page_delay = page_delay
+        self.closed = False
+        self._close_handlers = []
+
+    def once(self, event: str, handler) -> None:
+        assert event == "close"
+        self._close_handlers.append(handler)
+
+    async def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        for handler in self._close_handlers:
+            handler(self)
+
+    async def add_init_script(self, script: str) -> None:
+        pass
+
+    async def new_page(self):
+        await asyncio.sleep(self.page_delay)
+        return object()
+
+
+class FakeBrowser:
+    def __init__(self, delay: float = 0, page_delay: float = 0, fail: bool = False):
+        self.delay = delay
+        self.page_delay = page_delay
+        self.fail = fail
+        self.contexts: list[FakeContext] = []
+
+    def is_connected(self) -> bool:
+        return True
+
+    async def new_context(self, **options) -> FakeContext:
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("Target page, context or browser has been closed")
+        context = FakeContext(self.page_delay)
+        self.contexts.append(context)
+        return context
+
+    async def close(self) -> None:
+        pass
+
+
+def running_pool(browser: FakeBrowser, tmp_path) -> BrowserPool:
+    """A started pool of one fake browser (call inside the event loop)"""
+    pool = BrowserPool(size=1, engine_file=str(tmp_path / "browser_engine.json"))
+    pool._lock = asyncio.Lock()
+    pool._playwright = object()
+    pool.engine = "firefox"
+    pool._browsers = [PooledBrowser(browser, "firefox", set())]
+    return pool
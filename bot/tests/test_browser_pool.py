@@ -0,0 +1,77 @@
+"""
+Browser pool context accounting
+Every context a flow asks for must be checked back in - closed normally,
+failed to open, or abandoned because the flow was cancelled - or its
+browser counts as busy forever and is never recycled.
+"""
+
+import asyncio
+
+from fake_browser import FakeBrowser, running_pool
+
+
+def test_closed_context_is_checked_in(tmp_path):
+    async def run():
+        pool = running_pool(FakeBrowser(), tmp_path)
+        pooled = pool._browsers[0]
+        context = await pool.new_context()
+        assert pooled.active == 1
+        await context.close()
+        await asyncio.sleep(0)
+        return pooled
+
+    pooled = asyncio.run(run())
+    assert pooled.active == 0
+    assert pooled.runs == 1
+
+
+def test_failed_context_is_not_counted(tmp_path):
+    async def run():
+        pool = running_pool(FakeBrowser(fail=True), tmp_path)
+        try:
+            await pool.new_context()
+        except RuntimeError:
+            pass
+        return pool._browsers[0]
+
+    assert asyncio.run(run()).active == 0
+
+
+def test_cancelled_caller_closes_the_context_it_asked_for(tmp_path):
+    browser = FakeBrowser(delay=0.1)
+
+    async def run():
+        pool = running_pool(browser, tmp_path)
+        pooled = pool._browsers[0]
+        task = asyncio.create_task(pool.new_context())
+        await asyncio.sleep(0.02)
+        assert pooled.active == 1
+
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        # The browser finishes opening it after the caller left
+        await asyncio.sleep(0.2)
+        return pooled
+
+    pooled = asyncio.run(run())
+    assert pooled.active == 0
+    assert [context.closed for context in browser.contexts] == [True]
+
+
+def test_cancelled_caller_of_a_failing_context(tmp_path):
+    async def run():
+        pool = running_pool(FakeBrowser(delay=0.1, fail=True), tmp_path)
+        task = asyncio.create_task(pool.new_context())
+        await asyncio.sleep(0.02)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(0.2)
+        return pool._browsers[0]
+
+    assert asyncio.run(run()).active == 0
@@ -0,0 +1,195 @@
+"""
+FlowGraph: dependency ordering, failure propagation and cancellation,
+including a reset flow cancelled while its browser context is opening
+"""
+
+import asyncio
+
+import pytest
+
+from fake_browser import FakeBrowser, running_pool
+from services.flow_graph import FlowGraph
+from services.flow_timing import FlowTimer
+
+
+class Recorder:
+    """Steps that log when they start, finish or get cancelled"""
+
+    def __init__(self):
+        self.events: list[tuple[str, str]] = []
+
+    def step(self, name: str, seconds: float = 0, result=None, error: Exception = None):
+        async def run():
+            self.events.append(("start", name))
+            try:
+                await asyncio.sleep(seconds)
+            except asyncio.CancelledError:
+                await asyncio.sleep(0.01)  # cleanup that itself awaits
+                self.events.append(("cleaned", name))
+                raise
+            if error:
+                self.events.append(("fail", name))
+                raise error
+            self.events.append(("end", name))
+            return result
+        return run
+
+    def index(self, event: str, name: str) -> int:
+        return self.events.index((event, name))
+
+
+def test_steps_run_after_their_dependencies_and_independent_ones_overlap():
+    recorder = Recorder()
+    graph = FlowGraph(FlowTimer())
+    graph.add("a", recorder.step("a", 0.05, result=1))
+    graph.add("b", recorder.step("b", 0.02, result=2))
+    graph.add("c", recorder.step("c", result=3), after=("a", "b"))
+    graph.add("d", recorder.step("d", result=4), after=("c",))
+
+    results = asyncio.run(graph.run())
+
+    assert results == {"a": 1, "b": 2, "c": 3, "d": 4}
+    assert recorder.index("start", "b") < recorder.index("end", "a")
+    assert recorder.index("start", "c") > max(recorder.index("end", "a"), recorder.index("end", "b"))
+    assert recorder.index("start", "d") > recorder.index("end", "c")
+
+
+def test_unknown_dependency_is_rejected():
+    graph = FlowGraph(FlowTimer())
+    with pytest.raises(ValueError):
+        graph.add("b", Recorder().step("b"), after=("a",))
+
+
+def test_failure_is_raised_and_cancels_the_rest_after_their_cleanup():
+    recorder = Recorder()
+    graph = FlowGraph(FlowTimer())
+    graph.add("slow", recorder.step("slow", 5))
+    graph.add("broken", recorder.step("broken", 0.02, error=RuntimeError("boom")))
+    graph.add("after_broken", recorder.step("after_broken"), after=("broken",))
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(graph.run())
+
+    # The cancelled sibling finished its cleanup before run() raised
+    assert ("cleaned", "slow") in recorder.events
+    assert ("start", "after_broken") not in recorder.events
+
+
+def test_first_failure_is_reported():
+    recorder = Recorder()
+    graph = FlowGraph(FlowTimer())
+    graph.add("first", recorder.step("first", 0.01, error=ValueError("first")))
+    graph.add("second", recorder.step("second", 0.03, error=RuntimeError("second")))
+
+    with pytest.raises(ValueError, match="first"):
+        asyncio.run(graph.run())
+
+
+def test_cancelling_the_run_cancels_and_awaits_every_step():
+    recorder = Recorder()
+    graph = FlowGraph(FlowTimer())
+    graph.add("a", recorder.step("a", 5))
+    graph.add("b", recorder.step("b", 5))
+    graph.add("c", recorder.step("c"), after=("a",))
+
+    async def run():
+        task = asyncio.create_task(graph.run())
+        await asyncio.sleep(0.02)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert {("cleaned", "a"), ("cleaned", "b")} <= set(recorder.events)
+    assert ("start", "c") not in recorder.events
+
+
+def test_critical_path_follows_the_slowest_dependency():
+    timer = FlowTimer()
+    graph = FlowGraph(timer)
+    graph.add("fast", Recorder().step("fast", 0.01))
+    graph.add("slow", Recorder().step("slow", 0.05))
+    graph.add("join", Recorder().step("join"), after=("fast", "slow"))
+
+    asyncio.run(graph.run())
+
+    assert timer.critical_path == ["slow", "join"]
+
+
+def test_cancelled_steps_are_left_off_the_critical_path():
+    timer = FlowTimer()
+    graph = FlowGraph(timer)
+    graph.add("cancelled", Recorder().step("cancelled", 5))
+    graph.add("broken", Recorder().step("broken", 0.02, error=RuntimeError("boom")))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(graph.run())
+
+    assert timer.critical_path == ["broken"]
+
+
+@pytest.fixture
+def reset_bot(monkeypatch, tmp_path):
+    """A reset bot whose browser pool holds one fake browser"""
+    # bot.py imports the Playwright package (not a browser)
+    bot_module = pytest.importorskip("bot")
+    monkeypatch.setattr(bot_module.resource_blocker, "enabled", False)
+
+    def make(browser: FakeBrowser):
+        pool = running_pool(browser, tmp_path)
+        monkeypatch.setattr(bot_module, "browser_pool", pool)
+        bot = bot_module.CapCutPasswordResetBot(capcut_email="a@example.com", gmail_email="inbox@example.com", gmail_app_password="mock")
+        return bot, pool
+    return make
+
+
+@pytest.mark.parametrize("browser", [
+    FakeBrowser(delay=0.1),  # cancelled while the context opens
+    FakeBrowser(page_delay=0.1),  # cancelled after it opened, while the page opens
+], ids=["opening_context", "opening_page"])
+def test_failure_mid_launch_returns_the_context_to_the_pool(reset_bot, browser):
+    bot, pool = reset_bot(browser)
+
+    async def run():
+        graph = FlowGraph(bot.timer)
+        graph.add("launch", bot.ensure_browser, timed=False)
+        graph.add("forgot_request", Recorder().step("forgot_request", 0.02, error=RuntimeError("rejected")))
+        try:
+            await graph.run()
+        except RuntimeError:
+            # What run_complete_flow does after a failed graph
+            await bot.close_browser()
+        await asyncio.sleep(0.2)
+
+    asyncio.run(run())
+    assert pool._browsers[0].active == 0
+    assert all(context.closed for context in browser.contexts)
+
+
+@pytest.mark.parametrize("browser", [
+    FakeBrowser(delay=0.1),
+    FakeBrowser(page_delay=0.1),
+], ids=["opening_context", "opening_page"])
+def test_cancelled_flow_returns_the_context_to_the_pool(reset_bot, monkeypatch, browser):
+    bot, pool = reset_bot(browser)
+
+    async def no_listener():
+        pass
+
+    async def never_answered():
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(bot, "ensure_mail_listener", no_listener)
+    monkeypatch.setattr(bot, "request_reset_email", never_answered)
+
+    async def run():
+        flow = asyncio.create_task(bot.run_complete_flow())
+        await asyncio.sleep(0.05)
+        flow.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flow
+        await asyncio.sleep(0.2)
+
+    asyncio.run(run())
+    assert pool._browsers[0].active == 0
+    assert all(context.closed for context in browser.contexts)
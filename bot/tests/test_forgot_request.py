@@ -0,0 +1,161 @@
+"""
+HTTP fast path against the mock CapCut server
+A recorded forgot password template is replayed for a known account (must be
+accepted), an unknown account (rejected) and with nothing listening (raises);
+in both failure cases the bot falls back to the browser form.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from mock import capcut_server
+from services.forgot_request import EMAIL_PLACEHOLDER, ForgotRequestStrategy, HttpReplayStrategy
+
+ACCOUNT = "bot@example.com"
+
+
+@pytest.fixture(scope="module")
+def capcut_base():
+    port = capcut_server.free_port()
+    server, thread = capcut_server.serve_in_thread(port)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(10)
+
+
+@pytest.fixture
+def strategy(tmp_path):
+    capcut_server.sent_requests.clear()
+    return HttpReplayStrategy(str(tmp_path / "forgot_request.json"), enabled=True, timeout=5)
+
+
+def record(strategy: HttpReplayStrategy, base: str) -> bool:
+    """Record the send_code POST the way a browser run sees it"""
+    # Passport mix_mode, the encoding the real form uses
+    encoded = "".join(f"{byte ^ 5:02x}" for byte in ACCOUNT.encode())
+    return strategy.record(
+        ACCOUNT,
+        method="POST",
+        url=f"{base}{capcut_server.SEND_CODE_PATH}?aid=348188&account_sdk_source=web",
+        headers={"content-type": "application/x-www-form-urlencoded", "cookie": "ttwid=stale", "user-agent": "Mozilla/5.0"},
+        body=f"mix_mode=1&email={encoded}&type=31",
+        referer=f"{base}/login"
+    )
+
+
+async def request_reset(strategy: HttpReplayStrategy, email: str) -> bool:
+    try:
+        return await strategy.request_reset(email)
+    finally:
+        await strategy.close()
+
+
+def test_record_keeps_a_template_without_cookies_or_email(strategy, capcut_base):
+    assert record(strategy, capcut_base)
+
+    with open(strategy.template_file) as f:
+        template = json.load(f)
+    assert template["email_encoding"] == "mixed"
+    assert EMAIL_PLACEHOLDER in template["body"]
+    assert "cookie" not in {name.lower() for name in template["headers"]}
+    assert "stale" not in json.dumps(template)
+
+
+def test_record_skips_request_without_the_account_email(strategy, capcut_base):
+    assert not strategy.record(
+        ACCOUNT,
+        method="POST",
+        url=f"{capcut_base}{capcut_server.SEND_CODE_PATH}",
+        headers={},
+        body="mix_mode=1&type=31",
+        referer=f"{capcut_base}/login"
+    )
+    assert strategy.load_template() is None
+
+
+def test_without_template_nothing_is_sent(strategy, capcut_base):
+    assert not asyncio.run(request_reset(strategy, ACCOUNT))
+    assert not capcut_server.sent_requests
+
+
+def test_replay_for_known_account_is_accepted(strategy, capcut_base):
+    record(strategy, capcut_base)
+
+    assert asyncio.run(request_reset(strategy, ACCOUNT))
+    assert [email for email, _ in capcut_server.sent_requests] == [ACCOUNT]
+
+
+def test_replays_share_pooled_connections(strategy, capcut_base):
+    record(strategy, capcut_base)
+
+    async def replay_many():
+        try:
+            return [await strategy.request_reset(ACCOUNT) for _ in range(5)]
+        finally:
+            await strategy.close()
+
+    assert asyncio.run(replay_many()) == [True] * 5
+    assert len(capcut_server.sent_requests) == 5
+
+
+def test_replay_for_unknown_account_is_rejected(strategy, capcut_base):
+    record(strategy, capcut_base)
+
+    assert not asyncio.run(request_reset(strategy, "someone@example.com"))
+    assert not capcut_server.sent_requests
+
+
+def test_replay_with_server_down_raises(strategy):
+    # Nothing listens on a fresh free port
+    record(strategy, f"http://127.0.0.1:{capcut_server.free_port()}")
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(request_reset(strategy, ACCOUNT))
+
+
+class StubBrowserForm(ForgotRequestStrategy):
+    """Stands in for the browser form - records that the bot fell back to it"""
+
+    name = "browser"
+
+    def __init__(self):
+        self.requested: list[str] = []
+
+    async def request_reset(self, email: str) -> bool:
+        self.requested.append(email)
+        return True
+
+
+@pytest.mark.parametrize("email, server_up", [
+    ("someone@example.com", True),  # rejected by CapCut
+    (ACCOUNT, False),  # CapCut unreachable
+])
+def test_bot_falls_back_to_browser_form(strategy, capcut_base, monkeypatch, email, server_up):
+    # bot.py imports the Playwright package (not a browser)
+    bot_module = pytest.importorskip("bot")
+    record(strategy, capcut_base if server_up else f"http://127.0.0.1:{capcut_server.free_port()}")
+    monkeypatch.setattr(bot_module, "http_forgot_request", strategy)
+
+    bot = bot_module.CapCutPasswordResetBot(capcut_email=email, gmail_email="inbox@example.com", gmail_app_password="mock")
+    browser_form = StubBrowserForm()
+    bot.forgot_strategies = [strategy, browser_form]
+
+    async def no_listener():
+        pass
+    monkeypatch.setattr(bot, "ensure_mail_listener", no_listener)
+
+    async def run():
+        try:
+            await bot.request_reset_email()
+        finally:
+            await strategy.close()
+
+    asyncio.run(run())
+    assert bot.forgot_strategy == "browser"
+    assert browser_form.requested == [email]
+    assert not capcut_server.sent_requests
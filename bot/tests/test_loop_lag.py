@@ -0,0 +1,117 @@
+"""
+Mailbox I/O must keep the bot's event loop responsive
+Runs the mailbox code paths against the mock IMAP server, which answers
+every command late (like a slow Gmail connection), while a loop lag monitor
+samples the event loop.
+"""
+
+import asyncio
+import contextlib
+import time
+
+import pytest
+
+from config import settings
+from mock.imap_server import MockImapServer, build_message
+from mock.loop_lag import LoopLagMonitor
+from services import gmail_handler, mailbox_io
+from services.mail_listener import ResetMailListener
+
+SENDER = "CapCut <admin@mail.capcut.com>"
+SUBJECT = "CapCut password reset request"
+RESET_LINK = "https://www.capcut.com/forget-password?token=lagcheck"
+RESPONSE_DELAY = 0.2
+MAX_LAG_MS = 100
+MAX_FREE_SECONDS = 2
+
+
+@pytest.fixture(scope="module")
+def imap():
+    server = MockImapServer(response_delay=RESPONSE_DELAY).start_in_thread()
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "IMAP_HOST", "127.0.0.1")
+        patch.setattr(settings, "IMAP_PORT", server.port)
+        patch.setattr(settings, "IMAP_SSL", False)
+        # One worker: a call only runs once the previous one let go of it
+        patch.setattr(settings, "MAILBOX_IO_WORKERS", 1)
+        yield server
+    mailbox_io.shutdown()
+    server.stop()
+
+
+@pytest.fixture
+def inbox(imap, request):
+    """A fresh inbox per test - the mail scanner keeps a UID cursor per inbox"""
+    return f"{request.node.name.replace('_', '-')}@example.com"
+
+
+def reset_email(inbox: str) -> bytes:
+    return build_message(SENDER, inbox, SUBJECT, f'<p><a href="{RESET_LINK}">Reset password</a></p>')
+
+
+def test_monitor_catches_a_blocking_call(imap, inbox):
+    imap.deliver(inbox, reset_email(inbox))
+
+    async def run():
+        async with LoopLagMonitor() as monitor:
+            await asyncio.sleep(0.05)
+            assert gmail_handler.get_capcut_reset_link(inbox, "mock") == RESET_LINK
+        return monitor
+
+    monitor = asyncio.run(run())
+    assert monitor.max_ms >= RESPONSE_DELAY * 1000, "monitor did not notice the loop being blocked"
+
+
+def test_async_reset_link_keeps_the_loop_responsive(imap, inbox):
+    imap.deliver(inbox, reset_email(inbox))
+
+    async def run():
+        async with LoopLagMonitor() as monitor:
+            assert await gmail_handler.get_capcut_reset_link_async(inbox, "mock") == RESET_LINK
+        return monitor
+
+    monitor = asyncio.run(run())
+    assert monitor.max_ms < MAX_LAG_MS, f"loop lagged {monitor.max_ms:.0f}ms during mailbox executor call"
+
+
+def test_cancelled_fetch_frees_the_mailbox_worker(imap, inbox):
+    # Nothing will arrive - the fetch polls until cancelled
+    handler = gmail_handler.GmailHandler(inbox, "mock")
+
+    async def run():
+        async with LoopLagMonitor() as monitor:
+            task = asyncio.create_task(handler.fetch_reset_email_async(max_wait_time=60))
+            await asyncio.sleep(1.5)
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+            started = time.perf_counter()
+            await mailbox_io.run_mailbox_io(lambda cancel: None)
+            freed_after = time.perf_counter() - started
+        return monitor, freed_after
+
+    monitor, freed_after = asyncio.run(run())
+    assert freed_after < MAX_FREE_SECONDS, "cancelled fetch kept the mailbox worker busy"
+    assert monitor.max_ms < MAX_LAG_MS, f"loop lagged {monitor.max_ms:.0f}ms during cancelled fetch"
+
+
+def test_idle_listener_keeps_the_loop_responsive_and_stops_cleanly(imap, inbox):
+    listener = ResetMailListener("127.0.0.1", imap.port, ssl=False)
+
+    async def run():
+        async with LoopLagMonitor() as monitor:
+            await listener.start(inbox, "mock")
+            requested_at = time.time()
+            imap.deliver(inbox, reset_email(inbox), delay=1)
+            try:
+                assert await listener.wait_for_link(requested_at, timeout=10, recipient=inbox) == RESET_LINK
+            finally:
+                thread = listener._thread
+                # Right after the link: the listener may still be moving the email out of INBOX
+                await listener.stop()
+        return monitor, thread
+
+    monitor, thread = asyncio.run(run())
+    assert monitor.max_ms < MAX_LAG_MS, f"loop lagged {monitor.max_ms:.0f}ms while the listener waited"
+    assert not thread.is_alive(), "listener thread still running after stop()"
+    assert not imap.folder(inbox).messages, "stop() interrupted moving the handled email out of INBOX"
@@ -0,0 +1,192 @@
+"""
+ResetJobQueue coalescing
+Submissions for an account with a queued or running job join that job, so
+one flow runs and every caller gets its result; other accounts run in
+parallel, and a more urgent submission moves a queued job up.
+"""
+
+import asyncio
+
+import pytest
+
+from services import reset_jobs
+from services.accounts import CapCutAccount
+from services.reset_jobs import ResetJobQueue
+
+ACCOUNT_A = CapCutAccount("a", "a@example.com")
+ACCOUNT_B = CapCutAccount("b", "b@example.com")
+ACCOUNT_C = CapCutAccount("c", "c@example.com")
+
+
+class FakeResets:
+    """Stands in for execute_reset: records each flow and holds it until released"""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.started: list[str] = []
+        self.running = 0
+        self.max_running = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, account: CapCutAccount):
+        self.started.append(account.id)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await self.release.wait()
+        finally:
+            self.running -= 1
+        if self.fail:
+            raise RuntimeError("flow blew up")
+        return True, f"pw-{account.id}", "Password reset successfully", []
+
+
+def run_with_queue(monkeypatch, scenario, concurrency: int = 2, fail: bool = False):
+    """Run scenario(queue, resets) on a started queue whose flows are FakeResets"""
+    async def run():
+        resets = FakeResets(fail=fail)
+        monkeypatch.setattr(reset_jobs, "execute_reset", resets)
+        queue = ResetJobQueue(concurrency=concurrency)
+        await queue.start()
+        try:
+            await asyncio.wait_for(scenario(queue, resets), timeout=5)
+        finally:
+            await queue.stop()
+        return resets
+    return asyncio.run(run())
+
+
+async def until(condition):
+    while not condition():
+        await asyncio.sleep(0.01)
+
+
+def test_submissions_for_a_queued_job_share_one_flow(monkeypatch):
+    async def scenario(queue, resets):
+        jobs = [queue.submit(ACCOUNT_A, kind) for kind in ("manual", "session_end", "manual")]
+        assert len({job.id for job in jobs}) == 1
+        assert jobs[0].coalesced == 2
+
+        resets.release.set()
+        results = await asyncio.gather(*(job.done for job in jobs))
+        assert all(job.status == "succeeded" and job.new_password == "pw-a" for job in results)
+        assert resets.started == ["a"]
+
+    run_with_queue(monkeypatch, scenario)
+
+
+def test_submission_while_running_joins_the_running_job(monkeypatch):
+    async def scenario(queue, resets):
+        first = queue.submit(ACCOUNT_A)
+        await until(lambda: first.status == "running")
+
+        second = queue.submit(ACCOUNT_A, "session_start")
+        assert second is first
+
+        resets.release.set()
+        await first.done
+        assert resets.started == ["a"]
+
+    run_with_queue(monkeypatch, scenario)
+
+
+def test_accounts_are_matched_case_insensitively(monkeypatch):
+    async def scenario(queue, resets):
+        first = queue.submit(ACCOUNT_A)
+        assert queue.submit(CapCutAccount("a", " A@Example.com ")) is first
+        resets.release.set()
+        await first.done
+
+    run_with_queue(monkeypatch, scenario)
+
+
+def test_finished_job_is_not_joined(monkeypatch):
+    async def scenario(queue, resets):
+        resets.release.set()
+        first = queue.submit(ACCOUNT_A)
+        await first.done
+
+        second = queue.submit(ACCOUNT_A)
+        assert second is not first
+        await second.done
+        assert resets.started == ["a", "a"]
+
+    run_with_queue(monkeypatch, scenario)
+
+
+def test_different_accounts_run_in_parallel(monkeypatch):
+    async def scenario(queue, resets):
+        jobs = [queue.submit(account) for account in (ACCOUNT_A, ACCOUNT_B)]
+        await until(lambda: resets.running == 2)
+        resets.release.set()
+        await asyncio.gather(*(job.done for job in jobs))
+
+    resets = run_with_queue(monkeypatch, scenario, concurrency=2)
+    assert resets.max_running == 2
+    assert sorted(resets.started) == ["a", "b"]
+
+
+def test_urgent_submission_moves_a_queued_job_up(monkeypatch):
+    async def scenario(queue, resets):
+        # One worker, busy with A: B and C wait in the queue
+        busy = queue.submit(ACCOUNT_A)
+        await until(lambda: busy.status == "running")
+        queue.submit(ACCOUNT_B, "manual")
+        c_job = queue.submit(ACCOUNT_C, "manual")
+
+        assert queue.submit(ACCOUNT_C, "session_start") is c_job
+        assert c_job.priority == reset_jobs.JOB_PRIORITIES["session_start"]
+
+        resets.release.set()
+        await until(lambda: len(resets.started) == 3)
+
+    resets = run_with_queue(monkeypatch, scenario, concurrency=1)
+    assert resets.started == ["a", "c", "b"]
+
+
+def test_callbacks_are_merged_and_sent_once_each(monkeypatch):
+    sent = []
+
+    async def scenario(queue, resets):
+        async def record_callback(job, callback_url):
+            sent.append((job.id, callback_url))
+        monkeypatch.setattr(queue, "_send_callback", record_callback)
+
+        job = queue.submit(ACCOUNT_A, callback_url="http://backend/one")
+        queue.submit(ACCOUNT_A, callback_url="http://backend/two")
+        queue.submit(ACCOUNT_A, callback_url="http://backend/one")
+        assert job.callback_urls == ["http://backend/one", "http://backend/two"]
+
+        resets.release.set()
+        await job.done
+        await until(lambda: len(sent) == 2)
+
+    run_with_queue(monkeypatch, scenario)
+    assert [url for _, url in sent] == ["http://backend/one", "http://backend/two"]
+
+
+def test_failed_flow_fails_every_joined_submission(monkeypatch):
+    async def scenario(queue, resets):
+        first = queue.submit(ACCOUNT_A)
+        second = queue.submit(ACCOUNT_A)
+        resets.release.set()
+        await first.done
+
+        assert second.status == "failed"
+        assert second.message == "Error: flow blew up"
+        # The account is free again for the next attempt
+        assert queue.submit(ACCOUNT_A) is not first
+
+    resets = run_with_queue(monkeypatch, scenario, fail=True)
+    assert resets.started[0] == "a"
+
+
+@pytest.mark.parametrize("kind", ["session_start", "session_end", "manual", "unknown"])
+def test_job_priority_by_kind(monkeypatch, kind):
+    async def scenario(queue, resets):
+        job = queue.submit(ACCOUNT_A, kind)
+        assert job.priority == reset_jobs.JOB_PRIORITIES.get(kind, reset_jobs.JOB_PRIORITIES["manual"])
+        resets.release.set()
+        await job.done
+
+    run_with_queue(monkeypatch, scenario)
@@ -0,0 +1,37 @@
+"""
+Reset link extraction on the sample email corpus (mock/reset_email_corpus.py)
+Every sample must give exactly its expected link (and code); emails that
+aren't reset requests must give none. Timing lives in
+mock/benchmark_reset_link.py.
+"""
+
+import pytest
+
+from mock.reset_email_corpus import SAMPLES
+from services.gmail_handler import GmailHandler
+from services.reset_link import extract_reset_link, extract_verification_code
+
+CODE_SAMPLES = [sample for sample in SAMPLES if "code" in sample]
+
+
+@pytest.mark.parametrize("sample", SAMPLES, ids=[sample["name"] for sample in SAMPLES])
+def test_corpus_link(sample):
+    assert extract_reset_link(sample["body"]) == sample["link"]
+
+
+@pytest.mark.parametrize("sample", CODE_SAMPLES, ids=[sample["name"] for sample in CODE_SAMPLES])
+def test_corpus_code(sample):
+    assert extract_verification_code(sample["body"]) == sample["code"]
+
+
+@pytest.mark.parametrize("sample", SAMPLES, ids=[sample["name"] for sample in SAMPLES])
+def test_polling_handler_agrees_with_the_listener(sample):
+    # gmail_handler and the IDLE listener must pick the same link
+    info = GmailHandler("inbox@example.com", "mock")._extract_reset_info(sample["body"])
+    assert info.get("reset_link") == sample["link"]
+
+
+@pytest.mark.parametrize("body", ["", None])
+def test_empty_body(body):
+    assert extract_reset_link(body) is None
+    assert extract_verification_code(body) is None
@@ -0,0 +1,79 @@
+"""
+Finding the reset email in the inbox - the IDLE listener and the polling
+handler - against the mock IMAP server
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from config import settings
+from mock import imap_server
+from mock.imap_server import MockImapServer, build_message
+from services.gmail_handler import GmailHandler
+from services.mail_listener import ResetMailListener
+
+SENDER = "CapCut <admin@mail.capcut.com>"
+SUBJECT = "CapCut password reset request"
+
+
+@pytest.fixture(scope="module")
+def imap():
+    server = MockImapServer().start_in_thread()
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "IMAP_HOST", "127.0.0.1")
+        patch.setattr(settings, "IMAP_PORT", server.port)
+        patch.setattr(settings, "IMAP_SSL", False)
+        yield server
+    server.stop()
+
+
+@pytest.fixture
+def inbox(imap, request):
+    """A fresh inbox per test - the mail scanner keeps a UID cursor per inbox"""
+    return f"{request.node.name.replace('_', '-')}@example.com"
+
+
+def reset_email(inbox: str, token: str) -> bytes:
+    link = f"https://www.capcut.com/forget-password?token={token}"
+    return build_message(SENDER, inbox, SUBJECT, f'<p><a href="{link}">Reset password</a></p>')
+
+
+def wait_for_delivery(imap, inbox: str, count: int) -> None:
+    deadline = time.time() + 5
+    while len(imap.folder(inbox).messages) < count:
+        assert time.time() < deadline, "mock server never delivered"
+        time.sleep(0.01)
+
+
+def test_listener_rescans_recent_mail_after_uidvalidity_changes(imap, inbox, monkeypatch):
+    listener = ResetMailListener("127.0.0.1", imap.port, ssl=False)
+    requested_at = time.time()
+
+    async def run():
+        await listener.start(inbox, "mock")
+        await listener.stop()
+        # Lands while the listener is away, and the server renumbers INBOX
+        imap.deliver(inbox, reset_email(inbox, "while-away"))
+        wait_for_delivery(imap, inbox, 1)
+        monkeypatch.setattr(imap_server, "UIDVALIDITY", imap_server.UIDVALIDITY + 1)
+        await listener.start(inbox, "mock")
+        try:
+            return await listener.wait_for_link(requested_at, timeout=5, recipient=inbox)
+        finally:
+            await listener.stop()
+
+    assert asyncio.run(run()) == "https://www.capcut.com/forget-password?token=while-away"
+
+
+def test_polling_handler_picks_the_newest_reset_email(imap, inbox):
+    imap.deliver(inbox, reset_email(inbox, "older"))
+    imap.deliver(inbox, reset_email(inbox, "newer"))
+    wait_for_delivery(imap, inbox, 2)
+
+    info = GmailHandler(inbox, "mock").fetch_reset_email(max_wait_time=5)
+
+    assert info["reset_link"] == "https://www.capcut.com/forget-password?token=newer"
+    # The stale one left INBOX too
+    assert not imap.folder(inbox).messages
@@ -0,0 +1,34 @@
+"""
+Selector hit counts: kept in memory on every resolve, written in batches
+"""
+
+import json
+
+from services.selector_resolver import SelectorResolver
+
+
+def test_record_does_not_write_until_flushed(tmp_path):
+    stats_file = tmp_path / "selector_stats.json"
+    resolver = SelectorResolver(str(stats_file))
+
+    resolver.record("step", "#b")
+    resolver.record("step", "#b")
+    assert not stats_file.exists()
+
+    resolver.flush()
+    assert json.loads(stats_file.read_text()) == {"step": {"#b": 2}}
+    assert SelectorResolver(str(stats_file)).ordered("step", ["#a", "#b"]) == ["#b", "#a"]
+
+
+def test_saves_are_spaced_out(tmp_path):
+    resolver = SelectorResolver(str(tmp_path / "selector_stats.json"))
+
+    resolver.record("step", "#a")
+    assert resolver._save_due()
+    resolver.flush()
+
+    resolver.record("step", "#a")
+    assert not resolver._save_due(), "saved again within SAVE_INTERVAL_SECONDS"
+    resolver.flush()
+    assert not resolver._save_due()
+    assert json.loads((tmp_path / "selector_stats.json").read_text()) == {"step": {"#a": 2}}
@@ -16,6 +16,7 @@ interface BookingData {
   sessionId: string
   startTime: string
   endTime: string
+  revealToken?: string
 }
 
 export default function BookSlotPage() {
@@ -28,7 +29,7 @@ export default function BookSlotPage() {
     setStep('slots')
   }
 
-  const handleBookingComplete = async (sessionId: string) => {
+  const handleBookingComplete = async (sessionId: string, revealToken?: string) => {
     try {
       const { getSessionDetails } = await import('@/lib/api')
       const sessionData = await getSessionDetails(sessionId)
@@ -37,7 +38,8 @@ export default function BookSlotPage() {
         setBookingData({
           sessionId,
           startTime: sessionData.start_time,
-          endTime: sessionData.end_time
+          endTime: sessionData.end_time,
+          revealToken
         })
         setStep('confirmation')
       } else {
@@ -58,7 +60,8 @@ export default function BookSlotPage() {
       setBookingData({
         sessionId,
         startTime: nextSlot.toISOString(),
-        endTime: endTime.toISOString()
+        endTime: endTime.toISOString(),
+        revealToken
       })
       setStep('confirmation')
     }
@@ -175,6 +178,7 @@ export default function BookSlotPage() {
               userDetails={userDetails}
               startTime={bookingData.startTime}
               endTime={bookingData.endTime}
+              revealToken={bookingData.revealToken}
             />
             <div className="text-center space-y-4">
               <motion.button
@@ -1,23 +1,68 @@
 'use client'
 import { useState, useEffect } from 'react'
 import { motion } from 'framer-motion'
-import { CheckCircle, Clock, Mail, LogOut, HelpCircle } from 'lucide-react'
+import { CheckCircle, Clock, Mail, LogOut, HelpCircle, KeyRound } from 'lucide-react'
 import { formatDateTime, formatTime } from '@/lib/utils'
+import { revealCredentials, APIError, SessionCredentials } from '@/lib/api'
 
 interface ConfirmationModalProps {
   sessionId: string
   userDetails: { name: string; email: string }
   startTime: string
   endTime: string
+  revealToken?: string
+}
+
+const REVEAL_POLL_MS = 5000
+
+// Once the session starts, poll the one-time reveal endpoint until the
+// backend activates the session - no need to wait for the email to arrive
+function useCredentialReveal(sessionId: string, startTime: string, revealToken?: string) {
+  const [credentials, setCredentials] = useState<SessionCredentials | null>(null)
+  const [unavailable, setUnavailable] = useState(false)
+
+  useEffect(() => {
+    if (!revealToken) return
+
+    let cancelled = false
+    let timer: ReturnType<typeof setTimeout>
+
+    const attempt = async () => {
+      try {
+        const revealed = await revealCredentials(sessionId, revealToken)
+        if (!cancelled) setCredentials(revealed)
+      } catch (error) {
+        if (cancelled) return
+        if (error instanceof APIError && error.status === 409) {
+          // Session not active yet - try again shortly
+          timer = setTimeout(attempt, REVEAL_POLL_MS)
+        } else {
+          setUnavailable(true)
+        }
+      }
+    }
+
+    const msUntilStart = new Date(startTime).getTime() - Date.now()
+    timer = setTimeout(attempt, Math.max(msUntilStart, 0))
+
+    return () => {
+      cancelled = true
+      clearTimeout(timer)
+    }
+  }, [sessionId, startTime, revealToken])
+
+  return { credentials, unavailable }
 }
 
 export default function ConfirmationModal({ 
   sessionId, 
   userDetails, 
   startTime, 
-  endTime 
+  endTime,
+  revealToken
 }: ConfirmationModalProps) {
   const [timeUntilStart, setTimeUntilStart] = useState<string>('')
+  const { credentials, unavailable } = useCredentialReveal(sessionId, startTime, revealToken)
 
   useEffect(() => {
     const updateCountdown = () => {
@@ -110,6 +155,29 @@ export default function ConfirmationModal({
         </div>
       </motion.div>
 
+      {/* One-time credentials reveal */}
+      {credentials && (
+        <motion.div 
+          initial={{ opacity: 0, y: 20 }}
+          animate={{ opacity: 1, y: 0 }}
+          className="bg-primary/10 border border-primary/30 rounded-xl p-6 mb-6 text-center"
+        >
+          <h3 className="text-lg font-bold text-white mb-2 flex items-center justify-center gap-2">
+            <KeyRound className="w-5 h-5 text-primary" /> Your CapCut Login
+          </h3>
+          <div className="text-white/80 font-mono break-all select-all mb-1">{credentials.email}</div>
+          <div className="text-2xl font-mono text-primary break-all select-all mb-2">{credentials.password}</div>
+          <p className="text-sm text-white/60">
+            Shown only once - copy it now. The same details are on their way to your email.
+          </p>
+        </motion.div>
+      )}
+      {unavailable && !credentials && (
+        <div className="bg-white/5 border border-white/10 rounded-xl p-4 mb-6 text-center text-sm text-white/60">
+          Check your email for your login details.
+        </div>
+      )}
+
       {/* Session Details */}
       <motion.div 
         initial={{ opacity: 0, y: 20 }}
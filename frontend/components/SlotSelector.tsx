@@ -10,11 +10,13 @@ interface TimeSlot {
   start_time: string
   end_time: string
   available: boolean
+  seats_total?: number
+  seats_remaining?: number
 }
 
 interface SlotSelectorProps {
   userDetails: { name: string; email: string }
-  onBookingComplete: (sessionId: string) => void
+  onBookingComplete: (sessionId: string, revealToken?: string) => void
 }
 
 interface GroupedSlots {
@@ -108,7 +110,7 @@ export default function SlotSelector({ userDetails, onBookingComplete }: SlotSel
       })
       
       if (data.success && data.session_id) {
-        onBookingComplete(data.session_id)
+        onBookingComplete(data.session_id, data.reveal_token)
       } else {
         throw new Error('Invalid booking response')
       }
@@ -153,7 +155,11 @@ export default function SlotSelector({ userDetails, onBookingComplete }: SlotSel
       bgClass = 'bg-white/5 hover:bg-white/10 hover:border-primary/50'
       borderClass = 'border-white/20'
       isClickable = true
-      statusBadge = { bg: 'bg-primary/20', text: 'text-primary', label: 'Available' }
+      statusBadge = {
+        bg: 'bg-primary/20',
+        text: 'text-primary',
+        label: (slot.seats_total ?? 1) > 1 ? `${slot.seats_remaining} of ${slot.seats_total} left` : 'Available'
+      }
     } else {
       bgClass = 'bg-accent/10'
       borderClass = 'border-accent/30'
@@ -15,6 +15,8 @@ export interface TimeSlot {
   start_time: string
   end_time: string
   available: boolean
+  seats_total?: number
+  seats_remaining?: number
 }
 
 export interface BookingRequest {
@@ -27,6 +29,7 @@ export interface BookingResponse {
   success: boolean
   session_id: string
   message: string
+  reveal_token?: string
 }
 
 export interface ActiveSession {
@@ -45,6 +48,24 @@ export interface SessionDetails {
   status: string
 }
 
+export interface SessionCredentials {
+  session_id: string
+  email: string
+  password: string
+  start_time: string
+  end_time: string
+}
+
+// Error carrying the HTTP status so callers can tell "not yet" (409) from "gone" (410)
+export class APIError extends Error {
+  status: number
+
+  constructor(message: string, status: number) {
+    super(message)
+    this.status = status
+  }
+}
+
 class APIClient {
   private async request<T>(endpoint: string, options?: RequestInit): Promise<T> {
     const url = `${API_BASE_URL}${endpoint}`
@@ -62,7 +83,7 @@ class APIClient {
       
       if (!response.ok) {
         const errorData = await response.json().catch(() => ({}))
-        throw new Error(errorData.detail || `HTTP ${response.status}: ${response.statusText}`)
+        throw new APIError(errorData.detail || `HTTP ${response.status}: ${response.statusText}`, response.status)
       }
 
       return await response.json()
@@ -96,6 +117,14 @@ class APIClient {
   async getSessionDetails(sessionId: string): Promise<SessionDetails> {
     return this.request<SessionDetails>(`/api/sessions/${sessionId}`)
   }
+
+  // Reveal session credentials once (token from createBooking)
+  async revealCredentials(sessionId: string, token: string): Promise<SessionCredentials> {
+    return this.request<SessionCredentials>(
+      `/api/sessions/${sessionId}/credentials?token=${encodeURIComponent(token)}`,
+      { cache: 'no-store' }
+    )
+  }
 }
 
 // Export singleton instance
@@ -105,4 +134,5 @@ export const apiClient = new APIClient()
 export const getSlots = apiClient.getSlots.bind(apiClient)
 export const createBooking = apiClient.createBooking.bind(apiClient)
 export const getActiveSession = apiClient.getActiveSession.bind(apiClient)
-export const getSessionDetails = apiClient.getSessionDetails.bind(apiClient)
\ No newline at end of file
+export const getSessionDetails = apiClient.getSessionDetails.bind(apiClient)
+export const revealCredentials = apiClient.revealCredentials.bind(apiClient)
\ No newline at end of file